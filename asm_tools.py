@@ -2,10 +2,35 @@
 
 This file includes helper functions to process assembly file.
 
+The module level functions accept the assembly code either as a list of lines
+or as an `AssemblyIndex`. The index is built once per assembly file. It decodes
+the instructions into a columnar `InstructionTable` and answers address and
+function lookups without scanning the assembly code again.
 
 """
 
 
+# Type hints support regarding collections
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+# Binary search over the start addresses of functions
+from bisect import bisect_left, bisect_right
+
+# Columns of the instruction table
+from array import array
+
+
+# Conditional branch instructions
+branch_inst = ["beq", "bne", "blt", "bltu", "bge", "bgeu", "beqz", "bnez",
+    "bltz", "blez", "bgtz", "bgez", "bgt", "bgtu", "ble", "bleu"]
+
+# Unconditional jump instruction
+jump_inst = ["ret", "jal", "j", "jalr", "jr"]
+
+# Instructions whose last operand is the target address.
+DIRECT_JUMP_INST = frozenset(branch_inst + ["jal", "j"])
+
+
 def get_function_start(function_name: str, assembly_code: list) -> int:
     """Detects the line number of the first instruction of a function.
 
@@ -21,7 +46,7 @@ def get_function_start(function_name: str, assembly_code: list) -> int:
     ----------
     function_name : str
         The name of the function which will be searched in the assembly code.
-    assembly_code : list of str
+    assembly_code : list of str or AssemblyIndex
         Assembly code in which the main function will be searched.
     
     Returns
@@ -36,19 +61,7 @@ def get_function_start(function_name: str, assembly_code: list) -> int:
         If the function is not found in the assembly code.
     """
 
-    line_no: int = -1
-    function_declaration:str = '<' + function_name + '>:'
-
-    for index, line in enumerate(assembly_code):
-        if function_declaration in line:
-            line_no = index
-            break
-
-    if line_no == -1:
-        raise Exception("The function" + function_name + "could not be found "
-                        "in the current assembly code.")
-    else:
-        return line_no + 1
+    return _get_index(assembly_code).get_function(function_name).start_line
 
 
 
@@ -67,7 +80,7 @@ def get_function_end(function_name: str, assembly_code: list) -> int:
     ----------
     function_name : str
         The name of the function which will be searched in the assembly code.
-    assembly_code : list of str
+    assembly_code : list of str or AssemblyIndex
         Assembly code in which the main function will be searched.
     
     Returns
@@ -84,30 +97,13 @@ def get_function_end(function_name: str, assembly_code: list) -> int:
     """
 
 
-    found = False
-    start_no = get_function_start(function_name, assembly_code)
-
-    line_no = start_no - 1
-    for line in assembly_code[start_no:]:
-        line_no = line_no + 1
-        
-        # If an empty line is found this means that the end of the function is 
-        # reached and no ret instruction is encountered
-        if (line == ''):
-            break
-        
-        # Tokenize the current line and check if it is ret instruction or not.
-        tokens = line.split()
-        if (len(tokens) >= 3 and tokens[2] == 'ret'):
-            found = True
-            break
-
+    symbol = _get_index(assembly_code).get_function(function_name)
 
-    if found == True:
-        return line_no
-    else:
+    if symbol.end_line is None:
         raise Exception("The end point of the function" + function_name + "could "
                         "not be found in the current assembly code.")
+    else:
+        return symbol.end_line
 
 
 
@@ -127,7 +123,7 @@ def address_to_line_no(address: str, assembly_code: list) -> int:
     ----------
     address : str
         The address whose line number will be searched.
-    assembly_code : list of str
+    assembly_code : list of str or AssemblyIndex
         Assembly code in which the address will be searched.
 
     Returns
@@ -141,23 +137,7 @@ def address_to_line_no(address: str, assembly_code: list) -> int:
         If the address is not found in the assembly code.
     """
 
-    line_no: int = -1
-    found: bool = False
-
-    for index, line in enumerate(assembly_code):
-        tokens = line.split()
-        # If len(tokens >=3) this is a valid code line.
-        # -1 is to discard the colon symbol (:) at the end of the token.
-        if len(tokens) >= 3 and tokens[0][:-1] == address:
-            line_no = index
-            break
-
-    if line_no == -1:
-        raise Exception("The address could not be found in the current assembly "
-                        "file. The line number of address could not be "
-                        "determined. Address: " + address)
-    else:
-        return line_no
+    return _get_index(assembly_code).address_to_line_no(address)
 
 
 def get_function_name(address: str, assembly_code: list) -> str:
@@ -167,17 +147,17 @@ def get_function_name(address: str, assembly_code: list) -> str:
     as argument. Expected address information is in bare hexadecimal format 
     without any 0x, h, etc. extension. A sample address is "101e8".
 
-    This function first gets the line number of the address. Then it processes
-    the assembly code backwards and looks for the template of function start
-    line. A sample function start line is like "000000000001019c <calc>:". It
-    looks for the ">:" symbols at the end of the line. When found it extracts
-    the string inside angle brackets (< and >). This is the function name.
+    A sample function start line is like "000000000001019c <calc>:". The
+    string inside angle brackets (< and >) is the function name. The function
+    start lines are collected into the symbol table of the `AssemblyIndex`, and
+    the function which includes the address is found with a binary search over
+    the address ranges of the functions.
 
     Parameters
     ----------
     address : str
         The address of the code line whose function will be searched.
-    assembly_code : list of str
+    assembly_code : list of str or AssemblyIndex
         Assembly code in which the function name will be searched.
 
     Returns
@@ -191,20 +171,524 @@ def get_function_name(address: str, assembly_code: list) -> str:
         If the function name is not found in the assembly code.
     """
 
-    function_name: str = None
-    line_no: int = -1
+    index = _get_index(assembly_code)
+    line_no = index.address_to_line_no(address)
 
-    line_no = address_to_line_no(address, assembly_code)
-    if line_no == -1:
-        raise Exception("Line number of the address can not be determined. Address: " + address)
+    return index.function_at_address(index.address_of_line(line_no)).name
 
-    for i in range(line_no, -1, -1):
-        tokens = assembly_code[i].split()
-        if (len(tokens) == 2) and (">:" in tokens[1]):
-            function_name = tokens[1][1 : -2]
-            break
 
-    if function_name is None:
-        raise Exception("Function name can not be determined. Address: " + address)
-    else:
-        return function_name
\ No newline at end of file
+class FunctionSymbol:
+    """An entry of the function symbol table.
+
+    Attributes
+    ----------
+    name : str
+        Name of the function.
+    start_line : int
+        Line number of the first instruction of the function.
+    end_line : int or None
+        Line number of the first "ret" instruction of the function. This is the
+        value which is used as the end point of the function. None if the
+        function does not have a "ret" instruction.
+    ret_lines : list of int
+        Line numbers of all of the "ret" instructions of the function.
+    start_address : int
+        Address of the first instruction of the function.
+    end_address : int
+        Address of the last instruction of the function.
+    """
+
+    __slots__ = ('name', 'start_line', 'end_line', 'ret_lines',
+                 'start_address', 'end_address')
+
+    def __init__(self, name: str, start_line: int, start_address: int):
+        self.name: str = name
+        self.start_line: int = start_line
+        self.end_line: Optional[int] = None
+        self.ret_lines: List[int] = []
+        self.start_address: int = start_address
+        self.end_address: int = start_address
+
+
+    def __repr__(self) -> str:
+        return (f"FunctionSymbol({self.name!r}, start_line={self.start_line}, "
+                f"end_line={self.end_line}, "
+                f"addresses={self.start_address:x}-{self.end_address:x})")
+
+
+
+class InstructionTable:
+    """Columnar table of the instructions of the assembly code.
+
+    The assembly code is decoded once into this table. Each instruction is a
+    row of the table, and each column is an array. The rows are in the order of
+    the assembly code. The analysis iterates over the table instead of
+    tokenizing the lines of the assembly code again and again.
+
+    A sample instruction line is "   100c4:	220000ef   jal	ra,102e4 <memset>".
+    Its row is: address 0x100c4, line number, code 0x220000ef, size 4, the id of
+    "jal", operands ("ra", "102e4"), target 0x102e4 and the id of the function.
+
+    Attributes
+    ----------
+    addresses : array of int
+        Address of each instruction.
+    lines : array of int
+        Line number of each instruction.
+    codes : array of int
+        Machine code of each instruction.
+    sizes : array of int
+        Size of the machine code of each instruction in bytes, 2 for compressed
+        instructions and 4 for the others.
+    mnemonics : array of int
+        Id of the mnemonic of each instruction. The ids are indexes of
+        `mnemonic_names`.
+    mnemonic_names : list of str
+        Interned mnemonics.
+    operands : list of tuple of str
+        Operands of each instruction.
+    targets : array of int
+        Target address of each branch, j and jal instruction, -1 for the other
+        instructions.
+    function_ids : array of int
+        Id of the function of each instruction. The instructions after a
+        function start line up to the next empty line have the same id.
+    """
+
+    __slots__ = ('addresses', 'lines', 'codes', 'sizes', 'mnemonics',
+                 'mnemonic_names', 'mnemonic_ids', 'operands', 'targets',
+                 'function_ids')
+
+    def __init__(self):
+        self.addresses: array = array('Q')
+        self.lines: array = array('q')
+        self.codes: array = array('Q')
+        self.sizes: array = array('B')
+        self.mnemonics: array = array('H')
+        self.mnemonic_names: List[str] = []
+        self.mnemonic_ids: Dict[str, int] = {}
+        self.operands: List[tuple] = []
+        self.targets: array = array('q')
+        self.function_ids: array = array('q')
+
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+
+    def append(self, line_no: int, address: int, tokens: list,
+               function_id: int) -> None:
+        """Adds the tokenized instruction line to the table."""
+
+        mnemonic = tokens[2]
+        mnemonic_id = self.mnemonic_ids.get(mnemonic)
+        if mnemonic_id is None:
+            mnemonic_id = len(self.mnemonic_names)
+            self.mnemonic_ids[mnemonic] = mnemonic_id
+            self.mnemonic_names.append(mnemonic)
+
+        # tokens[3] -> operands, the rest of the tokens are comments.
+        operands = tuple(tokens[3].split(',')) if len(tokens) > 3 else ()
+
+        target = -1
+        if operands and mnemonic in DIRECT_JUMP_INST:
+            target = _to_int(operands[-1])
+            if target is None:
+                target = -1
+
+        self.addresses.append(address)
+        self.lines.append(line_no)
+        self.codes.append(int(tokens[1], 16))
+        self.sizes.append(len(tokens[1]) // 2)
+        self.mnemonics.append(mnemonic_id)
+        self.operands.append(operands)
+        self.targets.append(target)
+        self.function_ids.append(function_id)
+
+
+    def mnemonic(self, instruction: int) -> str:
+        """Returns the mnemonic of an instruction."""
+
+        return self.mnemonic_names[self.mnemonics[instruction]]
+
+
+    def is_call(self, instruction: int) -> bool:
+        """Returns True if an instruction is a function call.
+
+        A function call is a jal or jalr instruction which writes the return
+        address to the link register (ra or t0). The link register is decoded
+        from the machine code, since it is not written by objdump for the
+        pseudo instructions like "jal 102e4" and "jalr a5".
+        """
+
+        if self.mnemonic(instruction) not in ("jal", "jalr"):
+            return False
+
+        code = self.codes[instruction]
+
+        # Compressed c.jal and c.jalr instructions always write ra.
+        if self.sizes[instruction] == 2:
+            return True
+
+        return (code >> 7) & 0x1f in (1, 5)
+
+
+    def is_return(self, instruction: int) -> bool:
+        """Returns True if an instruction returns from a function.
+
+        A return is a jump to the address in the link register (ra or t0)
+        which does not write a link register, like "ret" and "jr ra".
+        """
+
+        if self.mnemonic(instruction) not in ("ret", "jr", "jalr"):
+            return False
+
+        code = self.codes[instruction]
+
+        if self.sizes[instruction] == 2:
+            # c.jr: the source register is in bits 7 to 11.
+            return (code & 0xf07f) == 0x8002 and (code >> 7) & 0x1f in (1, 5)
+
+        return (code >> 7) & 0x1f == 0 and (code >> 15) & 0x1f in (1, 5)
+
+
+    def mnemonic_id_set(self, mnemonics: Iterable[str]) -> Set[int]:
+        """Returns the ids of the mnemonics which are present in the table."""
+
+        return {self.mnemonic_ids[mnemonic] for mnemonic in mnemonics
+                if mnemonic in self.mnemonic_ids}
+
+
+    def index_of_line(self, line_no: int) -> int:
+        """Returns the index of the first instruction at or after a line."""
+
+        return bisect_left(self.lines, line_no)
+
+
+
+class AssemblyIndex:
+    """Index of the assembly code of a program.
+
+    The index is built once per assembly file. While building it every line of
+    the assembly code is tokenized a single time, and three tables are filled:
+
+    1. The instruction table. Each instruction line is decoded into a row of
+    the columnar `InstructionTable`.
+    2. The address of each instruction line is stored in a dictionary together
+    with its line number. Converting an address to a line number is a
+    dictionary lookup instead of a scan over the whole assembly code.
+    3. The function symbol table. Each function start line like
+    "000000000001019c <calc>:" creates a `FunctionSymbol` which holds the start
+    line, the end line and the address range of the function. The function
+    which includes an address is found with a binary search over the start
+    addresses of the functions.
+
+    Addresses are stored as integers. Therefore "000100c8", "100c8" and 0x100c8
+    refer to the same instruction.
+
+    The index can be used in place of the list of lines if the lines are kept.
+    Indexing and iterating the index work on the lines of the assembly code.
+    The index which is built by `from_file` does not keep the lines.
+
+    Attributes
+    ----------
+    assembly_code : list of str or None
+        Assembly code of the program, None if the lines are not kept.
+    line_count : int
+        Number of lines of the assembly code.
+    instructions : InstructionTable
+        Decoded instructions of the assembly code.
+    line_numbers : dict of int to int
+        Maps the address of each instruction to its line number.
+    functions : list of FunctionSymbol
+        Function symbol table sorted by start address.
+    """
+
+    def __init__(self, assembly_code: Iterable[str], keep_lines: bool = True):
+        """Builds the index of the given assembly code.
+
+        Parameters
+        ----------
+        assembly_code : iterable of str
+            Assembly code of the program.
+        keep_lines : bool
+            Keep the lines of the assembly code in the index.
+        """
+
+        if keep_lines and not isinstance(assembly_code, list):
+            assembly_code = list(assembly_code)
+
+        self.assembly_code: Optional[list] = assembly_code if keep_lines else None
+        self.line_count: int = 0
+        self.instructions: InstructionTable = InstructionTable()
+        self.line_numbers: Dict[int, int] = {}
+        self.functions: List[FunctionSymbol] = []
+        self._functions_by_name: Dict[str, FunctionSymbol] = {}
+        self._functions_by_id: Dict[int, FunctionSymbol] = {}
+
+        # Function whose instructions are being read. An empty line is the end
+        # of a function.
+        current: Optional[FunctionSymbol] = None
+        header: Optional[str] = None
+        function_id = 0
+
+        for line_no, line in enumerate(assembly_code):
+            self.line_count = line_no + 1
+            line = line.rstrip('\n')
+
+            if line == '':
+                current = None
+                header = None
+                function_id += 1
+                continue
+
+            tokens = line.split()
+
+            # A function start line, sample: "000000000001019c <calc>:"
+            if (len(tokens) == 2) and (">:" in tokens[1]):
+                header = tokens[1][1 : -2]
+                current = None
+                function_id += 1
+                continue
+
+            address = _parse_tokens(tokens)
+            if address is None:
+                continue
+
+            # Keep the first occurrence like the linear search did.
+            if address not in self.line_numbers:
+                self.line_numbers[address] = line_no
+
+            self.instructions.append(line_no, address, tokens, function_id)
+
+            if header is not None:
+                current = FunctionSymbol(header, line_no, address)
+                # Keep the first function with the same name.
+                self._functions_by_name.setdefault(header, current)
+                self._functions_by_id[function_id] = current
+                self.functions.append(current)
+                header = None
+
+            if current is not None:
+                current.end_address = address
+                if tokens[2] == 'ret':
+                    current.ret_lines.append(line_no)
+                    if current.end_line is None:
+                        current.end_line = line_no
+
+        self.functions.sort(key = lambda symbol: symbol.start_address)
+        self._start_addresses: List[int] = [symbol.start_address
+                                            for symbol in self.functions]
+
+
+    @classmethod
+    def from_file(cls, assembly_file: str) -> "AssemblyIndex":
+        """Builds the index of an assembly file without keeping its lines.
+
+        The assembly file is read line by line, so only the decoded tables are
+        kept in memory.
+        """
+
+        with open(assembly_file) as f:
+            return cls(f, keep_lines = False)
+
+
+    def __getitem__(self, line_no):
+        return self._lines()[line_no]
+
+
+    def __iter__(self):
+        return iter(self._lines())
+
+
+    def __len__(self) -> int:
+        return self.line_count
+
+
+    def _lines(self) -> list:
+        if self.assembly_code is None:
+            raise Exception("The lines of the assembly code are not kept in "
+                            "the index.")
+        return self.assembly_code
+
+
+    def address_to_line_no(self, address: Union[str, int]) -> int:
+        """Finds the line number of an address.
+
+        Parameters
+        ----------
+        address : str or int
+            The address whose line number will be searched. A string is
+            expected in bare hexadecimal format like "101e8".
+
+        Returns
+        -------
+        int
+            The line number of the address if successful.
+
+        Raises
+        ------
+        Exception
+            If the address is not found in the assembly code.
+        """
+
+        key = address if isinstance(address, int) else _to_int(address)
+        line_no = self.line_numbers.get(key, -1)
+
+        if line_no == -1:
+            raise Exception("The address could not be found in the current assembly "
+                            "file. The line number of address could not be "
+                            "determined. Address: " + str(address))
+        else:
+            return line_no
+
+
+    def address_of_line(self, line_no: int) -> int:
+        """Returns the address of an instruction line.
+
+        Raises
+        ------
+        Exception
+            If the line is not an instruction line.
+        """
+
+        table = self.instructions
+        instruction = table.index_of_line(line_no)
+
+        if instruction == len(table) or table.lines[instruction] != line_no:
+            raise Exception("The line is not an instruction line. Line: "
+                            + str(line_no))
+        else:
+            return table.addresses[instruction]
+
+
+    def find_instructions(self, mnemonics: Iterable[str]) -> List[int]:
+        """Returns the addresses of the instructions with the given mnemonics.
+
+        Parameters
+        ----------
+        mnemonics : iterable of str
+            Mnemonics of the instructions, like "jr" and "jalr".
+
+        Returns
+        -------
+        list of int
+            Addresses of the matching instructions in the order of the
+            assembly code.
+        """
+
+        table = self.instructions
+        ids = table.mnemonic_id_set(mnemonics)
+
+        return [address for address, mnemonic in zip(table.addresses, table.mnemonics)
+                if mnemonic in ids]
+
+
+    def get_function(self, function_name: str) -> FunctionSymbol:
+        """Returns the symbol table entry of a function.
+
+        Raises
+        ------
+        Exception
+            If the function is not found in the assembly code.
+        """
+
+        symbol = self._functions_by_name.get(function_name)
+
+        if symbol is None:
+            raise Exception("The function" + function_name + "could not be found "
+                            "in the current assembly code.")
+        else:
+            return symbol
+
+
+    def function_at_address(self, address: Union[str, int]) -> FunctionSymbol:
+        """Returns the symbol table entry of the function including an address.
+
+        Raises
+        ------
+        Exception
+            If the address is not in the address range of any function.
+        """
+
+        key = address if isinstance(address, int) else _to_int(address)
+
+        if key is not None:
+            position = bisect_right(self._start_addresses, key) - 1
+            if position >= 0 and key <= self.functions[position].end_address:
+                return self.functions[position]
+
+        raise Exception("Function name can not be determined. Address: "
+                        + str(address))
+
+
+    def function_of_instruction(self, instruction: int) -> FunctionSymbol:
+        """Returns the symbol table entry of the function of an instruction.
+
+        Parameters
+        ----------
+        instruction : int
+            Index of the instruction in the instruction table.
+
+        Raises
+        ------
+        Exception
+            If the instruction is not after a function start line.
+        """
+
+        symbol = self._functions_by_id.get(self.instructions.function_ids[instruction])
+
+        if symbol is None:
+            raise Exception("Function name can not be determined. Address: "
+                            + format(self.instructions.addresses[instruction], 'x'))
+        else:
+            return symbol
+
+
+
+def _parse_tokens(tokens: list) -> Optional[int]:
+    """Returns the address of a tokenized instruction line, None otherwise.
+
+    A sample instruction line is "   100c4:	220000ef   jal	ra,102e4 <memset>".
+    The first token without the colon symbol (:) is the address and the second
+    token is the hexadecimal machine code of the instruction.
+    """
+
+    # If len(tokens >=3) this may be a valid code line.
+    if len(tokens) < 3 or not tokens[0].endswith(':'):
+        return None
+
+    address = _to_int(tokens[0][:-1])
+    if address is None or _to_int(tokens[1]) is None:
+        return None
+
+    return address
+
+
+def _to_int(address: str) -> Optional[int]:
+    """Converts a bare hexadecimal string to an integer, None if not valid."""
+
+    try:
+        return int(address, 16)
+    except ValueError:
+        return None
+
+
+# The most recently built index. The compatibility functions above receive the
+# assembly code as a list on every call; this prevents rebuilding the index for
+# the same list again and again.
+_last_index: Optional[AssemblyIndex] = None
+
+
+def _get_index(assembly_code: Union[list, AssemblyIndex]) -> AssemblyIndex:
+    """Returns the index of the assembly code, building it if needed."""
+
+    global _last_index
+
+    if isinstance(assembly_code, AssemblyIndex):
+        return assembly_code
+
+    if _last_index is None or _last_index.assembly_code is not assembly_code:
+        _last_index = AssemblyIndex(assembly_code)
+
+    return _last_index
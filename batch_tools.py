@@ -0,0 +1,420 @@
+"""Batch tools of Yelkovan.
+
+This file includes helper functions to analyse many programs concurrently.
+
+Each program is in its own directory which includes an assembly file (".dump")
+and trace files (".trc"). The programs are analysed by a bounded pool of worker
+processes. A worker analyses a program after another, so the modules of the
+analysis are imported and the cache is opened once per worker. A worker whose
+program is not analysed within the time limit is stopped and replaced by a new
+worker. The workers are not daemon processes, therefore a program can be
+analysed with worker processes of its own. The control flow graph of each
+program is written to a file as DOT text, JSON or JSON lines without a graph
+layout, and a summary of the batch is written to "batch_summary.json".
+
+With an output directory, the files of each program are written to the
+subdirectory which has the path of the program directory relative to the common
+directory of all of the programs, like "out/a" and "out/b" for the programs in
+"a" and "b". Therefore the programs whose assembly files have the same name do
+not overwrite each other's files.
+
+A manifest file lists the directories of the programs, one directory per
+line. Empty lines and lines starting with "#" are skipped. Relative
+directories are relative to the directory of the manifest file.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Dict, List, Optional, Sequence
+
+# Worker processes
+import multiprocessing
+from multiprocessing.connection import wait
+
+# Files and directories
+import json
+from os import makedirs, path
+
+# Time measurement
+import time
+import traceback
+
+# Persistent cache of the parsed input files
+from cache_tools import Cache, DEFAULT_MAX_SIZE
+
+# Output of the control flow graphs without a graph layout
+import output_tools
+
+
+# Name of the summary file of a batch.
+SUMMARY_FILE = "batch_summary.json"
+
+
+def read_manifest(manifest_file: str) -> List[str]:
+    """Reads the directories of the programs from a manifest file.
+
+    Parameters
+    ----------
+    manifest_file : str
+        Name of the manifest file.
+
+    Returns
+    -------
+    list of str
+        Directories of the programs in the order of the manifest file.
+    """
+
+    base_directory = path.dirname(path.abspath(manifest_file))
+    directories: List[str] = []
+
+    with open(manifest_file) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                directories.append(path.join(base_directory, line))
+
+    return directories
+
+
+def run_batch(directories: List[str], jobs: int, timeout: Optional[float] = None,
+              output_dir: Optional[str] = None, cache_dir: Optional[str] = None,
+              cache_size: int = DEFAULT_MAX_SIZE,
+              output_format: str = "dot", profiles: Sequence[str] = (),
+              flamegraph: bool = False, program_jobs: int = 1) -> dict:
+    """Analyses the programs in the directories concurrently.
+
+    At most `jobs` programs are analysed at the same time, by a pool of `jobs`
+    worker processes. A program is analysed in a worker process, so a program
+    which exceeds the time limit can be stopped without affecting the others.
+
+    Parameters
+    ----------
+    directories : list of str
+        Directories of the programs.
+    jobs : int
+        Number of programs which are analysed at the same time.
+    timeout : float or None
+        Time limit of each program in seconds. No time limit if None.
+    output_dir : str or None
+        Directory of the control flow graphs and the summary. The files of each
+        program are written to a subdirectory, see output_directories. If None,
+        the control flow graph of each program is written to the directory of
+        the program and the summary is written to the current directory.
+    cache_dir : str or None
+        Directory of the persistent cache which is shared by the workers. No
+        cache is used if None.
+    cache_size : int
+        Size limit of the cache, in bytes.
+    output_format : str
+        Format of the control flow graphs, one of "dot", "json" and "jsonl".
+    profiles : sequence of str
+        Profiles of the trace files which are added to the control flow
+        graphs, see yelkovan.add_profiles.
+    flamegraph : bool
+        Write the simulation ticks of the call stacks of each program in
+        collapsed stack format.
+    program_jobs : int
+        Number of worker processes of each program, which read its trace
+        files and detect its functions.
+
+    Returns
+    -------
+    dict
+        Summary of the batch. It includes the number of programs which are
+        analysed, failed and timed out, the elapsed time, the throughput and a
+        record of each program in the order of the directories.
+
+    Raises
+    ------
+    Exception
+        If a program directory is given more than once.
+    """
+
+    output_dirs = output_directories(directories, output_dir)
+    if output_dir is not None:
+        makedirs(output_dir, exist_ok = True)
+        for directory in set(output_dirs):
+            makedirs(directory, exist_ok = True)
+
+    context = multiprocessing.get_context()
+    options = (cache_dir, cache_size, output_format, tuple(profiles), flamegraph,
+               program_jobs)
+    records: List[Optional[dict]] = [None] * len(directories)
+    pending = list(enumerate(directories))
+    pending.reverse()
+
+    # The idle workers, and the job of each busy worker keyed by its
+    # connection.
+    idle: List[tuple] = []
+    running: Dict[object, tuple] = {}
+    batch_start = time.perf_counter()
+
+    try:
+        while pending or running:
+            # Give programs to the idle workers, and start new workers until
+            # there are `jobs` workers.
+            while pending and (idle or len(running) < max(1, jobs)):
+                if idle:
+                    process, connection = idle.pop()
+                else:
+                    process, connection = _start_worker(context, options)
+                number, directory = pending.pop()
+                connection.send((directory, output_dirs[number]))
+                running[connection] = (number, directory, process,
+                                       time.perf_counter())
+
+            # Wait until a worker finishes or the earliest time limit is
+            # reached.
+            wait_time = None
+            if timeout is not None:
+                earliest = min(job[3] for job in running.values())
+                wait_time = max(0.0, earliest + timeout - time.perf_counter())
+
+            ready = wait(list(running), wait_time)
+
+            for connection in ready:
+                number, directory, process, start = running.pop(connection)
+                try:
+                    records[number] = connection.recv()
+                    idle.append((process, connection))
+                except EOFError:
+                    # The worker is terminated without sending a result.
+                    connection.close()
+                    process.join()
+                    records[number] = _record(directory, "failed", start,
+                                              error = "The worker process exited "
+                                                      "with code "
+                                                      + str(process.exitcode))
+
+            # Stop the workers which exceeded the time limit.
+            if timeout is not None:
+                now = time.perf_counter()
+                for connection in [connection for connection, job in running.items()
+                                   if now - job[3] >= timeout]:
+                    number, directory, process, start = running.pop(connection)
+                    process.terminate()
+                    process.join()
+                    connection.close()
+                    records[number] = _record(directory, "timeout", start,
+                                              error = "The time limit is exceeded.")
+    finally:
+        # The idle workers exit after the end of the jobs. The busy workers
+        # are only left if the batch is interrupted.
+        for process, connection in idle:
+            connection.send(None)
+        for connection, job in running.items():
+            job[2].terminate()
+        for process, connection in idle + [(job[2], connection)
+                                           for connection, job in running.items()]:
+            process.join()
+            connection.close()
+
+    elapsed = time.perf_counter() - batch_start
+    summary = {
+        "programs": len(records),
+        "succeeded": sum(record["status"] == "ok" for record in records),
+        "failed": sum(record["status"] == "failed" for record in records),
+        "timed_out": sum(record["status"] == "timeout" for record in records),
+        "jobs": jobs,
+        "program_jobs": program_jobs,
+        "timeout": timeout,
+        "output_format": output_format,
+        "elapsed_seconds": elapsed,
+        "programs_per_second": len(records) / elapsed if elapsed > 0 else 0.0,
+        "results": records,
+    }
+
+    summary_file = path.join(output_dir or ".", SUMMARY_FILE)
+    with open(summary_file, 'w') as f:
+        json.dump(summary, f, indent = 2)
+    f.closed
+
+    return summary
+
+
+def output_directories(directories: List[str],
+                       output_dir: Optional[str] = None) -> List[str]:
+    """Returns the output directory of each program of a batch.
+
+    Parameters
+    ----------
+    directories : list of str
+        Directories of the programs.
+    output_dir : str or None
+        Output directory of the batch. If None, the files of each program are
+        written to the directory of the program.
+
+    Returns
+    -------
+    list of str
+        Output directories in the order of the directories. The output
+        directory of a program is the subdirectory of output_dir which has the
+        path of the program directory relative to the common directory of the
+        programs.
+
+    Raises
+    ------
+    Exception
+        If a program directory is given more than once.
+    """
+
+    programs = [path.normpath(path.abspath(directory)) for directory in directories]
+
+    seen = set()
+    for directory, program in zip(directories, programs):
+        if program in seen:
+            raise Exception("Error: The program directory is given more than "
+                            "once: " + directory)
+        seen.add(program)
+
+    if output_dir is None:
+        return list(directories)
+
+    if not programs:
+        return []
+
+    base = path.commonpath(programs)
+
+    return [path.normpath(path.join(output_dir, path.relpath(program, base)))
+            for program in programs]
+
+
+def analyse_program(directory: str, output_dir: Optional[str] = None,
+                    cache: Optional[Cache] = None,
+                    output_format: str = "dot",
+                    profiles: Sequence[str] = (),
+                    flamegraph: bool = False, jobs: int = 1) -> dict:
+    """Analyses a program and writes its control flow graph.
+
+    The control flow graph is written to "<name>_cfg.txt" as DOT text,
+    "<name>_cfg.json" as JSON or "<name>_cfg.jsonl" as JSON lines, where
+    <name> is the name of the assembly file without its extension. The graph
+    layout is not computed.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the program.
+    output_dir : str or None
+        Directory of the control flow graph. The directory of the program is
+        used if None.
+    cache : Cache or None
+        Persistent cache of the parsed input files.
+    output_format : str
+        Format of the control flow graph, one of "dot", "json" and "jsonl".
+    profiles : sequence of str
+        Profiles of the trace files which are added to the control flow graph,
+        see yelkovan.add_profiles.
+    flamegraph : bool
+        Write the simulation ticks of the call stacks to
+        "<name>_stacks.folded" in collapsed stack format.
+    jobs : int
+        Number of worker processes which read the trace files and detect the
+        functions of the program.
+
+    Returns
+    -------
+    dict
+        Record of the program.
+    """
+
+    # Yelkovan is imported here because it imports batch_tools in batch mode.
+    import yelkovan
+
+    start = time.perf_counter()
+
+    assembly_file, trace_files = yelkovan.find_input_files(directory)
+    analyzer = yelkovan.Analyzer.from_files(assembly_file, trace_files, jobs,
+                                            cache)
+    result = analyzer.analyse(jobs)
+    created = {}
+    if profiles or flamegraph:
+        created = yelkovan.add_profiles(result, profiles, trace_files, jobs,
+                                        analyzer.assembly_code, flamegraph)
+
+    name = path.splitext(path.basename(assembly_file))[0]
+    output_file = path.join(output_dir or directory,
+                            name + output_tools.OUTPUT_SUFFIXES[output_format])
+
+    output_tools.write_cfg(result.graph, output_format, output_file,
+                           result.root_node)
+
+    if flamegraph:
+        created["time"].write_collapsed(path.join(output_dir or directory,
+                                                  name + "_stacks.folded"))
+
+    return _record(directory, "ok", start, output = output_file,
+                   blocks = result.graph.number_of_nodes(),
+                   edges = result.graph.number_of_edges())
+
+
+def print_summary(summary: dict) -> None:
+    """Prints the summary of a batch to command line."""
+
+    print(f"Programs: {summary['programs']}, succeeded: {summary['succeeded']}, "
+          f"failed: {summary['failed']}, timed out: {summary['timed_out']}.")
+    print(f"Elapsed time: {summary['elapsed_seconds']:.2f} s, throughput: "
+          f"{summary['programs_per_second']:.2f} programs/s.")
+
+    for record in summary["results"]:
+        if record["status"] != "ok":
+            print(f"{record['status']}: {record['directory']}: {record['error']}")
+
+
+def _start_worker(context, options: tuple) -> tuple:
+    """Starts a worker process and returns it with its connection."""
+
+    connection, worker_connection = context.Pipe()
+    process = context.Process(target = _worker,
+                              args = (worker_connection,) + options,
+                              daemon = False)
+    process.start()
+    worker_connection.close()
+
+    return process, connection
+
+
+def _worker(connection, cache_dir: Optional[str], cache_size: int,
+            output_format: str, profiles: Sequence[str], flamegraph: bool,
+            program_jobs: int) -> None:
+    """Analyses programs in a worker process.
+
+    The worker receives the directory and the output directory of a program
+    and sends the record of the program, until it receives None.
+    """
+
+    cache = None
+
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+
+        directory, output_dir = job
+        start = time.perf_counter()
+
+        try:
+            if cache is None and cache_dir is not None:
+                cache = Cache(cache_dir, cache_size)
+            record = analyse_program(directory, output_dir, cache, output_format,
+                                     profiles, flamegraph, program_jobs)
+        except Exception as exception:
+            record = _record(directory, "failed", start, error = str(exception),
+                             traceback = traceback.format_exc())
+
+        connection.send(record)
+
+    if cache is not None:
+        cache.close()
+    connection.close()
+
+
+def _record(directory: str, status: str, start: float, **fields) -> dict:
+    """Creates the record of a program."""
+
+    record = {"directory": directory, "status": status,
+              "seconds": time.perf_counter() - start}
+    record.update(fields)
+
+    return record
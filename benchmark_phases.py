@@ -0,0 +1,291 @@
+""" Benchmark of the phases of the analysis of Yelkovan
+
+This program generates synthetic programs of different sizes with
+synthetic_tools.py and measures the time of each phase of their analysis:
+
+dump_parsing : building the index of the assembly file
+trace_index : reading the trace files for the targets of indirect jumps
+process_fn : detecting the basic blocks of the reachable functions
+find_target : finding the targets of indirect jumps, part of process_fn
+check_targets : adding the fall through targets of basic blocks
+finalise_lists : sorting the basic blocks
+graph_build : creating the control flow graph
+output : writing the control flow graph as JSON
+render : computing the layout and drawing the graph with Graphviz, only for
+the small graphs and if pygraphviz is installed
+
+The results are written as JSON, so that they can be compared with the results
+of a previous run. If a baseline file is given, the program exits with status 1
+if a phase is slower than the same phase in the baseline by more than the
+tolerance.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Dict, List
+
+# Command line arguments
+import argparse
+
+# Results
+import json
+
+# Processes, files and directories
+import os
+import platform
+import sys
+import tempfile
+from os import path
+
+# Time measurement
+import statistics
+import time
+
+# Tools of Yelkovan
+import asm_tools
+import output_tools
+import synthetic_tools
+import trace_tools
+import yelkovan
+
+
+# Phases of the analysis, in the order they are executed.
+PHASES = ["dump_parsing", "trace_index", "process_fn", "find_target",
+          "check_targets", "finalise_lists", "graph_build", "output", "render"]
+
+# Default sizes of the synthetic programs, in instructions.
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def main(argv: List[str] = None) -> int:
+    """Main function of this benchmark program.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. The arguments of the process are used if None.
+
+    Returns
+    -------
+    int
+        Exit status of the program.
+    """
+
+    parser = argparse.ArgumentParser(
+        description = "Measures the phases of the analysis of synthetic programs.")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = DEFAULT_SIZES,
+                        help = "numbers of instructions of the synthetic "
+                               "programs (default: %(default)s)")
+    parser.add_argument("--trace-factor", type = float, default = 2.0,
+                        help = "number of instructions in the trace per "
+                               "instruction in the program (default: "
+                               "%(default)s)")
+    parser.add_argument("--call-depth", type = int, default = 8,
+                        help = "number of functions in each call chain "
+                               "(default: %(default)s)")
+    parser.add_argument("--switch-cases", type = int, default = 4,
+                        help = "number of cases of the switch of each function "
+                               "(default: %(default)s)")
+    parser.add_argument("--repeat", type = int, default = 3,
+                        help = "number of runs of each program (default: "
+                               "%(default)s)")
+    parser.add_argument("--jobs", type = int, default = 1,
+                        help = "number of worker processes which read the "
+                               "trace files and detect the functions "
+                               "(default: %(default)s)")
+    parser.add_argument("--render-limit", type = int, default = 2000,
+                        help = "render the graphs with at most this number of "
+                               "nodes (default: %(default)s)")
+    parser.add_argument("--keep", default = None, metavar = "DIRECTORY",
+                        help = "keep the synthetic programs in this directory")
+    parser.add_argument("--output", default = None, metavar = "FILE",
+                        help = "file of the JSON results (default: standard "
+                               "output)")
+    parser.add_argument("--baseline", default = None, metavar = "FILE",
+                        help = "JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type = float, default = 0.25,
+                        help = "allowed slowdown of a phase relative to the "
+                               "baseline (default: %(default)s)")
+    arguments = parser.parse_args(argv)
+
+    results = {"python": platform.python_version(),
+               "platform": platform.platform(),
+               "repeat": arguments.repeat, "jobs": arguments.jobs,
+               "programs": []}
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = arguments.keep or directory
+        os.makedirs(directory, exist_ok = True)
+
+        for size in arguments.sizes:
+            assembly_file = path.join(directory, f"synthetic_{size}.dump")
+            trace_file = path.join(directory, f"synthetic_{size}.trc")
+
+            start = time.perf_counter()
+            program = synthetic_tools.generate_program(
+                assembly_file, trace_file, size,
+                trace_instructions = int(size * arguments.trace_factor),
+                call_depth = arguments.call_depth,
+                switch_cases = arguments.switch_cases)
+            program["generation_seconds"] = time.perf_counter() - start
+            program["size"] = size
+
+            runs = [measure(assembly_file, [trace_file], arguments.jobs,
+                            arguments.render_limit, directory)
+                    for _ in range(max(1, arguments.repeat))]
+
+            program["nodes"] = runs[0].pop("nodes")
+            program["edges"] = runs[0].pop("edges")
+            program["phases"] = {}
+            for phase in PHASES:
+                seconds = [run[phase]["seconds"] for run in runs]
+                program["phases"][phase] = {
+                    "seconds": (None if None in seconds
+                                else statistics.median(seconds)),
+                    "calls": runs[0][phase]["calls"]}
+
+            results["programs"].append(program)
+            print(f"{size} instructions: " + ", ".join(
+                f"{phase} {item['seconds']:.3f} s"
+                for phase, item in program["phases"].items()
+                if item["seconds"] is not None), file = sys.stderr)
+
+    if arguments.output is None:
+        json.dump(results, sys.stdout, indent = 2)
+        print()
+    else:
+        with open(arguments.output, 'w') as f:
+            json.dump(results, f, indent = 2)
+        f.closed
+
+    if arguments.baseline is None:
+        return 0
+
+    with open(arguments.baseline) as f:
+        baseline = json.load(f)
+    f.closed
+
+    return compare(results, baseline, arguments.tolerance)
+
+
+def measure(assembly_file: str, trace_files: List[str], jobs: int,
+            render_limit: int, directory: str) -> Dict[str, dict]:
+    """Analyses a program and measures the time of each phase.
+
+    Parameters
+    ----------
+    assembly_file : str
+        Name of the assembly file of the program.
+    trace_files : list of str
+        List of names of the trace files of the program.
+    jobs : int
+        Number of worker processes which read the trace files and detect the
+        functions.
+    render_limit : int
+        The graph is rendered only if it has at most this number of nodes.
+    directory : str
+        Directory of the output files.
+
+    Returns
+    -------
+    dict
+        The "seconds" and the "calls" of each phase, and the "nodes" and the
+        "edges" of the graph. The seconds of a phase which is not run is None.
+    """
+
+    phases = {phase: {"seconds": 0.0, "calls": 1} for phase in PHASES}
+
+    def timed(phase: str, function, *arguments):
+        start = time.perf_counter()
+        value = function(*arguments)
+        phases[phase]["seconds"] += time.perf_counter() - start
+        return value
+
+    assembly_code = timed("dump_parsing", asm_tools.AssemblyIndex.from_file,
+                          assembly_file)
+    indirect_jumps = assembly_code.find_instructions(['jr', 'jalr'])
+    trace_index = timed("trace_index", trace_tools.SuccessorIndex, indirect_jumps,
+                        trace_files, jobs)
+
+    analyzer = yelkovan.Analyzer(assembly_code, trace_index)
+    find_target = analyzer.find_target
+    phases["find_target"]["calls"] = 0
+
+    def timed_find_target(source_address: int) -> int:
+        phases["find_target"]["calls"] += 1
+        return timed("find_target", find_target, source_address)
+
+    # The instance attribute is used in place of the method.
+    analyzer.find_target = timed_find_target
+
+    timed("process_fn", analyzer.visit_functions, jobs)
+    timed("check_targets", analyzer.check_targets)
+    timed("finalise_lists", analyzer.finalise_lists)
+    graph = timed("graph_build", analyzer.create_graph)
+    timed("output", output_tools.write_cfg, graph, "json",
+          path.join(directory, "synthetic_cfg.json"), analyzer.root_node)
+
+    phases["render"] = {"seconds": None, "calls": 0}
+    if graph.number_of_nodes() <= render_limit:
+        try:
+            import pygraphviz
+        except ImportError:
+            pygraphviz = None
+
+        if pygraphviz is not None:
+            phases["render"] = {"seconds": 0.0, "calls": 1}
+            timed("render", output_tools.render_cfg, graph.to_networkx(),
+                  path.join(directory, "synthetic_cfg.svg"), "svg")
+
+    phases["nodes"] = graph.number_of_nodes()
+    phases["edges"] = graph.number_of_edges()
+
+    return phases
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    """Compares the phases of the results with the phases of the baseline.
+
+    The programs are matched by their sizes. The phases which take less than a
+    millisecond in the baseline are not compared.
+
+    Parameters
+    ----------
+    results : dict
+        Results of this run.
+    baseline : dict
+        Results of a previous run.
+    tolerance : float
+        Allowed slowdown of a phase, like 0.25 for 25 percent.
+
+    Returns
+    -------
+    int
+        1 if a phase is slower than allowed, 0 otherwise.
+    """
+
+    status = 0
+    previous = {program["size"]: program for program in baseline["programs"]}
+
+    for program in results["programs"]:
+        if program["size"] not in previous:
+            continue
+
+        for phase, item in program["phases"].items():
+            expected = previous[program["size"]]["phases"].get(phase, {}).get("seconds")
+            found = item["seconds"]
+            if expected is None or found is None or expected < 0.001:
+                continue
+
+            if found > expected * (1 + tolerance):
+                print(f"{program['size']} instructions, {phase}: Expected "
+                      f"below {expected * (1 + tolerance):.3f} s. Found: "
+                      f"{found:.3f} s.", file = sys.stderr)
+                status = 1
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+""" Benchmark of the startup time of Yelkovan
+
+This program measures the time which is needed to start Yelkovan in a new
+Python process, which is paid by every run of Yelkovan from a script. The
+following commands are measured:
+
+python -c "import yelkovan"
+python yelkovan.py --help
+
+The program also checks that importing Yelkovan does not import the graph
+operations (networkx) and graph visualization (pygraphviz) modules. Those are
+imported only when the control flow graph is created or rendered.
+
+The program exits with status 1 if a module which should be lazy is imported,
+or if the median startup time exceeds the limit given with "--max-seconds".
+
+"""
+
+
+# Type hints support regarding collections
+from typing import List
+
+# Command line arguments
+import argparse
+
+# Processes and files
+import subprocess
+import sys
+from os import path
+
+# Time measurement
+import statistics
+import time
+
+
+# Directory of Yelkovan.
+YELKOVAN_DIR = path.dirname(path.abspath(__file__))
+
+# Modules which should not be imported when Yelkovan is imported.
+LAZY_MODULES = ["networkx", "pygraphviz"]
+
+
+def main(argv: List[str] = None) -> int:
+    """Main function of this benchmark program.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. The arguments of the process are used if None.
+
+    Returns
+    -------
+    int
+        Exit status of the program.
+    """
+
+    parser = argparse.ArgumentParser(
+        description = "Measures the startup time of Yelkovan.")
+    parser.add_argument("--repeat", type = int, default = 10,
+                        help = "number of runs of each command (default: "
+                               "%(default)s)")
+    parser.add_argument("--max-seconds", type = float, default = None,
+                        help = "fail if the median startup time of a command "
+                               "exceeds this limit")
+    arguments = parser.parse_args(argv)
+
+    status = 0
+
+    # Check the modules which are imported by Yelkovan.
+    script = ("import sys, yelkovan; print(' '.join(m for m in "
+              + repr(LAZY_MODULES) + " if m in sys.modules))")
+    imported = subprocess.run([sys.executable, "-c", script], cwd = YELKOVAN_DIR,
+                              check = True, capture_output = True,
+                              text = True).stdout.split()
+
+    print(f"Expected lazy modules imported at startup: none. "
+          f"Found: {', '.join(imported) or 'none'}.")
+    if imported:
+        status = 1
+
+    commands = [("import yelkovan", [sys.executable, "-c", "import yelkovan"]),
+                ("yelkovan.py --help", [sys.executable, "yelkovan.py", "--help"]),
+                ("python (baseline)", [sys.executable, "-c", "pass"])]
+
+    for name, command in commands:
+        seconds = measure(command, arguments.repeat)
+        median = statistics.median(seconds)
+        print(f"{name}: median {median * 1000:.1f} ms, minimum "
+              f"{min(seconds) * 1000:.1f} ms, {len(seconds)} runs.")
+
+        if (arguments.max_seconds is not None and name != "python (baseline)"
+                and median > arguments.max_seconds):
+            print(f"Expected median below {arguments.max_seconds * 1000:.1f} ms. "
+                  f"Found: {median * 1000:.1f} ms.")
+            status = 1
+
+    return status
+
+
+def measure(command: List[str], repeat: int) -> List[float]:
+    """Runs a command a number of times and returns the elapsed times.
+
+    Parameters
+    ----------
+    command : list of str
+        The command and its arguments.
+    repeat : int
+        Number of runs.
+
+    Returns
+    -------
+    list of float
+        Elapsed time of each run in seconds.
+    """
+
+    seconds: List[float] = []
+
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        subprocess.run(command, cwd = YELKOVAN_DIR, check = True,
+                       stdout = subprocess.DEVNULL)
+        seconds.append(time.perf_counter() - start)
+
+    return seconds
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+"""Cache tools of Yelkovan.
+
+This file includes helper functions to keep the parsed input files of Yelkovan
+in a persistent cache.
+
+Parsing the assembly file and reading the trace files are the most expensive
+parts of the analysis, and they are repeated on every run even if the files
+did not change. The cache keeps the results of these steps (the assembly index
+with its instruction and function symbol tables, and the trace successor
+index) in an SQLite database in a cache directory. The entries are keyed by the
+content hashes of the input files, therefore a changed file never hits a stale
+entry. The summaries of the functions of summary_tools are kept in the same
+database, keyed by the hashes of the instructions of the functions.
+
+The size of the cache is bounded. When the total size of the entries exceeds
+the limit, the least recently used entries are removed. The total size is kept
+up to date by the triggers of the database, so it is not summed up again after
+every new entry.
+
+The entries are Python objects which are serialized with pickle, and reading a
+pickle can run code. Therefore each entry is authenticated with an HMAC of its
+key and its data, and an entry is unpickled only if its HMAC is valid. An entry
+which is written by anyone without the secret key of the cache is treated as a
+missing entry. The secret key is read from the YELKOVAN_CACHE_KEY environment
+variable, which is set to the same value on the machines which share a cache
+directory, or else from a key file of the user (see KEY_FILE) which is created
+on the first use.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Any, Dict, Iterable, Optional
+
+# Cache database
+import sqlite3
+import pickle
+import hashlib
+import hmac
+
+# Secret key of the entries
+import os
+
+# Files and directories
+from os import makedirs, path, stat
+
+# Time of the last use of entries
+import time
+
+
+# Name of the database file in the cache directory.
+DATABASE_FILE = "yelkovan_cache.sqlite"
+
+# Version of the format of the entries. Entries of other versions are not used.
+CACHE_VERSION = 5
+
+# Default size limit of the cache, in bytes.
+DEFAULT_MAX_SIZE = 1 << 30
+
+# Maximum number of files whose content hashes are kept in the cache.
+MAX_FILE_DIGESTS = 100000
+
+# Number of keys which are read by a query of `get_many`. SQLite limits the
+# number of parameters of a query.
+GET_MANY_BATCH = 500
+
+# Environment variable of the secret key of the entries.
+KEY_VARIABLE = "YELKOVAN_CACHE_KEY"
+
+# File of the secret key of the user, if the environment variable is not set.
+KEY_FILE = "~/.config/yelkovan/cache.key"
+
+# Size of the HMAC of an entry, in bytes.
+MAC_SIZE = hashlib.sha256().digest_size
+
+
+class Cache:
+    """Persistent cache of parsed input files.
+
+    A sample usage is:
+
+        cache = Cache("~/.cache/yelkovan")
+        key = cache.key("assembly", cache.file_digest("loop_test.dump"))
+        value = cache.get(key)
+        if value is None:
+            value = parse("loop_test.dump")
+            cache.put(key, value)
+
+    The database can be shared by many processes, like the workers of the batch
+    mode.
+
+    Attributes
+    ----------
+    directory : str
+        The cache directory.
+    max_size : int
+        Size limit of the cache, in bytes.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE,
+                 secret: Optional[bytes] = None):
+        """Opens the cache in a directory, creating it if needed.
+
+        Parameters
+        ----------
+        directory : str
+            The cache directory.
+        max_size : int
+            Size limit of the cache, in bytes.
+        secret : bytes or None
+            Secret key of the HMACs of the entries. If None, the key is read
+            with read_secret.
+        """
+
+        self.directory: str = path.expanduser(directory)
+        self.max_size: int = max_size
+        self._secret: bytes = read_secret() if secret is None else secret
+
+        makedirs(self.directory, exist_ok = True)
+
+        self._connection = sqlite3.connect(path.join(self.directory, DATABASE_FILE),
+                                           timeout = 60)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # The rows which are replaced by "INSERT OR REPLACE" fire the delete
+        # trigger only with recursive triggers.
+        self._connection.execute("PRAGMA recursive_triggers=ON")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL, "
+                "value BLOB NOT NULL)")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS file_digests (file TEXT PRIMARY KEY, "
+                "size INTEGER NOT NULL, mtime INTEGER NOT NULL, "
+                "digest TEXT NOT NULL)")
+
+            # Running total of the sizes of the entries.
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS usage (id INTEGER PRIMARY KEY "
+                "CHECK (id = 0), total INTEGER NOT NULL)")
+            self._connection.execute(
+                "INSERT OR IGNORE INTO usage SELECT 0, COALESCE(SUM(size), 0) "
+                "FROM entries")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON "
+                "entries BEGIN UPDATE usage SET total = total + NEW.size; END")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON "
+                "entries BEGIN UPDATE usage SET total = total - OLD.size; END")
+            self._connection.execute(
+                "CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size "
+                "ON entries BEGIN UPDATE usage SET total = total - OLD.size "
+                "+ NEW.size; END")
+
+
+    def close(self) -> None:
+        """Closes the cache database."""
+
+        self._connection.close()
+
+
+    def __enter__(self) -> "Cache":
+        return self
+
+
+    def __exit__(self, *exception) -> None:
+        self.close()
+
+
+    @staticmethod
+    def key(kind: str, *parts: str) -> str:
+        """Creates the key of an entry.
+
+        Parameters
+        ----------
+        kind : str
+            Kind of the entry, like "assembly".
+        parts : str
+            Content hashes and other values which identify the entry.
+
+        Returns
+        -------
+        str
+            Key of the entry.
+        """
+
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode())
+            digest.update(b'\0')
+
+        return f"{kind}:{CACHE_VERSION}:{digest.hexdigest()}"
+
+
+    def file_digest(self, file: str) -> str:
+        """Returns the content hash of a file.
+
+        The content hash of a file is kept in the cache together with the size
+        and the modification time of the file. The file is hashed again only
+        if its size or modification time changed.
+
+        Parameters
+        ----------
+        file : str
+            Name of the file.
+
+        Returns
+        -------
+        str
+            SHA-256 hash of the contents of the file.
+        """
+
+        file = path.abspath(file)
+        status = stat(file)
+
+        row = self._connection.execute(
+            "SELECT digest FROM file_digests WHERE file = ? AND size = ? AND "
+            "mtime = ?", (file, status.st_size, status.st_mtime_ns)).fetchone()
+        if row is not None:
+            return row[0]
+
+        digest = hashlib.sha256()
+        with open(file, 'rb') as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                digest.update(chunk)
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO file_digests VALUES (?, ?, ?, ?)",
+                (file, status.st_size, status.st_mtime_ns, digest.hexdigest()))
+
+        return digest.hexdigest()
+
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the value of an entry, None if the entry is not present or
+        its HMAC is not valid."""
+
+        row = self._connection.execute(
+            "SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        data = self._verify(key, row[0])
+        if data is None:
+            return None
+
+        with self._connection:
+            self._connection.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key))
+
+        return pickle.loads(data)
+
+
+    def put(self, key: str, value: Any) -> None:
+        """Adds an entry to the cache and evicts entries if needed.
+
+        A value which is larger than the size limit of the cache is not added.
+        """
+
+        data = self._sign(key, pickle.dumps(value, protocol = pickle.HIGHEST_PROTOCOL))
+        if len(data) > self.max_size:
+            return
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, len(data), time.time(), data))
+
+        self.evict()
+
+
+    def get_many(self, keys: Iterable[str], touch: bool = True) -> Dict[str, Any]:
+        """Returns the values of the entries which are present and valid.
+
+        The entries are read with a query per batch of GET_MANY_BATCH keys
+        instead of a query per key. The last use time of the entries is
+        updated in a transaction, unless `touch` is False. Then the caller
+        updates it later with `touch`, like after many small reads.
+        """
+
+        keys = list(keys)
+        values: Dict[str, Any] = {}
+
+        for index in range(0, len(keys), GET_MANY_BATCH):
+            batch = keys[index : index + GET_MANY_BATCH]
+            rows = self._connection.execute(
+                "SELECT key, value FROM entries WHERE key IN ("
+                + ", ".join("?" * len(batch)) + ")", batch).fetchall()
+            for key, value in rows:
+                data = self._verify(key, value)
+                if data is not None:
+                    values[key] = pickle.loads(data)
+
+        if touch:
+            self.touch(values)
+
+        return values
+
+
+    def touch(self, keys: Iterable[str]) -> None:
+        """Updates the last use time of entries in a transaction."""
+
+        now = time.time()
+        rows = [(now, key) for key in keys]
+        if not rows:
+            return
+
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?", rows)
+
+
+    def put_many(self, items: Dict[str, Any]) -> None:
+        """Adds entries to the cache in a transaction and evicts entries if
+        needed."""
+
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            data = self._sign(key, pickle.dumps(value,
+                                                protocol = pickle.HIGHEST_PROTOCOL))
+            if len(data) <= self.max_size:
+                rows.append((key, len(data), now, data))
+
+        if not rows:
+            return
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", rows)
+
+        self.evict()
+
+
+    def size(self) -> int:
+        """Returns the total size of the entries, in bytes."""
+
+        return self._connection.execute("SELECT total FROM usage").fetchone()[0]
+
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache fits in its
+        size limit."""
+
+        # Replaced rows get new row ids, so the oldest content hashes have the
+        # smallest row ids.
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM file_digests WHERE rowid <= (SELECT MAX(rowid) "
+                "FROM file_digests) - ?", (MAX_FILE_DIGESTS,))
+
+        excess = self.size() - self.max_size
+        if excess <= 0:
+            return
+
+        keys = []
+        for key, size in self._connection.execute(
+                "SELECT key, size FROM entries ORDER BY last_used"):
+            keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+        with self._connection:
+            self._connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+
+
+    def _sign(self, key: str, data: bytes) -> bytes:
+        """Returns the data of an entry after its HMAC."""
+
+        return self._mac(key, data) + data
+
+
+    def _verify(self, key: str, value: bytes) -> Optional[bytes]:
+        """Returns the data of an entry, None if its HMAC is not valid."""
+
+        data = value[MAC_SIZE:]
+        if not hmac.compare_digest(value[:MAC_SIZE], self._mac(key, data)):
+            return None
+
+        return data
+
+
+    def _mac(self, key: str, data: bytes) -> bytes:
+        """Returns the HMAC of the key and the data of an entry."""
+
+        mac = hmac.new(self._secret, key.encode(), hashlib.sha256)
+        mac.update(b'\0')
+        mac.update(data)
+
+        return mac.digest()
+
+
+
+def read_secret() -> bytes:
+    """Returns the secret key of the HMACs of the cache entries.
+
+    The key is the value of the KEY_VARIABLE environment variable if it is
+    set. Otherwise it is read from KEY_FILE, and a random key is written to
+    KEY_FILE if it does not exist. The key file is readable only by the user.
+
+    Returns
+    -------
+    bytes
+        The secret key.
+
+    Raises
+    ------
+    Exception
+        If the key file is empty.
+    """
+
+    secret = os.environ.get(KEY_VARIABLE)
+    if secret:
+        return secret.encode()
+
+    key_file = path.expanduser(KEY_FILE)
+    if not path.exists(key_file):
+        makedirs(path.dirname(key_file), mode = 0o700, exist_ok = True)
+
+        # The key is written to a temporary file and moved into place, so a
+        # process never reads a partly written key.
+        temporary_file = f"{key_file}.{os.getpid()}"
+        descriptor = os.open(temporary_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                             0o600)
+        with os.fdopen(descriptor, 'wb') as f:
+            f.write(os.urandom(32).hex().encode())
+        f.closed
+        os.replace(temporary_file, key_file)
+
+    with open(key_file, 'rb') as f:
+        secret = f.read().strip()
+    f.closed
+
+    # Anyone could create the HMACs of an empty key.
+    if not secret:
+        raise Exception("Error: The cache key file is empty: " + key_file)
+
+    return secret
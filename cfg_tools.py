@@ -0,0 +1,561 @@
+"""CFG tools of Yelkovan.
+
+This file includes a compact representation of the control flow graph of a
+program.
+
+A `networkx.DiGraph` keeps a dictionary per node, per edge and per attribute,
+which costs hundreds of bytes per basic block. `CompactCFG` keeps the basic
+blocks in arrays and the edges in compressed sparse row (CSR) form: the
+successors of node i are `successor_list[successor_offsets[i]:successor_offsets[i + 1]]`,
+and the predecessors are kept in the same way. The block which contains an
+address is found by a binary search over the sorted start addresses of the
+blocks.
+
+The node attributes of the networkx graph ("label", "start", "end", "target1"
+and "target2") are created from the arrays when they are asked for, and
+`to_networkx` creates the networkx graph only if a caller needs it. Additional
+node and edge attributes, like the execution counts of the profile tools, are
+kept as named columns.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Binary search over the start addresses of blocks
+from bisect import bisect_right
+
+# Columns of the graph
+from array import array
+
+
+# Attributes of the nodes of the graph in the order of networkx graph.
+NODE_ATTRIBUTES = ("label", "start", "end", "target1", "target2")
+
+# Attributes of the graph which are used by Graphviz.
+GRAPH_ATTRIBUTES = {'node': {'shape':'box', 'fontname':'sans', 'margin':'0.07',
+                             'width':'0.1', 'height':'0.1'}}
+
+
+class CompactCFG:
+    """Array based control flow graph of a program.
+
+    A node of the graph is a basic block and its id is the starting line number
+    of the basic block. The nodes are numbered in the order which they are
+    added to the graph, which is the depth first order from the root node for
+    `from_blocks` and the order of the starting lines for `from_edges`. The
+    arrays are indexed by these numbers.
+
+    The read only methods `nodes`, `edges`, `number_of_nodes`,
+    `number_of_edges`, `successors` and `predecessors` work like the methods of
+    networkx graphs, so the output tools accept both of the graphs.
+
+    Attributes
+    ----------
+    root : int
+        Id of the root node, which is the first instruction of the main
+        function.
+    graph : dict
+        Attributes of the graph which are used by Graphviz.
+    node_ids : array of int
+        Id of each node.
+    starts : array of int
+        Starting line number of the basic block of each node.
+    ends : array of int
+        Line number of the end of the basic block of each node.
+    targets : array of int
+        First and second targets of each node, the targets of node i are at
+        2 * i and 2 * i + 1. -1 if the target is not present.
+    successor_offsets, successor_list : array of int
+        Successors of each node in CSR form, as node numbers.
+    predecessor_offsets, predecessor_list : array of int
+        Predecessors of each node in CSR form, as node numbers.
+    start_addresses, end_addresses : array of int
+        Addresses of the first and last instructions of the basic block of each
+        node. 0 if the assembly code is not given.
+    node_columns : dict of str to list
+        Additional attributes of the nodes. Each column has a value per node.
+    edge_columns : dict of str to list
+        Additional attributes of the edges. Each column has a value per item
+        of successor_list.
+    tables : dict of str to list of dict
+        Additional tables of the program, like the times of the functions.
+        They are written by the JSON writers of the output tools.
+    """
+
+    __slots__ = ('root', 'graph', 'node_ids', 'starts', 'ends', 'targets',
+                 'successor_offsets', 'successor_list', 'predecessor_offsets',
+                 'predecessor_list', 'start_addresses', 'end_addresses',
+                 'node_columns', 'edge_columns', 'tables', '_ids_order',
+                 '_sorted_ids', '_address_order', '_sorted_addresses')
+
+    def __init__(self, root: int):
+        self.root: int = root
+        self.graph: dict = {name: dict(value) for name, value in GRAPH_ATTRIBUTES.items()}
+        self.node_ids: array = array('q')
+        self.starts: array = array('q')
+        self.ends: array = array('q')
+        self.targets: array = array('q')
+        self.successor_offsets: array = array('q', [0])
+        self.successor_list: array = array('q')
+        self.predecessor_offsets: array = array('q', [0])
+        self.predecessor_list: array = array('q')
+        self.start_addresses: array = array('Q')
+        self.end_addresses: array = array('Q')
+        self.node_columns: Dict[str, list] = {}
+        self.edge_columns: Dict[str, list] = {}
+        self.tables: Dict[str, List[dict]] = {}
+        self._ids_order: array = array('q')
+        self._sorted_ids: array = array('q')
+        self._address_order: array = array('q')
+        self._sorted_addresses: array = array('Q')
+
+
+    @classmethod
+    def from_blocks(cls, start_list: List[int], end_list: List[List[int]],
+                    start_index: Dict[int, int], root_node: int,
+                    assembly_code = None) -> "CompactCFG":
+        """Creates the control flow graph from the basic blocks.
+
+        The graph is traversed depth first from the root node with a work list
+        of (previous node, current node) pairs. The nodes and edges are added in
+        the same order as the networkx graph of the analyzer. A basic block has
+        one or two targets, the targets of the blocks with more targets are not
+        followed.
+
+        Parameters
+        ----------
+        start_list : list of int
+            Sorted line numbers of starting points of basic blocks.
+        end_list : list of list of int
+            Sorted end points of basic blocks with their targets.
+        start_index : dict
+            Index of each starting point in start_list.
+        root_node : int
+            Starting line number of the root node.
+        assembly_code : AssemblyIndex or None
+            Index of the assembly code. The addresses of the blocks are found
+            only if it is given.
+
+        Returns
+        -------
+        CompactCFG
+            Control flow graph of the program.
+        """
+
+        cfg = cls(root_node)
+
+        # Node number of each node id, used while the graph is created.
+        numbers: Dict[int, int] = {}
+        edges: List[Tuple[int, int]] = []
+        edge_set = set()
+
+        work_list: List[Tuple[int, int]] = [(-1, root_node)]
+
+        while (work_list):
+            previous_node, current_node = work_list.pop()
+
+            if (current_node in numbers) & (previous_node != -1):
+                edge = (numbers[previous_node], numbers[current_node])
+                if edge not in edge_set:
+                    edge_set.add(edge)
+                    edges.append(edge)
+                continue
+
+            # The nodes which are not starting points have the attributes of the
+            # first basic block, like the nodes of the networkx graph.
+            index = start_index.get(current_node, 0)
+            number = len(cfg.node_ids)
+            numbers[current_node] = number
+
+            cfg.node_ids.append(current_node)
+            cfg.starts.append(start_list[index])
+            cfg.ends.append(end_list[index][0])
+
+            if (previous_node != -1):
+                edge = (numbers[previous_node], number)
+                edge_set.add(edge)
+                edges.append(edge)
+
+            targets = end_list[index][1:]
+
+            if (len(targets) == 1):
+                cfg.targets.extend((targets[0], -1))
+            elif (len(targets) == 2):
+                cfg.targets.extend((targets[0], targets[1]))
+            else:
+                cfg.targets.extend((-1, -1))
+                continue
+
+            for target in reversed(targets):
+                work_list.append((current_node, target))
+
+        cfg._set_edges(edges)
+        cfg._set_addresses(assembly_code)
+
+        return cfg
+
+
+    @classmethod
+    def from_edges(cls, start_list: List[int], end_list: List[List[int]],
+                   root_node: int, assembly_code = None) -> "CompactCFG":
+        """Creates the control flow graph of all of the basic blocks.
+
+        Unlike `from_blocks`, the graph is not traversed. Every basic block is a
+        node, and every target of a basic block is an edge, even if the basic
+        block has more than two targets. This is the graph of the executed basic
+        blocks, which are all found in the trace files.
+
+        Parameters
+        ----------
+        start_list : list of int
+            Sorted line numbers of starting points of basic blocks.
+        end_list : list of list of int
+            End points of basic blocks with their targets. The targets are
+            starting points of basic blocks.
+        root_node : int
+            Starting line number of the root node.
+        assembly_code : AssemblyIndex or None
+            Index of the assembly code. The addresses of the blocks are found
+            only if it is given.
+
+        Returns
+        -------
+        CompactCFG
+            Control flow graph of the program.
+        """
+
+        cfg = cls(root_node)
+
+        numbers = {starting_point: number
+                   for number, starting_point in enumerate(start_list)}
+        edges: List[Tuple[int, int]] = []
+
+        for number, (starting_point, item) in enumerate(zip(start_list, end_list)):
+            cfg.node_ids.append(starting_point)
+            cfg.starts.append(starting_point)
+            cfg.ends.append(item[0])
+
+            targets = item[1:]
+            cfg.targets.extend((targets[0] if len(targets) > 0 else -1,
+                                targets[1] if len(targets) > 1 else -1))
+            edges.extend((number, numbers[target]) for target in targets)
+
+        cfg._set_edges(edges)
+        cfg._set_addresses(assembly_code)
+
+        return cfg
+
+
+    def _set_edges(self, edges: List[Tuple[int, int]]) -> None:
+        """Creates the CSR arrays of the successors and predecessors."""
+
+        count = len(self.node_ids)
+
+        for offsets, values, key, value in (
+                (self.successor_offsets, self.successor_list, 0, 1),
+                (self.predecessor_offsets, self.predecessor_list, 1, 0)):
+            degrees = [0] * (count + 1)
+            for edge in edges:
+                degrees[edge[key] + 1] += 1
+            for number in range(count):
+                degrees[number + 1] += degrees[number]
+            offsets[:] = array('q', degrees)
+
+            # Edges keep their order among the edges of the same node.
+            positions = degrees[:-1]
+            values[:] = array('q', [0] * len(edges))
+            for edge in edges:
+                values[positions[edge[key]]] = edge[value]
+                positions[edge[key]] += 1
+
+        self._ids_order = array('q', sorted(range(count),
+                                            key = self.node_ids.__getitem__))
+        self._sorted_ids = array('q', [self.node_ids[number]
+                                       for number in self._ids_order])
+
+
+    def _set_addresses(self, assembly_code) -> None:
+        """Finds the addresses of the first and last instructions of blocks."""
+
+        count = len(self.node_ids)
+        self.start_addresses = array('Q', [0] * count)
+        self.end_addresses = array('Q', [0] * count)
+
+        if assembly_code is None:
+            return
+
+        table = assembly_code.instructions
+        blocks: List[int] = []
+
+        for number in range(count):
+            # Only the nodes which are starting points are blocks of addresses.
+            if self.node_ids[number] != self.starts[number]:
+                continue
+
+            first = table.index_of_line(self.starts[number])
+            last = table.index_of_line(self.ends[number])
+            if (first == len(table) or last == len(table)
+                    or table.lines[first] != self.starts[number]
+                    or table.lines[last] != self.ends[number]):
+                continue
+
+            self.start_addresses[number] = table.addresses[first]
+            self.end_addresses[number] = table.addresses[last]
+            blocks.append(number)
+
+        blocks.sort(key = self.start_addresses.__getitem__)
+        self._address_order = array('q', blocks)
+        self._sorted_addresses = array('Q', [self.start_addresses[number]
+                                             for number in blocks])
+
+
+    def __len__(self) -> int:
+        return len(self.node_ids)
+
+
+    def __contains__(self, node: int) -> bool:
+        return self.node_number(node) is not None
+
+
+    def node_number(self, node: int) -> Optional[int]:
+        """Returns the number of a node, None if the node is not in the graph."""
+
+        position = bisect_right(self._sorted_ids, node) - 1
+
+        if position >= 0 and self._sorted_ids[position] == node:
+            return self._ids_order[position]
+        else:
+            return None
+
+
+    def block_at_address(self, address: int) -> Optional[int]:
+        """Returns the id of the node whose basic block contains an address.
+
+        Parameters
+        ----------
+        address : int
+            Address of an instruction.
+
+        Returns
+        -------
+        int or None
+            Starting line number of the basic block, None if no basic block
+            contains the address.
+        """
+
+        position = bisect_right(self._sorted_addresses, address) - 1
+        if position < 0:
+            return None
+
+        number = self._address_order[position]
+        if address > self.end_addresses[number]:
+            return None
+
+        return self.node_ids[number]
+
+
+    def block_ranges(self) -> Tuple[array, array, array]:
+        """Returns the address ranges of the basic blocks sorted by address.
+
+        Returns
+        -------
+        tuple of array
+            Start addresses, end addresses and node numbers of the basic
+            blocks, sorted by the start addresses. The nodes whose addresses are
+            not known are not included.
+        """
+
+        ends = array('Q', [self.end_addresses[number]
+                           for number in self._address_order])
+
+        return self._sorted_addresses, ends, self._address_order
+
+
+    def edge_position(self, source: int, target: int) -> Optional[int]:
+        """Returns the position of an edge in successor_list.
+
+        Parameters
+        ----------
+        source, target : int
+            Node numbers of the source and the target of the edge.
+
+        Returns
+        -------
+        int or None
+            Position of the edge, None if the edge is not in the graph.
+        """
+
+        for position in range(self.successor_offsets[source],
+                              self.successor_offsets[source + 1]):
+            if self.successor_list[position] == target:
+                return position
+
+        return None
+
+
+    def set_node_column(self, name: str, values: list) -> None:
+        """Adds an attribute with a value per node to the nodes.
+
+        Raises
+        ------
+        Exception
+            If the number of values is not the number of nodes.
+        """
+
+        if len(values) != len(self.node_ids):
+            raise Exception("The number of values of the node attribute \""
+                            + name + "\" is " + str(len(values)) + ", expected "
+                            + str(len(self.node_ids)) + ".")
+
+        self.node_columns[name] = values
+
+
+    def set_edge_column(self, name: str, values: list) -> None:
+        """Adds an attribute with a value per edge to the edges.
+
+        The values are in the order of successor_list.
+
+        Raises
+        ------
+        Exception
+            If the number of values is not the number of edges.
+        """
+
+        if len(values) != len(self.successor_list):
+            raise Exception("The number of values of the edge attribute \""
+                            + name + "\" is " + str(len(values)) + ", expected "
+                            + str(len(self.successor_list)) + ".")
+
+        self.edge_columns[name] = values
+
+
+    def set_table(self, name: str, rows: List[dict]) -> None:
+        """Adds a table with a dictionary per row to the graph."""
+
+        self.tables[name] = rows
+
+
+    def number_of_nodes(self) -> int:
+        return len(self.node_ids)
+
+
+    def number_of_edges(self) -> int:
+        return len(self.successor_list)
+
+
+    def successors(self, node: int) -> Iterator[int]:
+        """Yields the ids of the successors of a node."""
+
+        number = self._number(node)
+        for successor in self.successor_list[self.successor_offsets[number]:
+                                             self.successor_offsets[number + 1]]:
+            yield self.node_ids[successor]
+
+
+    def predecessors(self, node: int) -> Iterator[int]:
+        """Yields the ids of the predecessors of a node."""
+
+        number = self._number(node)
+        for predecessor in self.predecessor_list[self.predecessor_offsets[number]:
+                                                 self.predecessor_offsets[number + 1]]:
+            yield self.node_ids[predecessor]
+
+
+    def node_attributes(self, number: int) -> dict:
+        """Returns the attributes of a node of the networkx graph.
+
+        Parameters
+        ----------
+        number : int
+            Number of the node.
+        """
+
+        target1 = self.targets[2 * number]
+        target2 = self.targets[2 * number + 1]
+
+        attributes = {'label': "Start: " + str(self.starts[number]) + "; End: "
+                               + str(self.ends[number]),
+                      'start': self.starts[number],
+                      'end': self.ends[number],
+                      'target1': "null" if target1 == -1 else target1,
+                      'target2': "null" if target2 == -1 else target2}
+
+        for name, values in self.node_columns.items():
+            attributes[name] = values[number]
+
+        return attributes
+
+
+    def nodes(self, data: bool = False) -> Iterator:
+        """Yields the ids of the nodes, with their attributes if `data` is True."""
+
+        for number, node in enumerate(self.node_ids):
+            if data:
+                yield node, self.node_attributes(number)
+            else:
+                yield node
+
+
+    def edges(self, data: bool = False) -> Iterator[tuple]:
+        """Yields the edges as (source, target) pairs of node ids.
+
+        If `data` is True, the attributes of the edge columns are added to each
+        edge as a dictionary.
+        """
+
+        for number, node in enumerate(self.node_ids):
+            for position in range(self.successor_offsets[number],
+                                  self.successor_offsets[number + 1]):
+                successor = self.node_ids[self.successor_list[position]]
+                if data:
+                    yield node, successor, {name: values[position] for name, values
+                                            in self.edge_columns.items()}
+                else:
+                    yield node, successor
+
+
+    def to_networkx(self, cfg = None):
+        """Creates the networkx graph of the control flow graph.
+
+        Parameters
+        ----------
+        cfg : networkx.DiGraph or None
+            The graph which the nodes and edges are added to. A new graph is
+            created if None.
+
+        Returns
+        -------
+        networkx.DiGraph
+            Control flow graph of the program.
+        """
+
+        # Graph operations
+        import networkx
+
+        if cfg is None:
+            cfg = networkx.DiGraph()
+
+        cfg.add_nodes_from(self.nodes(data = True))
+        cfg.add_edges_from(self.edges(data = True))
+        cfg.graph.update({name: dict(value) for name, value in self.graph.items()})
+
+        return cfg
+
+
+    def _number(self, node: int) -> int:
+        """Returns the number of a node.
+
+        Raises
+        ------
+        Exception
+            If the node is not in the graph.
+        """
+
+        number = self.node_number(node)
+        if number is None:
+            raise Exception("The node is not in the control flow graph. Node: "
+                            + str(node))
+
+        return number
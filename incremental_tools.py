@@ -0,0 +1,297 @@
+"""Incremental analysis tools of Yelkovan.
+
+This file includes helper functions to reuse the basic blocks of the functions
+of the previous analysis of a program after it is recompiled.
+
+When a function of a program is changed and the program is compiled again,
+most of the functions have the same instructions, only at different lines and
+addresses. The history of a program keeps the result of `process_fn` for each
+function of the previous analysis: the starting points and end points of basic
+blocks with their targets, and the called functions. Each line of a result has
+an "anchor", the function which includes the line, and the line is moved by
+the same number of lines as its anchor. Usually all of the anchors of a result
+are moved together, and the lines of the result are moved at once.
+
+A function is identified by its name, and its fingerprint is the hash of its
+instructions (see summary_tools.function_digest) together with the distances of
+its end point and of the next function from its start. The result of a function
+is reused if the fingerprints of all of its anchors did not change, otherwise
+the function is processed again. Therefore a changed function and the
+functions which call it are processed again, since the callers refer to the
+start and end points of the changed function.
+
+The targets of the indirect jumps of a function are read from the trace files.
+The addresses of the indirect jumps are kept relative to the start of the
+function, and the result of a function is reused only if the targets of its
+indirect jumps in the new trace files are the same.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Start lines of the functions
+from bisect import bisect_right
+
+# Names of the assembly files
+from os import path
+
+# Hashes of the instructions of the functions
+from summary_tools import function_digest, function_end
+
+
+class FunctionHistory:
+    """Results of the functions of the previous analysis of a program.
+
+    A sample usage is:
+
+        history = FunctionHistory(cache, "loop_test.dump")
+        history.prepare(assembly_code)
+        result = history.replay(line_no, analyzer.find_target)
+        if result is None:
+            ...
+            history.record(line_no, start_set, end_dict, callees, jumps)
+        history.save()
+
+    Attributes
+    ----------
+    cache : Cache
+        Persistent cache of the history.
+    key : str
+        Key of the history in the cache, created from the name of the assembly
+        file.
+    records : dict of tuple to tuple
+        Results of the functions in this analysis, keyed by the names of the
+        functions and the number of the functions with the same name before
+        them. The lines of a result are the lines of the analysis which
+        recorded it, together with the fingerprints and the start lines of its
+        anchors in that analysis.
+    previous : dict of tuple to tuple
+        Results of the functions in the previous analysis, in the same format
+        as records.
+    reused, detected : int
+        Number of functions whose results are reused and which are processed.
+    """
+
+    def __init__(self, cache, assembly_file: str):
+        """Reads the history of a program from the cache.
+
+        Parameters
+        ----------
+        cache : Cache
+            Persistent cache of the history.
+        assembly_file : str
+            Name of the assembly file of the program.
+        """
+
+        self.cache = cache
+        self.key: str = cache.key("history", path.abspath(assembly_file))
+        self.records: Dict[tuple, tuple] = {}
+        self.reused: int = 0
+        self.detected: int = 0
+        self.previous: Dict[tuple, tuple] = cache.get(self.key) or {}
+        self._fingerprints: Dict[tuple, tuple] = {}
+        self._keys: Dict[int, tuple] = {}
+        self._positions: Dict[tuple, int] = {}
+        self._functions: list = []
+        self._start_lines: List[int] = []
+        self._line_count: int = 0
+
+
+    def prepare(self, assembly_code) -> None:
+        """Computes the fingerprints of the functions of the program.
+
+        Parameters
+        ----------
+        assembly_code : AssemblyIndex
+            Assembly code of the program.
+        """
+
+        table = assembly_code.instructions
+        functions = sorted(assembly_code.functions,
+                           key = lambda function: function.start_line)
+
+        self._functions = functions
+        self._start_lines = [function.start_line for function in functions]
+        self._line_count = assembly_code.line_count
+        self._fingerprints = {}
+        self._keys = {}
+        self._positions = {}
+
+        occurrences: Dict[str, int] = {}
+        for position, function in enumerate(functions):
+            occurrence = occurrences.get(function.name, 0)
+            occurrences[function.name] = occurrence + 1
+            key = (function.name, occurrence)
+
+            index = table.index_of_line(function.start_line)
+            digest = (function_digest(table, index, function_end(table, index))
+                      if index < len(table) else None)
+            end = (None if function.end_line is None
+                   else function.end_line - function.start_line)
+
+            self._fingerprints[key] = (digest, end,
+                                       self._next_line(position) - function.start_line)
+            self._keys[function.start_line] = key
+            self._positions[key] = position
+
+
+    def replay(self, line_no: int, find_target: Callable[[int], int]
+               ) -> Optional[Tuple[set, dict, list]]:
+        """Returns the result of a function in the previous analysis.
+
+        The lines of the result are moved to the new lines of their anchors.
+
+        Parameters
+        ----------
+        line_no : int
+            Starting line number of the function.
+        find_target : callable
+            Returns the line number of the target of an indirect jump at an
+            address, like `Analyzer.find_target`.
+
+        Returns
+        -------
+        tuple or None
+            The starting points, the end points with their targets and the
+            starting lines of the called functions of the function, or None if
+            the function has to be processed again. The result must not be
+            modified.
+        """
+
+        key = self._keys.get(line_no)
+        record = self.previous.get(key)
+        if record is None:
+            return None
+
+        anchors, starts, ends, callees, jumps = record
+
+        # The anchors did not change.
+        anchor_lines = []
+        shifts = []
+        for anchor, fingerprint, start_line in anchors:
+            if self._fingerprints.get(anchor) != fingerprint:
+                return None
+            anchor_lines.append(start_line)
+            shifts.append(self._start_lines[self._positions[anchor]] - start_line)
+
+        if shifts.count(shifts[0]) == len(shifts):
+            shift = shifts[0]
+            move = lambda line: line + shift
+        else:
+            # The anchors are sorted by their start lines.
+            shift = None
+            move = lambda line: line + shifts[bisect_right(anchor_lines, line) - 1]
+
+        # The targets of the indirect jumps did not change.
+        start_address = self._functions[self._positions[key]].start_address
+        for offset, target in jumps:
+            try:
+                if find_target(start_address + offset) != move(target):
+                    return None
+            except Exception:
+                return None
+
+        self.records[key] = record
+        self.reused += 1
+
+        if shift == 0:
+            return starts, ends, callees
+
+        if shift is not None:
+            return ({start + shift for start in starts},
+                    {end_point + shift: {target + shift: None for target in targets}
+                     for end_point, targets in ends.items()},
+                    [callee + shift for callee in callees])
+
+        # An end point is never its own target, even if the end point and the
+        # target are moved by different numbers of lines.
+        moved_ends = {}
+        for end_point, targets in ends.items():
+            end_point = move(end_point)
+            moved_ends[end_point] = {move(target): None for target in targets
+                                     if move(target) != end_point}
+
+        return ({move(start) for start in starts}, moved_ends,
+                [move(callee) for callee in callees])
+
+
+    def record(self, line_no: int, start_set: set, end_dict: dict,
+               callees: list, jumps: List[Tuple[int, int]]) -> None:
+        """Keeps the result of a function which is processed.
+
+        A result which includes a line before the first function, like the
+        target -1 of an indirect jump which is not found in the trace files,
+        is not kept.
+
+        Parameters
+        ----------
+        line_no : int
+            Starting line number of the function.
+        start_set : set of int
+            Starting points of basic blocks which are found in the function.
+        end_dict : dict of int to dict
+            End points of basic blocks which are found in the function, with
+            their targets.
+        callees : list of int
+            Starting lines of the functions which are called by the function.
+        jumps : list of tuple
+            Addresses of the indirect jumps of the function and the line
+            numbers of their targets.
+        """
+
+        self.detected += 1
+
+        key = self._keys.get(line_no)
+        if key is None:
+            return
+
+        # Most of the lines are in the function itself, the other lines are
+        # found with a binary search.
+        position = self._positions[key]
+        low = self._start_lines[position]
+        high = self._next_line(position)
+        anchors = {position}
+
+        lines = [start_set, end_dict, callees, [target for _, target in jumps]]
+        lines.extend(end_dict.values())
+        for group in lines:
+            if not group or (low <= min(group) and max(group) < high):
+                continue
+            for line in group:
+                if not low <= line < high:
+                    anchor = bisect_right(self._start_lines, line) - 1
+                    if anchor < 0:
+                        return
+                    anchors.add(anchor)
+
+        anchor_keys = [self._keys[self._start_lines[anchor]]
+                       for anchor in sorted(anchors)]
+        start_address = self._functions[position].start_address
+
+        self.records[key] = (tuple((anchor_key, self._fingerprints[anchor_key],
+                                    self._start_lines[self._positions[anchor_key]])
+                                   for anchor_key in anchor_keys),
+                             start_set, end_dict, callees,
+                             [(address - start_address, target)
+                              for address, target in jumps])
+
+
+    def save(self) -> None:
+        """Writes the results of the functions of this analysis to the cache.
+
+        The history is not written again if all of the results are reused.
+        """
+
+        if self.detected or len(self.records) != len(self.previous):
+            self.cache.put(self.key, self.records)
+
+
+    def _next_line(self, position: int) -> int:
+        """Returns the start line of the function after a function."""
+
+        if position + 1 < len(self._start_lines):
+            return self._start_lines[position + 1]
+        else:
+            return self._line_count
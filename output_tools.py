@@ -0,0 +1,219 @@
+"""Output tools of Yelkovan.
+
+This file includes helper functions to write the control flow graph of a
+program.
+
+The control flow graph can be written as JSON, as JSON lines or as DOT text.
+None of these formats needs a graph layout, so they are fast even for graphs
+with many basic blocks. Rendering the graph as a figure (pdf, svg, png) runs
+the Graphviz "dot" layout, which takes much longer than the analysis itself for
+large graphs. Therefore it is done only on request.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Dict, Iterator, Optional, TextIO
+
+# Output formats
+import json
+import sys
+
+
+# Formats which are written without a graph layout.
+OUTPUT_FORMATS = ("json", "jsonl", "dot")
+
+# Formats which are rendered by Graphviz.
+RENDER_FORMATS = ("pdf", "svg", "png")
+
+# Suffixes of the output files in each format.
+OUTPUT_SUFFIXES = {"json": "_cfg.json", "jsonl": "_cfg.jsonl", "dot": "_cfg.txt"}
+
+# Keywords of DOT language which should be quoted as ids.
+DOT_KEYWORDS = frozenset(["node", "edge", "graph", "digraph", "subgraph", "strict"])
+
+
+def write_cfg(cfg, output_format: str, output_file: Optional[str] = None,
+              root_node: Optional[int] = None) -> None:
+    """Writes the control flow graph in a format without a graph layout.
+
+    Parameters
+    ----------
+    cfg : networkx.DiGraph
+        Control flow graph of the program.
+    output_format : str
+        One of "json", "jsonl" and "dot".
+    output_file : str or None
+        Name of the output file. The graph is written to the standard output
+        if None or "-".
+    root_node : int or None
+        Starting line number of the root node of the graph.
+
+    Raises
+    ------
+    Exception
+        If the output format is not known.
+    """
+
+    if output_format == "json":
+        writer = write_json
+    elif output_format == "jsonl":
+        writer = write_jsonl
+    elif output_format == "dot":
+        writer = write_dot
+    else:
+        raise Exception("Unknown output format: " + output_format + ". The "
+                        "output format should be one of: "
+                        + ", ".join(OUTPUT_FORMATS))
+
+    if output_file is None or output_file == "-":
+        writer(cfg, sys.stdout, root_node)
+        return
+
+    with open(output_file, 'w') as f:
+        writer(cfg, f, root_node)
+    f.closed
+
+
+def write_json(cfg, stream: TextIO, root_node: Optional[int] = None) -> None:
+    """Writes the control flow graph as a JSON object.
+
+    The object has "root", "nodes" and "edges" members. Each node is an object
+    with an "id" member and the attributes of the node. Each edge is an object
+    with "source" and "target" members and the attributes of the edge. The
+    tables of a CompactCFG, like "functions", are added as members too.
+    """
+
+    graph = {"root": root_node,
+             "nodes": list(_nodes(cfg)),
+             "edges": list(_edges(cfg))}
+    graph.update(getattr(cfg, "tables", {}))
+
+    json.dump(graph, stream, indent = 1)
+    stream.write("\n")
+
+
+def write_jsonl(cfg, stream: TextIO, root_node: Optional[int] = None) -> None:
+    """Writes the control flow graph as JSON lines.
+
+    Each line is a JSON object. The first line is the graph with the "root"
+    member, the following lines are the nodes and the edges. The "type" member
+    of each object is "graph", "node" or "edge". The rows of the tables of a
+    CompactCFG follow with the "table" type and the name of their table in the
+    "table" member.
+    """
+
+    stream.write(json.dumps({"type": "graph", "root": root_node}) + "\n")
+
+    for node in _nodes(cfg):
+        stream.write(json.dumps(dict(type = "node", **node)) + "\n")
+
+    for edge in _edges(cfg):
+        stream.write(json.dumps(dict(type = "edge", **edge)) + "\n")
+
+    for name, rows in getattr(cfg, "tables", {}).items():
+        for row in rows:
+            stream.write(json.dumps(dict(type = "table", table = name, **row)) + "\n")
+
+
+def write_dot(cfg, stream: TextIO, root_node: Optional[int] = None) -> None:
+    """Writes the control flow graph as DOT text.
+
+    The text is created directly from the graph. Neither pygraphviz nor a graph
+    layout is needed.
+    """
+
+    stream.write('strict digraph "" {\n')
+
+    for name in ("graph", "node", "edge"):
+        attributes = cfg.graph.get(name)
+        if attributes:
+            stream.write(f"\t{name} [{_dot_attributes(attributes)}];\n")
+
+    for node, attributes in cfg.nodes(data = True):
+        if attributes:
+            stream.write(f"\t{_dot_id(node)}\t[{_dot_attributes(attributes)}];\n")
+        else:
+            stream.write(f"\t{_dot_id(node)};\n")
+
+    for source, target, attributes in cfg.edges(data = True):
+        edge = f"{_dot_id(source)} -> {_dot_id(target)}"
+        if attributes:
+            stream.write(f"\t{edge}\t[{_dot_attributes(attributes)}];\n")
+        else:
+            stream.write(f"\t{edge};\n")
+
+    stream.write("}\n")
+
+
+def render_cfg(cfg, output_file: str, render_format: str = "pdf",
+               dot_file: Optional[str] = None) -> None:
+    """Renders the control flow graph as a figure.
+
+    The Graphviz "dot" layout is computed by pygraphviz. The DOT text of
+    pygraphviz can be written too, since the graph is converted anyway.
+
+    Parameters
+    ----------
+    cfg : networkx.DiGraph
+        Control flow graph of the program.
+    output_file : str
+        Name of the figure file.
+    render_format : str
+        One of "pdf", "svg" and "png".
+    dot_file : str or None
+        File of the DOT text of the graph without the layout. The standard
+        output is used if "-". Not written if None.
+    """
+
+    # pygraphviz is only needed for rendering.
+    from networkx.drawing.nx_agraph import to_agraph
+
+    cfg_graph = to_agraph(cfg)
+
+    if dot_file == "-":
+        print(cfg_graph)
+    elif dot_file is not None:
+        cfg_graph.write(dot_file)
+
+    cfg_graph.layout('dot')
+    cfg_graph.draw(output_file, format = render_format)
+
+
+def _nodes(cfg) -> Iterator[Dict]:
+    """Yields the nodes of the graph as dictionaries."""
+
+    for node, attributes in cfg.nodes(data = True):
+        item = {"id": node}
+        item.update(attributes)
+        yield item
+
+
+def _edges(cfg) -> Iterator[Dict]:
+    """Yields the edges of the graph as dictionaries."""
+
+    for source, target, attributes in cfg.edges(data = True):
+        item = {"source": source, "target": target}
+        item.update(attributes)
+        yield item
+
+
+def _dot_id(value) -> str:
+    """Returns a DOT id, quoted if it is not a number or a simple name."""
+
+    text = str(value)
+
+    if isinstance(value, (int, float)):
+        return text
+
+    if (text.isidentifier() and text.isascii()
+            and text.lower() not in DOT_KEYWORDS):
+        return text
+
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _dot_attributes(attributes: Dict) -> str:
+    """Returns the DOT attribute list of a dictionary."""
+
+    return ", ".join(f"{key}={_dot_id(value)}" for key, value in attributes.items())
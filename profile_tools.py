@@ -0,0 +1,1597 @@
+"""Profile tools of Yelkovan.
+
+This file includes helper functions to create an execution profile of a
+program from its trace files.
+
+The trace files include the program counter of every executed instruction. The
+program counters are mapped to the basic blocks of the control flow graph by
+binning them over the sorted start addresses of the blocks. If numpy is
+installed, a batch of program counters is binned at once with
+`numpy.searchsorted`. Otherwise the distinct program counters of a batch are
+counted first and each distinct program counter is binned by a binary search,
+so the cost of the search is paid once per address instead of once per trace
+line.
+
+Consecutive program counters give the transitions between basic blocks: a
+transition from block A to block B is counted when the instruction after an
+instruction of A is the first instruction of B. The transitions are the
+execution counts of the edges of the control flow graph, and for the blocks
+which end with a branch instruction they are divided into taken and fall
+through counts.
+
+The block counts and the transitions are computed in one streaming pass. The
+trace files are read in parts by a worker process per part, the counts of the
+parts are added, and the transition across the border of two parts of the same
+trace file is added when the parts are merged.
+
+The profiles which are created together by `collect_profiles` share the pass
+over the trace files (see `ProfileParts`). Each trace line is read once and it
+is given to the collectors of the profiles of its part.
+
+Each trace line starts with the simulation tick of the instruction. The time of
+an instruction is the tick difference to the next instruction. The time is
+attributed to basic blocks and functions, exclusively and inclusively, by
+following the calls and returns of the program with a shadow call stack. The
+call stack needs the instructions in execution order, so only the first part
+of a trace file is processed with the call stack by its worker process. The
+workers of the other parts find the times which do not depend on the call
+stack, and a compressed list of the calls, returns and function changes of
+their part. The lists are replayed on the call stack of the first part in the
+order of the parts. The exclusive time of each distinct call stack is also
+collected, and it is written in the collapsed stack format of flame graph
+tools, a line per call stack like "_start;main;calc 8500".
+
+The trace lines of the load and store instructions include the op class, like
+"MemRead" and "MemWrite", and the accessed address, like "A=0x11c50". The
+number of accesses, the number of bytes and the distinct cache lines are
+collected for the basic blocks and the functions in one streaming pass. The
+distinct cache lines are counted by counters of a bounded size, which are exact
+for the small numbers and estimate the large numbers. Only
+the trace lines which include "Mem" are parsed. The size of an access is found
+from the mnemonic of the instruction, like 8 bytes for "c_sdsp".
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Binary search over the start addresses of blocks
+from bisect import bisect_right
+from collections import Counter
+
+# Estimate of the number of distinct cache lines
+from math import log
+
+# Columns of program counters and counts
+from array import array
+
+# Reading the trace files in parts
+import trace_tools
+
+# Branch instructions
+import asm_tools
+
+# Vectorized binning of program counters. numpy is optional.
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# Number of program counters which are binned at once.
+BATCH_SIZE = 1 << 16
+
+# Maximum depth of the shadow call stack. The calls which are deeper are
+# counted but not kept, so the memory use is bounded for runaway recursion.
+MAX_STACK_DEPTH = 1 << 14
+
+# Maximum number of distinct call stacks of a trace file. The time of the call
+# stacks which are found after the limit is attributed to their callers.
+MAX_STACKS = 1 << 20
+
+# Kinds of instructions for the shadow call stack.
+CALL = 1
+RETURN = 2
+
+# Name of the function of the addresses which are not in a function.
+UNKNOWN_FUNCTION = "[unknown]"
+
+# Size of a cache line in bytes, for counting the distinct cache lines.
+CACHE_LINE_SIZE = 64
+
+# Maximum number of distinct cache lines which are counted exactly by a
+# CacheLineCounter, and the number of bits of the register index of its sketch.
+EXACT_CACHE_LINES = 64
+SKETCH_BITS = 10
+
+# Access sizes of the load and store instructions by their size letter, like
+# the "w" of "lw" and "c_swsp", and the "d" of "fld" and "amoadd_w.d".
+ACCESS_SIZES = {'b': 1, 'h': 2, 'w': 4, 'd': 8, 'q': 16}
+
+
+class BlockProfile:
+    """Execution counts of the basic blocks and edges of a program.
+
+    A sample usage is:
+
+        profile = BlockProfile(result.graph, ["loop_test.trc"], 1, assembly_code)
+        profile.annotate(result.graph)
+
+    Attributes
+    ----------
+    counts : list of int
+        Number of executions of each node of the graph, that is the number of
+        times the first instruction of its basic block is executed. The list
+        is indexed by node numbers.
+    instructions : list of int
+        Number of executed instructions in the basic block of each node.
+    edge_counts : list of int
+        Number of traversals of each edge of the graph, in the order of the
+        successor_list of the graph.
+    taken, fall_through : list of int or str
+        Number of taken and not taken branches of each node whose basic block
+        ends with a branch instruction, "null" for the other nodes.
+    transitions : dict of tuple to int
+        Number of transitions between each pair of nodes, including the pairs
+        which are not edges of the graph.
+    unmapped : int
+        Number of executed instructions which are not in a basic block of the
+        graph, like the instructions of the startup code.
+    total : int
+        Number of executed instructions in the trace files.
+    """
+
+    def __init__(self, graph, trace_files: list, jobs: int = 1,
+                 assembly_code = None, parts: Optional["ProfileParts"] = None):
+        """Counts the executions of the basic blocks in the trace files.
+
+        Parameters
+        ----------
+        graph : CompactCFG
+            Control flow graph of the program, with block addresses.
+        trace_files : list of str
+            List of names of the trace files.
+        jobs : int
+            Number of worker processes which read the trace files.
+        assembly_code : AssemblyIndex or None
+            Index of the assembly code. The branch counts are found only if it
+            is given.
+        parts : ProfileParts or None
+            The pass over the trace files which includes the "counts" profile.
+            The trace files are read if None.
+        """
+
+        if parts is None:
+            parts = ProfileParts(graph, assembly_code, trace_files, jobs,
+                                 ["counts"])
+        starts = parts.address_map.starts
+        ends = parts.address_map.ends
+        numbers = parts.address_map.numbers
+
+        self.counts: List[int] = [0] * graph.number_of_nodes()
+        self.instructions: List[int] = [0] * graph.number_of_nodes()
+        self.transitions: Dict[Tuple[int, int], int] = {}
+        self.unmapped: int = 0
+        self.total: int = 0
+
+        # Transitions between positions in the sorted block ranges.
+        transitions: Dict[Tuple[int, int], int] = {}
+
+        # Address of the last instruction of the previous part of the same file.
+        previous: Optional[int] = None
+        previous_file: Optional[str] = None
+
+        for part, (entries, instructions, unmapped, part_transitions, first,
+                   last) in zip(parts.parts, parts.results["counts"]):
+            # The transition which crosses the border of two parts of the same
+            # file.
+            if part[0] == previous_file and previous is not None and first is not None:
+                pair = array('Q', [first])
+                for key, count in bin_addresses(pair, starts, ends,
+                                                previous)[3].items():
+                    transitions[key] = transitions.get(key, 0) + count
+
+            for position, number in enumerate(numbers):
+                self.counts[number] += entries[position]
+                self.instructions[number] += instructions[position]
+            for key, count in part_transitions.items():
+                transitions[key] = transitions.get(key, 0) + count
+            self.unmapped += unmapped
+            self.total += sum(instructions) + unmapped
+
+            if last is not None or part[0] != previous_file:
+                previous = last
+            previous_file = part[0]
+
+        for (source, target), count in transitions.items():
+            self.transitions[(numbers[source], numbers[target])] = count
+
+        self.edge_counts: List[int] = self._count_edges(graph)
+        self.taken, self.fall_through = self._count_branches(graph, assembly_code)
+
+
+    def _count_edges(self, graph) -> List[int]:
+        """Returns the number of traversals of each edge of the graph."""
+
+        edge_counts: List[int] = []
+
+        for source in range(graph.number_of_nodes()):
+            for position in range(graph.successor_offsets[source],
+                                  graph.successor_offsets[source + 1]):
+                edge_counts.append(self.transitions.get(
+                    (source, graph.successor_list[position]), 0))
+
+        return edge_counts
+
+
+    def _count_branches(self, graph, assembly_code) -> Tuple[list, list]:
+        """Returns the taken and fall through counts of the branch blocks.
+
+        The successor of a branch block is the taken target if its start
+        address is the target address of the branch instruction, and it is the
+        fall through target if its start address is the address of the next
+        instruction.
+        """
+
+        taken: list = ["null"] * graph.number_of_nodes()
+        fall_through: list = ["null"] * graph.number_of_nodes()
+
+        if assembly_code is None:
+            return taken, fall_through
+
+        table = assembly_code.instructions
+        branches = table.mnemonic_id_set(asm_tools.branch_inst)
+
+        for source in range(graph.number_of_nodes()):
+            instruction = table.index_of_line(graph.ends[source])
+            if (graph.start_addresses[source] == 0 or instruction == len(table)
+                    or table.lines[instruction] != graph.ends[source]
+                    or table.mnemonics[instruction] not in branches):
+                continue
+
+            target_address = table.targets[instruction]
+            next_address = table.addresses[instruction] + table.sizes[instruction]
+            taken[source] = 0
+            fall_through[source] = 0
+
+            for position in range(graph.successor_offsets[source],
+                                  graph.successor_offsets[source + 1]):
+                target = graph.successor_list[position]
+                count = self.transitions.get((source, target), 0)
+
+                if graph.start_addresses[target] == target_address:
+                    taken[source] += count
+                elif graph.start_addresses[target] == next_address:
+                    fall_through[source] += count
+
+        return taken, fall_through
+
+
+    def annotate(self, graph) -> None:
+        """Adds the counts to the graph.
+
+        The nodes get the "count" and "instructions" attributes, and the
+        "taken" and "fall_through" attributes for the branch blocks. The edges
+        get the "weight" attribute, which is the number of traversals.
+        """
+
+        graph.set_node_column("count", self.counts)
+        graph.set_node_column("instructions", self.instructions)
+        graph.set_node_column("taken", self.taken)
+        graph.set_node_column("fall_through", self.fall_through)
+        graph.set_edge_column("weight", self.edge_counts)
+
+
+class TimeProfile:
+    """Simulation ticks spent in the basic blocks and functions of a program.
+
+    The time of an instruction is the tick difference to the next instruction
+    in the same trace file. The last instruction of a trace file has no time.
+
+    The exclusive time of a block or function is the time of its own
+    instructions. The inclusive time also includes the time of the functions
+    which it calls, directly or indirectly. Recursive calls are counted once,
+    for the outermost call.
+
+    A sample usage is:
+
+        profile = TimeProfile(result.graph, assembly_code, ["loop_test.trc"])
+        profile.annotate(result.graph)
+
+    Attributes
+    ----------
+    ticks : list of int
+        Exclusive time of each node of the graph, indexed by node numbers.
+    inclusive_ticks : list of int
+        Inclusive time of each node of the graph. The time of a call is
+        attributed to the block of the call instruction.
+    functions : list of str
+        Names of the functions. The last one is UNKNOWN_FUNCTION, for the
+        addresses which are not in a function.
+    function_ticks : list of int
+        Exclusive time of each function, in the order of `functions`.
+    function_inclusive_ticks : list of int
+        Inclusive time of each function, in the order of `functions`.
+    calls : list of int
+        Number of calls of each function, in the order of `functions`.
+    stacks : dict of str to int
+        Exclusive time of each call stack. The keys are the names of the
+        functions on the stack from the outermost one, joined by ";".
+    unmapped_ticks : int
+        Time of the instructions which are not in a basic block of the graph.
+    total_ticks : int
+        Time of all of the instructions.
+    """
+
+    def __init__(self, graph, assembly_code, trace_files: list, jobs: int = 1,
+                 parts: Optional["ProfileParts"] = None):
+        """Attributes the time in the trace files to blocks and functions.
+
+        Parameters
+        ----------
+        graph : CompactCFG
+            Control flow graph of the program, with block addresses.
+        assembly_code : AssemblyIndex
+            Index of the assembly code of the program.
+        trace_files : list of str
+            List of names of the trace files.
+        jobs : int
+            Number of worker processes which read the trace files.
+        parts : ProfileParts or None
+            The pass over the trace files which includes the "time" profile.
+            The trace files are read if None.
+        """
+
+        if parts is None:
+            parts = ProfileParts(graph, assembly_code, trace_files, jobs, ["time"])
+        numbers = parts.address_map.numbers
+
+        self.functions: List[str] = parts.address_map.function_names
+        self.ticks: List[int] = [0] * graph.number_of_nodes()
+        self.inclusive_ticks: List[int] = [0] * graph.number_of_nodes()
+        self.function_ticks: List[int] = [0] * len(self.functions)
+        self.function_inclusive_ticks: List[int] = [0] * len(self.functions)
+        self.calls: List[int] = [0] * len(self.functions)
+        self.stacks: Dict[str, int] = {}
+        self.unmapped_ticks: int = 0
+        self.total_ticks: int = 0
+
+        # Exclusive and inclusive ticks of the blocks, in the order of the
+        # block ranges.
+        block_ticks = [0] * len(numbers)
+        block_inclusive = [0] * len(numbers)
+
+        # Call stack of the current trace file and its last instruction.
+        stack: Optional[_ShadowStack] = None
+        previous: Optional[tuple] = None
+
+        def finish_file() -> None:
+            if previous is None:
+                return
+            stack.close_all(previous[0])
+            for position in range(len(numbers)):
+                block_inclusive[position] += stack.block_inclusive[position]
+            for function in range(len(self.functions)):
+                self.function_inclusive_ticks[function] += stack.function_inclusive[function]
+            for name, ticks in stack.named_stacks(self.functions).items():
+                self.stacks[name] = self.stacks.get(name, 0) + ticks
+
+        for part, result in zip(parts.parts, parts.results["time"]):
+            (part_block_ticks, function_ticks, calls, unmapped, first, last,
+             part_stack, events) = result
+
+            for position in range(len(numbers)):
+                block_ticks[position] += part_block_ticks[position]
+            for function in range(len(self.functions)):
+                self.function_ticks[function] += function_ticks[function]
+                self.calls[function] += calls[function]
+            self.unmapped_ticks += unmapped
+
+            # The first part of a trace file is processed with its call stack.
+            if part[1] == 0:
+                finish_file()
+                stack, previous = part_stack, last
+                continue
+
+            if first is None:
+                continue
+
+            if previous is None:
+                stack.start(first[2], first[0])
+            else:
+                # The instruction which crosses the border of two parts of the
+                # same file.
+                tick, position, function, kind = previous
+                delta = first[0] - tick
+                self.function_ticks[function] += delta
+                if position < 0:
+                    self.unmapped_ticks += delta
+                else:
+                    block_ticks[position] += delta
+                if kind == CALL:
+                    self.calls[first[2]] += 1
+                stack.step(delta, position, kind, first[2], first[0])
+
+            stack.replay(events)
+            previous = last
+
+        finish_file()
+
+        for position, number in enumerate(numbers):
+            self.ticks[number] = block_ticks[position]
+            self.inclusive_ticks[number] = block_inclusive[position]
+        self.total_ticks = sum(self.function_ticks)
+
+
+    def function_table(self) -> List[dict]:
+        """Returns the times of the functions which are executed.
+
+        Returns
+        -------
+        list of dict
+            A row per function with the "function", "ticks", "inclusive_ticks"
+            and "calls" members, sorted by inclusive time.
+        """
+
+        rows = [{"function": name, "ticks": self.function_ticks[function],
+                 "inclusive_ticks": self.function_inclusive_ticks[function],
+                 "calls": self.calls[function]}
+                for function, name in enumerate(self.functions)
+                if self.function_inclusive_ticks[function]]
+        rows.sort(key = lambda row: row["inclusive_ticks"], reverse = True)
+
+        return rows
+
+
+    def write_collapsed(self, file: str) -> None:
+        """Writes the time of the call stacks in collapsed stack format.
+
+        Each line is a call stack and its exclusive ticks, like
+        "_start;main;calc 8500". The lines are sorted by the call stacks. The
+        file can be given to flame graph tools, like flamegraph.pl.
+
+        Parameters
+        ----------
+        file : str
+            Name of the output file.
+        """
+
+        with open(file, 'w') as f:
+            for stack in sorted(self.stacks):
+                f.write(f"{stack} {self.stacks[stack]}\n")
+        f.closed
+
+
+    def annotate(self, graph) -> None:
+        """Adds the times to the graph.
+
+        The nodes get the "ticks" and "inclusive_ticks" attributes, and the
+        "functions" table is added to the graph.
+        """
+
+        graph.set_node_column("ticks", self.ticks)
+        graph.set_node_column("inclusive_ticks", self.inclusive_ticks)
+        graph.set_table("functions", self.function_table())
+
+
+
+class MemoryProfile:
+    """Memory accesses of the basic blocks and functions of a program.
+
+    The accesses are the trace lines whose op class ends with "MemRead" or
+    "MemWrite". An access is attributed to the basic block and the function of
+    its instruction.
+
+    A sample usage is:
+
+        profile = MemoryProfile(result.graph, assembly_code, ["loop_test.trc"])
+        profile.annotate(result.graph)
+
+    Attributes
+    ----------
+    loads, stores : list of int
+        Number of reads and writes of each node of the graph, indexed by node
+        numbers.
+    load_bytes, store_bytes : list of int
+        Number of bytes which are read and written by each node of the graph.
+    cache_lines : list of int
+        Number of distinct cache lines of CACHE_LINE_SIZE bytes which are
+        accessed by each node of the graph. The numbers above
+        EXACT_CACHE_LINES are estimates, see `CacheLineCounter`.
+    cache_lines_estimated : list of bool
+        Whether the number of cache lines of each node of the graph is an
+        estimate.
+    functions : list of str
+        Names of the functions. The last one is UNKNOWN_FUNCTION, for the
+        addresses which are not in a function.
+    function_loads, function_stores : list of int
+        Number of reads and writes of each function, in the order of
+        `functions`.
+    function_load_bytes, function_store_bytes : list of int
+        Number of bytes which are read and written by each function.
+    function_cache_lines : list of int
+        Number of distinct cache lines which are accessed by each function,
+        estimated like `cache_lines`.
+    function_cache_lines_estimated : list of bool
+        Whether the number of cache lines of each function is an estimate.
+    unmapped : int
+        Number of accesses of the instructions which are not in a basic block
+        of the graph.
+    """
+
+    def __init__(self, graph, assembly_code, trace_files: list, jobs: int = 1,
+                 parts: Optional["ProfileParts"] = None):
+        """Collects the memory accesses in the trace files.
+
+        Parameters
+        ----------
+        graph : CompactCFG
+            Control flow graph of the program, with block addresses.
+        assembly_code : AssemblyIndex
+            Index of the assembly code of the program.
+        trace_files : list of str
+            List of names of the trace files.
+        jobs : int
+            Number of worker processes which read the trace files.
+        parts : ProfileParts or None
+            The pass over the trace files which includes the "memory" profile.
+            The trace files are read if None.
+        """
+
+        if parts is None:
+            parts = ProfileParts(graph, assembly_code, trace_files, jobs,
+                                 ["memory"])
+        numbers = parts.address_map.numbers
+
+        self.functions: List[str] = parts.address_map.function_names
+        self.loads: List[int] = [0] * graph.number_of_nodes()
+        self.stores: List[int] = [0] * graph.number_of_nodes()
+        self.load_bytes: List[int] = [0] * graph.number_of_nodes()
+        self.store_bytes: List[int] = [0] * graph.number_of_nodes()
+        self.function_loads: List[int] = [0] * len(self.functions)
+        self.function_stores: List[int] = [0] * len(self.functions)
+        self.function_load_bytes: List[int] = [0] * len(self.functions)
+        self.function_store_bytes: List[int] = [0] * len(self.functions)
+        self.unmapped: int = 0
+
+        # Distinct cache lines of the blocks, by their positions in the block
+        # ranges, and of the functions. Only the blocks and functions which
+        # access memory have a counter.
+        block_lines: Dict[int, CacheLineCounter] = {}
+        function_lines: Dict[int, CacheLineCounter] = {}
+
+        for result in parts.results["memory"]:
+            (block_counts, part_block_lines, function_counts,
+             part_function_lines, unmapped) = result
+
+            for position, number in enumerate(numbers):
+                loads, stores, load_bytes, store_bytes = block_counts[position]
+                self.loads[number] += loads
+                self.stores[number] += stores
+                self.load_bytes[number] += load_bytes
+                self.store_bytes[number] += store_bytes
+            for function in range(len(self.functions)):
+                loads, stores, load_bytes, store_bytes = function_counts[function]
+                self.function_loads[function] += loads
+                self.function_stores[function] += stores
+                self.function_load_bytes[function] += load_bytes
+                self.function_store_bytes[function] += store_bytes
+            for lines, part_lines in [(block_lines, part_block_lines),
+                                      (function_lines, part_function_lines)]:
+                for key, counter in part_lines.items():
+                    if key in lines:
+                        lines[key].update(counter)
+                    else:
+                        lines[key] = counter
+            self.unmapped += unmapped
+
+        self.cache_lines: List[int] = [0] * graph.number_of_nodes()
+        self.cache_lines_estimated: List[bool] = [False] * graph.number_of_nodes()
+        for position, counter in block_lines.items():
+            self.cache_lines[numbers[position]] = len(counter)
+            self.cache_lines_estimated[numbers[position]] = counter.is_estimate()
+        self.function_cache_lines: List[int] = [0] * len(self.functions)
+        self.function_cache_lines_estimated: List[bool] = [False] * len(self.functions)
+        for function, counter in function_lines.items():
+            self.function_cache_lines[function] = len(counter)
+            self.function_cache_lines_estimated[function] = counter.is_estimate()
+
+
+    def function_table(self) -> List[dict]:
+        """Returns the memory accesses of the functions which access memory.
+
+        Returns
+        -------
+        list of dict
+            A row per function with the "function", "loads", "stores",
+            "load_bytes", "store_bytes", "cache_lines" and
+            "cache_lines_estimated" members, sorted by the number of accesses.
+        """
+
+        rows = [{"function": name, "loads": self.function_loads[function],
+                 "stores": self.function_stores[function],
+                 "load_bytes": self.function_load_bytes[function],
+                 "store_bytes": self.function_store_bytes[function],
+                 "cache_lines": self.function_cache_lines[function],
+                 "cache_lines_estimated":
+                     self.function_cache_lines_estimated[function]}
+                for function, name in enumerate(self.functions)
+                if self.function_loads[function] or self.function_stores[function]]
+        rows.sort(key = lambda row: row["loads"] + row["stores"], reverse = True)
+
+        return rows
+
+
+    def annotate(self, graph) -> None:
+        """Adds the memory accesses to the graph.
+
+        The nodes get the "loads", "stores", "load_bytes", "store_bytes",
+        "cache_lines" and "cache_lines_estimated" attributes, and the "memory"
+        table is added to the graph. The "cache_lines_estimated" attribute is
+        true if the number of cache lines is an estimate of the HyperLogLog
+        sketch, above EXACT_CACHE_LINES cache lines.
+        """
+
+        graph.set_node_column("loads", self.loads)
+        graph.set_node_column("stores", self.stores)
+        graph.set_node_column("load_bytes", self.load_bytes)
+        graph.set_node_column("store_bytes", self.store_bytes)
+        graph.set_node_column("cache_lines", self.cache_lines)
+        graph.set_node_column("cache_lines_estimated", self.cache_lines_estimated)
+        graph.set_table("memory", self.function_table())
+
+
+
+class ProfileParts:
+    """One pass over the trace files for several profiles.
+
+    The trace files are divided into parts (see `trace_tools.split_traces`),
+    and each part is read once by a worker process, which gives each trace line
+    to the collectors of the profiles. The profiles are created from the
+    results of the parts, like `TimeProfile(..., parts = parts)`.
+
+    Attributes
+    ----------
+    address_map : AddressMap
+        Address map of the graph.
+    parts : list of tuple
+        The parts of the trace files.
+    results : dict of str to list
+        The results of the parts for each profile, keyed by the names of the
+        profiles. The results are in the order of the parts.
+    """
+
+    def __init__(self, graph, assembly_code, trace_files: list, jobs: int,
+                 names: Iterable[str]):
+        """Reads the trace files once for the profiles.
+
+        Parameters
+        ----------
+        graph : CompactCFG
+            Control flow graph of the program, with block addresses.
+        assembly_code : AssemblyIndex or None
+            Index of the assembly code of the program. It is required for the
+            "time" and "memory" profiles.
+        trace_files : list of str
+            List of names of the trace files.
+        jobs : int
+            Number of worker processes which read the trace files.
+        names : iterable of str
+            Names of the profiles, some of "counts", "time" and "memory".
+
+        Raises
+        ------
+        Exception
+            If a profile is not known.
+        """
+
+        names = tuple(dict.fromkeys(names))
+        for name in names:
+            if name not in _COLLECTORS:
+                raise Exception("Error: Unknown profile: " + name)
+
+        self.address_map: AddressMap = AddressMap(graph, assembly_code)
+        self.parts: List[Tuple[str, int, Optional[int]]] = trace_tools.split_traces(
+            trace_files, jobs)
+        results = trace_tools.map_parts(_profile_part, self.parts, jobs,
+                                        self.address_map, names)
+        self.results: Dict[str, list] = {name: [result[name] for result in results]
+                                         for name in names}
+
+
+
+class AddressMap:
+    """Maps instruction addresses to basic blocks, functions and call kinds.
+
+    The address map is sent to the worker processes which read the trace
+    files. The lookups are cached per address.
+
+    Attributes
+    ----------
+    starts, ends : array of int
+        Sorted start addresses and the end addresses of the basic blocks.
+    numbers : array of int
+        Node numbers of the basic blocks in the order of `starts`.
+    function_starts, function_ends : array of int
+        Sorted start addresses and the end addresses of the functions.
+    function_names : list of str
+        Names of the functions in the order of `function_starts`, and
+        UNKNOWN_FUNCTION.
+    kinds : dict of int to int
+        CALL or RETURN for the addresses of the calls and the returns.
+    """
+
+    def __init__(self, graph, assembly_code):
+        """Creates the address map of the graph.
+
+        Without the assembly code (None), all of the addresses are in
+        UNKNOWN_FUNCTION and no instruction is a call or a return.
+        """
+
+        self.starts, self.ends, self.numbers = graph.block_ranges()
+
+        functions = assembly_code.functions if assembly_code is not None else []
+        self.function_starts: array = array('Q', [f.start_address for f in functions])
+        self.function_ends: array = array('Q', [f.end_address for f in functions])
+        self.function_names: List[str] = ([f.name for f in functions]
+                                          + [UNKNOWN_FUNCTION])
+
+        table = assembly_code.instructions if assembly_code is not None else []
+        self.kinds: Dict[int, int] = {}
+        for instruction in range(len(table)):
+            if table.is_call(instruction):
+                self.kinds[table.addresses[instruction]] = CALL
+            elif table.is_return(instruction):
+                self.kinds[table.addresses[instruction]] = RETURN
+
+        self._cache: Dict[int, tuple] = {}
+
+
+    def __getstate__(self) -> dict:
+        # The cache is not sent to the worker processes.
+        state = dict(self.__dict__)
+        state["_cache"] = {}
+        return state
+
+
+    def lookup(self, address: int) -> Tuple[int, int, int]:
+        """Returns the block position, the function and the kind of an address.
+
+        Returns
+        -------
+        tuple of int
+            The position of the basic block in `starts` (-1 if the address is
+            not in a block), the index of the function in `function_names` and
+            the kind of the instruction (CALL, RETURN or 0).
+        """
+
+        info = self._cache.get(address)
+        if info is not None:
+            return info
+
+        position = bisect_right(self.starts, address) - 1
+        if position >= 0 and address > self.ends[position]:
+            position = -1
+
+        function = bisect_right(self.function_starts, address) - 1
+        if function < 0 or address > self.function_ends[function]:
+            function = len(self.function_names) - 1
+
+        info = (position, function, self.kinds.get(address, 0))
+        self._cache[address] = info
+
+        return info
+
+
+
+class _ShadowStack:
+    """Shadow call stack of a trace file, see `TimeProfile`.
+
+    The instructions of the trace file are given to the call stack in
+    execution order by `step`, or by `replay` for the compressed list of a
+    part of the trace file. The call stack is created by the worker process of
+    the first part of the trace file and it is sent to the main process, which
+    continues it with the other parts.
+
+    After a call instruction, a frame of the function of the next instruction
+    is pushed. After a return instruction, the top frame is popped. Otherwise
+    if the next instruction is in another function, like after a tail call,
+    the function of the top frame is replaced.
+
+    A frame keeps its function, the tick when the function is entered, the
+    block of the call instruction, the tick of the call, its call stack and
+    the call stack of its caller. The inclusive time of a function or block is
+    added when its outermost frame is popped, so recursive calls are counted
+    once.
+
+    The call stacks are the nodes of a tree whose root is the function of the
+    first instruction. A call stack is a node id, so the time of an
+    instruction is added to its call stack without building the call stack.
+
+    Attributes
+    ----------
+    block_inclusive : list of int
+        Inclusive ticks of the blocks, in the order of the block ranges.
+    function_inclusive : list of int
+        Inclusive ticks of the functions.
+    """
+
+    def __init__(self, block_count: int, function_count: int):
+        self.block_inclusive: List[int] = [0] * block_count
+        self.function_inclusive: List[int] = [0] * function_count
+
+        # Number of frames of each function and number of calls from each
+        # block on the stack.
+        self.active_functions: List[int] = [0] * function_count
+        self.active_blocks: List[int] = [0] * block_count
+
+        self.frames: List[list] = []
+        self.overflow: int = 0
+
+        # Tree of the call stacks. Each call stack has a parent, a function
+        # and ticks.
+        self.stack_ids: Dict[Tuple[int, int], int] = {}
+        self.stack_parents: List[int] = []
+        self.stack_functions: List[int] = []
+        self.stack_ticks: List[int] = []
+
+
+    def start(self, function: int, tick: int) -> None:
+        """Opens the frame of the first instruction of the trace file."""
+
+        self._open(function, tick, -1, tick, -1)
+
+
+    def step(self, ticks: int, position: int, kind: int, function: int,
+             tick: int) -> None:
+        """Adds the time of an instruction and moves to the next instruction.
+
+        Parameters
+        ----------
+        ticks : int
+            Time of the instruction.
+        position : int
+            Block position of the instruction, -1 if it is not in a block.
+        kind : int
+            CALL, RETURN or 0 for the instruction.
+        function : int
+            Function of the next instruction.
+        tick : int
+            Tick of the next instruction.
+        """
+
+        self.stack_ticks[self.frames[-1][4]] += ticks
+        # The time of the block is already in the inclusive time of the call
+        # from the block, if there is one on the stack.
+        if position >= 0 and self.active_blocks[position] == 0:
+            self.block_inclusive[position] += ticks
+
+        self._move(position, kind, function, tick)
+
+
+    def replay(self, events: tuple) -> None:
+        """Replays the compressed list of a part of the trace file.
+
+        The list is created by `_TimePart`. It is a list of segments and a
+        move to the next instruction between each two segments. The call stack
+        does not change in a segment, so the time of a segment is added at
+        once.
+        """
+
+        (segment_ticks, offsets, block_positions, block_ticks, kinds,
+         positions, functions, ticks) = events
+        stack_ticks = self.stack_ticks
+        active_blocks = self.active_blocks
+        block_inclusive = self.block_inclusive
+
+        for segment in range(len(segment_ticks)):
+            stack_ticks[self.frames[-1][4]] += segment_ticks[segment]
+            for index in range(offsets[segment], offsets[segment + 1]):
+                position = block_positions[index]
+                if active_blocks[position] == 0:
+                    block_inclusive[position] += block_ticks[index]
+
+            if segment < len(kinds):
+                self._move(positions[segment], kinds[segment],
+                           functions[segment], ticks[segment])
+
+
+    def close_all(self, tick: int) -> None:
+        """Closes the frames which are not returned at the last tick."""
+
+        while self.frames:
+            self._close_site(self._close(tick), tick)
+
+
+    def named_stacks(self, names: List[str]) -> Dict[str, int]:
+        """Returns the ticks of the call stacks by their names.
+
+        The names are created from the names of the parents of the call stacks.
+        """
+
+        stack_names: List[str] = []
+        stacks: Dict[str, int] = {}
+
+        for node, parent in enumerate(self.stack_parents):
+            name = names[self.stack_functions[node]]
+            if parent >= 0:
+                name = stack_names[parent] + ";" + name
+            stack_names.append(name)
+            if self.stack_ticks[node]:
+                stacks[name] = stacks.get(name, 0) + self.stack_ticks[node]
+
+        return stacks
+
+
+    def _move(self, position: int, kind: int, function: int, tick: int) -> None:
+        """Follows a call, a return or a function change, see `step`."""
+
+        frames = self.frames
+
+        if kind == CALL:
+            if len(frames) < MAX_STACK_DEPTH:
+                if position >= 0:
+                    self.active_blocks[position] += 1
+                self._open(function, tick, position, tick, frames[-1][4])
+            else:
+                self.overflow += 1
+        elif kind == RETURN and (self.overflow or len(frames) > 1):
+            if self.overflow:
+                self.overflow -= 1
+            else:
+                self._close_site(self._close(tick), tick)
+                if frames[-1][0] != function:
+                    frame = self._close(tick)
+                    self._open(function, tick, frame[2], frame[3], frame[5])
+        elif frames[-1][0] != function and not self.overflow:
+            frame = self._close(tick)
+            self._open(function, tick, frame[2], frame[3], frame[5])
+
+
+    def _call_stack(self, parent: int, function: int) -> int:
+        key = (parent, function)
+        node = self.stack_ids.get(key)
+        if node is None:
+            if len(self.stack_parents) >= MAX_STACKS and parent >= 0:
+                return parent
+            node = len(self.stack_parents)
+            self.stack_ids[key] = node
+            self.stack_parents.append(parent)
+            self.stack_functions.append(function)
+            self.stack_ticks.append(0)
+        return node
+
+
+    def _open(self, function: int, tick: int, site: int, call_tick: int,
+              parent: int) -> None:
+        self.frames.append([function, tick, site, call_tick,
+                            self._call_stack(parent, function), parent])
+        self.active_functions[function] += 1
+
+
+    def _close(self, tick: int) -> list:
+        frame = self.frames.pop()
+        function, entry = frame[0], frame[1]
+        self.active_functions[function] -= 1
+        if self.active_functions[function] == 0:
+            self.function_inclusive[function] += tick - entry
+        return frame
+
+
+    def _close_site(self, frame: list, tick: int) -> None:
+        site = frame[2]
+        if site >= 0:
+            self.active_blocks[site] -= 1
+            if self.active_blocks[site] == 0:
+                self.block_inclusive[site] += tick - frame[3]
+
+
+
+class CacheLineCounter:
+    """Counter of the distinct cache lines of a block or a function.
+
+    The size of the counter is bounded. The cache lines are kept in a set
+    until there are more than EXACT_CACHE_LINES of them, so the small numbers
+    are exact. Then the cache lines are counted by a HyperLogLog sketch of
+    2 ** SKETCH_BITS one byte registers, and the number is an estimate whose
+    standard error is about 3%. The counters of the parts of the trace files
+    are merged by `update`.
+
+    Attributes
+    ----------
+    lines : set of int or None
+        The cache lines, None if the sketch is used.
+    registers : bytearray or None
+        The registers of the sketch, None if the set is used.
+    """
+
+    __slots__ = ("lines", "registers")
+
+    def __init__(self):
+        self.lines: Optional[set] = set()
+        self.registers: Optional[bytearray] = None
+
+
+    def add(self, first_line: int, last_line: int) -> None:
+        """Adds the cache lines from the first line to the last line."""
+
+        if self.registers is None:
+            self.lines.update(range(first_line, last_line + 1))
+            if len(self.lines) > EXACT_CACHE_LINES:
+                self._to_sketch()
+        else:
+            for line in range(first_line, last_line + 1):
+                self._add_to_sketch(line)
+
+
+    def update(self, other: "CacheLineCounter") -> None:
+        """Adds the cache lines of another counter."""
+
+        if self.registers is None and other.registers is None:
+            self.lines |= other.lines
+            if len(self.lines) > EXACT_CACHE_LINES:
+                self._to_sketch()
+            return
+
+        if self.registers is None:
+            self._to_sketch()
+
+        if other.registers is None:
+            for line in other.lines:
+                self._add_to_sketch(line)
+        else:
+            registers = self.registers
+            for index, rank in enumerate(other.registers):
+                if rank > registers[index]:
+                    registers[index] = rank
+
+
+    def __len__(self) -> int:
+        if self.registers is None:
+            return len(self.lines)
+
+        count = len(self.registers)
+        estimate = (0.7213 / (1 + 1.079 / count) * count * count
+                    / sum(2.0 ** -rank for rank in self.registers))
+
+        # Linear counting is more accurate for the small numbers.
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * count and zeros:
+            estimate = count * log(count / zeros)
+
+        return round(estimate)
+
+
+    def is_estimate(self) -> bool:
+        """Returns True if the number of cache lines is an estimate."""
+
+        return self.registers is not None
+
+
+    def _to_sketch(self) -> None:
+        self.registers = bytearray(1 << SKETCH_BITS)
+        for line in self.lines:
+            self._add_to_sketch(line)
+        self.lines = None
+
+
+    def _add_to_sketch(self, line: int) -> None:
+        # The bits of the line number are mixed by the finalizer of splitmix64.
+        value = (line + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        value ^= value >> 31
+
+        rest_bits = 64 - SKETCH_BITS
+        index = value >> rest_bits
+        rank = rest_bits - (value & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+
+
+def collect_profiles(graph, assembly_code, trace_files: list, jobs: int,
+                     names: Iterable[str]) -> dict:
+    """Creates several profiles with one pass over the trace files.
+
+    Parameters
+    ----------
+    graph : CompactCFG
+        Control flow graph of the program, with block addresses.
+    assembly_code : AssemblyIndex
+        Index of the assembly code of the program.
+    trace_files : list of str
+        List of names of the trace files.
+    jobs : int
+        Number of worker processes which read the trace files.
+    names : iterable of str
+        Names of the profiles, some of "counts", "time" and "memory".
+
+    Returns
+    -------
+    dict
+        The BlockProfile, TimeProfile and MemoryProfile objects, keyed by the
+        names of the profiles.
+    """
+
+    parts = ProfileParts(graph, assembly_code, trace_files, jobs, names)
+    profiles = {}
+
+    for name in parts.results:
+        if name == "counts":
+            profiles[name] = BlockProfile(graph, trace_files, jobs,
+                                          assembly_code, parts)
+        elif name == "time":
+            profiles[name] = TimeProfile(graph, assembly_code, trace_files,
+                                         jobs, parts)
+        else:
+            profiles[name] = MemoryProfile(graph, assembly_code, trace_files,
+                                           jobs, parts)
+
+    return profiles
+
+
+def instruction_tick(line: str) -> Optional[Tuple[int, int]]:
+    """Extracts the tick and the program counter of an instruction.
+
+    Returns
+    -------
+    tuple of int or None
+        The tick and the program counter, or None if the line is not a valid
+        trace line or the line is not the first micro operation of an
+        instruction.
+    """
+
+    tokens = line.split(None, 5)
+
+    if (len(tokens) < 5 or not tokens[4].startswith('0x')
+            or not tokens[0].endswith(':')):
+        return None
+
+    address, _, micro_operation = tokens[4][2:].partition('.')
+    if micro_operation and micro_operation != '0':
+        return None
+
+    return int(tokens[0][:-1]), int(address, 16)
+
+
+def access_size(mnemonic: str) -> int:
+    """Returns the number of bytes which are accessed by a load or a store.
+
+    The size is found from the size letter of the mnemonic, like "lw", "c_sdsp",
+    "fld", "lbu", "lr_w" and "amoadd_d". The mnemonics of the trace files use
+    "_" instead of ".".
+
+    Returns
+    -------
+    int
+        The access size in bytes, or 0 if the mnemonic is not known.
+    """
+
+    name = mnemonic.replace('.', '_').split('_aq')[0].split('_rl')[0]
+    if name.startswith('c_'):
+        name = name[2:]
+        if name.endswith('sp'):
+            name = name[:-2]
+
+    # Atomic instructions have the size after the operation, like "amoor_w".
+    if name.startswith(('lr_', 'sc_', 'amo')):
+        return ACCESS_SIZES.get(name[-1], 0)
+
+    if name.startswith('f'):
+        name = name[1:]
+    if len(name) >= 2 and name[0] in 'ls':
+        return ACCESS_SIZES.get(name[1], 0)
+
+    return 0
+
+
+def bin_addresses(addresses: array, starts: array, ends: array,
+                  previous: Optional[int] = None) -> tuple:
+    """Maps addresses to the basic blocks which contain them.
+
+    Parameters
+    ----------
+    addresses : array of int
+        Program counters of the executed instructions in execution order.
+    starts : array of int
+        Sorted start addresses of the basic blocks.
+    ends : array of int
+        End addresses of the basic blocks in the order of `starts`.
+    previous : int or None
+        Program counter of the instruction which is executed before the first
+        address, if any.
+
+    Returns
+    -------
+    tuple
+        The number of addresses which are the start address of each block, the
+        number of addresses in each block, the number of addresses which are
+        not in a block and the number of transitions between each pair of
+        blocks. Blocks are identified by their positions in `starts`.
+    """
+
+    if numpy is not None:
+        return _bin_addresses_numpy(addresses, starts, ends, previous)
+
+    entries = [0] * len(starts)
+    instructions = [0] * len(starts)
+    transitions: Dict[Tuple[int, int], int] = {}
+    unmapped = 0
+
+    # Position of each distinct address, -1 if it is not in a block.
+    positions: Dict[int, int] = {}
+
+    for address, count in Counter(addresses).items():
+        position = bisect_right(starts, address) - 1
+
+        if position < 0 or address > ends[position]:
+            position = -1
+            unmapped += count
+        else:
+            instructions[position] += count
+            if address == starts[position]:
+                entries[position] += count
+
+        positions[address] = position
+
+    # Consecutive pairs of addresses which enter a block.
+    if previous is not None and len(addresses):
+        pairs = Counter(zip([previous], addresses[:1]))
+    else:
+        pairs = Counter()
+    pairs.update(zip(addresses, addresses[1:]))
+
+    for (source, target), count in pairs.items():
+        position = positions[target]
+        if position < 0 or target != starts[position]:
+            continue
+
+        if source not in positions:
+            source_position = bisect_right(starts, source) - 1
+            if source_position >= 0 and source > ends[source_position]:
+                source_position = -1
+            positions[source] = source_position
+
+        if positions[source] >= 0:
+            key = (positions[source], position)
+            transitions[key] = transitions.get(key, 0) + count
+
+    return entries, instructions, unmapped, transitions
+
+
+def _bin_addresses_numpy(addresses: array, starts: array, ends: array,
+                         previous: Optional[int] = None) -> tuple:
+    """Maps addresses to basic blocks with numpy, see bin_addresses."""
+
+    count = len(addresses)
+    if previous is not None:
+        addresses = array('Q', [previous]) + addresses
+
+    addresses = numpy.frombuffer(addresses, dtype = numpy.uint64)
+    starts = numpy.frombuffer(starts, dtype = numpy.uint64)
+    ends = numpy.frombuffer(ends, dtype = numpy.uint64)
+
+    if len(starts) == 0:
+        return [], [], count, {}
+
+    positions = numpy.searchsorted(starts, addresses, side = 'right') - 1
+    inside = positions >= 0
+    positions = numpy.where(inside, positions, 0)
+    inside &= addresses <= ends[positions]
+    entered = inside & (addresses == starts[positions])
+
+    # Transitions are the pairs whose second address enters a block and whose
+    # first address is in a block.
+    moves = entered[1:] & inside[:-1]
+    keys = positions[:-1][moves] * len(starts) + positions[1:][moves]
+    keys, key_counts = numpy.unique(keys, return_counts = True)
+    transitions = {(int(key) // len(starts), int(key) % len(starts)): int(key_count)
+                   for key, key_count in zip(keys, key_counts)}
+
+    # The previous address is only used for the transitions.
+    if previous is not None:
+        positions, inside, entered = positions[1:], inside[1:], entered[1:]
+
+    instructions = numpy.bincount(positions[inside], minlength = len(starts))
+    entries = numpy.bincount(positions[entered], minlength = len(starts))
+
+    return (entries.tolist(), instructions.tolist(),
+            int(count - numpy.count_nonzero(inside)), transitions)
+
+
+class _CountPart:
+    """Collector of the block counts of a part of a trace file.
+
+    The program counters are collected and binned in batches of BATCH_SIZE.
+    The result is the block entries, the instructions per block, the number of
+    unmapped instructions, the transitions between blocks, and the program
+    counters of the first and the last instructions of the part.
+    """
+
+    def __init__(self, address_map: AddressMap, start: int):
+        self.starts: array = address_map.starts
+        self.ends: array = address_map.ends
+        self.entries: List[int] = [0] * len(self.starts)
+        self.instructions: List[int] = [0] * len(self.starts)
+        self.transitions: Dict[Tuple[int, int], int] = {}
+        self.unmapped: int = 0
+        self.first: Optional[int] = None
+        self.previous: Optional[int] = None
+        self.batch: array = array('Q')
+
+
+    def add(self, tick: Optional[int], address: int) -> None:
+        if self.first is None:
+            self.first = address
+
+        self.batch.append(address)
+        if len(self.batch) == BATCH_SIZE:
+            self._add_batch()
+
+
+    def result(self) -> tuple:
+        if self.batch:
+            self._add_batch()
+
+        return (self.entries, self.instructions, self.unmapped,
+                self.transitions, self.first, self.previous)
+
+
+    def _add_batch(self) -> None:
+        (entries, instructions, unmapped,
+         transitions) = bin_addresses(self.batch, self.starts, self.ends,
+                                      self.previous)
+        for position in range(len(self.starts)):
+            self.entries[position] += entries[position]
+            self.instructions[position] += instructions[position]
+        for key, count in transitions.items():
+            self.transitions[key] = self.transitions.get(key, 0) + count
+        self.unmapped += unmapped
+        self.previous = self.batch[-1]
+        del self.batch[:]
+
+
+
+class _TimePart:
+    """Collector of the time of a part of a trace file.
+
+    The exclusive time of the blocks and functions and the number of calls do
+    not depend on the call stack, and they are found for every part.
+
+    The first part of a trace file is processed with a shadow call stack (see
+    `_ShadowStack`), which is returned. The call stack at the start of another
+    part is not known, so the instructions of the part are compressed into
+    segments for `_ShadowStack.replay`. A segment ends at a call, a return, a
+    change of the function, and at the instruction after a return or the
+    first instruction of the part, whose function may be different from the
+    top frame. In a segment the call stack does not change, so only the time
+    of the segment and of its blocks are kept.
+
+    The result is the exclusive ticks of the blocks (in the order of the
+    address map), the exclusive ticks of the functions, the number of calls of
+    the functions, the unmapped ticks, the first and the last instructions of
+    the part as tuples of the tick, the block position, the function and the
+    kind, the call stack of the first part or None, and the segments of the
+    other parts or None.
+    """
+
+    def __init__(self, address_map: AddressMap, start: int):
+        block_count = len(address_map.starts)
+        function_count = len(address_map.function_names)
+
+        self.lookup = address_map.lookup
+        self.block_ticks: List[int] = [0] * block_count
+        self.function_ticks: List[int] = [0] * function_count
+        self.calls: List[int] = [0] * function_count
+        self.unmapped: int = 0
+
+        self.stack: Optional[_ShadowStack] = None
+        if start == 0:
+            self.stack = _ShadowStack(block_count, function_count)
+
+        # Segments of the part. The blocks of a segment and their ticks are
+        # kept between two offsets of the segment, and the move after a
+        # segment is kept in the kinds, positions, functions and ticks.
+        self.segment_ticks: array = array('q')
+        self.offsets: array = array('q', [0])
+        self.block_positions: array = array('q')
+        self.segment_block_ticks: array = array('q')
+        self.kinds: array = array('b')
+        self.positions: array = array('q')
+        self.functions: array = array('q')
+        self.ticks: array = array('Q')
+
+        self.segment: int = 0
+        self.segment_blocks: Dict[int, int] = {}
+        self.after_return: bool = True
+
+        self.first: Optional[tuple] = None
+        self.previous: Optional[tuple] = None
+
+
+    def add(self, tick: Optional[int], address: int) -> None:
+        if tick is None:
+            return
+
+        position, function, kind = self.lookup(address)
+        previous = self.previous
+        self.previous = (tick, position, function, kind)
+
+        if previous is None:
+            self.first = self.previous
+            if self.stack is not None:
+                self.stack.start(function, tick)
+            return
+
+        previous_tick, previous_position, previous_function, previous_kind = previous
+        delta = tick - previous_tick
+
+        self.function_ticks[previous_function] += delta
+        if previous_position < 0:
+            self.unmapped += delta
+        else:
+            self.block_ticks[previous_position] += delta
+        if previous_kind == CALL:
+            self.calls[function] += 1
+
+        if self.stack is not None:
+            self.stack.step(delta, previous_position, previous_kind, function,
+                            tick)
+            return
+
+        self.segment += delta
+        if previous_position >= 0:
+            self.segment_blocks[previous_position] = (
+                self.segment_blocks.get(previous_position, 0) + delta)
+
+        if previous_kind or previous_function != function or self.after_return:
+            self._end_segment()
+            self.kinds.append(previous_kind)
+            self.positions.append(previous_position)
+            self.functions.append(function)
+            self.ticks.append(tick)
+
+        self.after_return = previous_kind == RETURN
+
+
+    def result(self) -> tuple:
+        if self.stack is not None:
+            return (self.block_ticks, self.function_ticks, self.calls,
+                    self.unmapped, self.first, self.previous, self.stack, None)
+
+        # The last segment is not followed by a move.
+        self._end_segment()
+        events = (self.segment_ticks, self.offsets, self.block_positions,
+                  self.segment_block_ticks, self.kinds, self.positions,
+                  self.functions, self.ticks)
+
+        return (self.block_ticks, self.function_ticks, self.calls,
+                self.unmapped, self.first, self.previous, None, events)
+
+
+    def _end_segment(self) -> None:
+        self.segment_ticks.append(self.segment)
+        self.block_positions.extend(self.segment_blocks.keys())
+        self.segment_block_ticks.extend(self.segment_blocks.values())
+        self.offsets.append(len(self.block_positions))
+        self.segment = 0
+        self.segment_blocks.clear()
+
+
+
+class _MemoryPart:
+    """Collector of the memory accesses of a part of a trace file.
+
+    The result is the load, store, load byte and store byte counts of each
+    block in the order of the block ranges, the cache line counters of the
+    blocks by their positions, the counts of each function, the cache line
+    counters of the functions, and the number of unmapped accesses.
+    """
+
+    def __init__(self, address_map: AddressMap, start: int):
+        self.lookup = address_map.lookup
+        self.block_counts: List[list] = [[0, 0, 0, 0] for _ in address_map.starts]
+        self.block_lines: Dict[int, CacheLineCounter] = {}
+        self.function_counts: List[list] = [[0, 0, 0, 0]
+                                            for _ in address_map.function_names]
+        self.function_lines: Dict[int, CacheLineCounter] = {}
+        self.unmapped: int = 0
+        self.sizes: Dict[str, int] = {}
+
+
+    def add_line(self, line: str) -> None:
+        """Adds the access of a trace line which includes "Mem"."""
+
+        record = trace_tools.parse_record(line)
+        if record is None or record.address is None:
+            return
+
+        if record.op_class.endswith("MemRead"):
+            kind = 0
+        elif record.op_class.endswith("MemWrite"):
+            kind = 1
+        else:
+            return
+
+        size = self.sizes.get(record.mnemonic)
+        if size is None:
+            size = self.sizes[record.mnemonic] = access_size(record.mnemonic)
+
+        first_line = record.address // CACHE_LINE_SIZE
+        last_line = (record.address + max(size, 1) - 1) // CACHE_LINE_SIZE
+        position, function, _ = self.lookup(record.pc)
+
+        counts = self.function_counts[function]
+        counts[kind] += 1
+        counts[kind + 2] += size
+        counter = self.function_lines.get(function)
+        if counter is None:
+            counter = self.function_lines[function] = CacheLineCounter()
+        counter.add(first_line, last_line)
+
+        if position < 0:
+            self.unmapped += 1
+            return
+
+        counts = self.block_counts[position]
+        counts[kind] += 1
+        counts[kind + 2] += size
+        counter = self.block_lines.get(position)
+        if counter is None:
+            counter = self.block_lines[position] = CacheLineCounter()
+        counter.add(first_line, last_line)
+
+
+    def result(self) -> tuple:
+        return (self.block_counts, self.block_lines, self.function_counts,
+                self.function_lines, self.unmapped)
+
+
+# Collectors of the profiles of a part of a trace file.
+_COLLECTORS = {"counts": _CountPart, "time": _TimePart, "memory": _MemoryPart}
+
+
+def _profile_part(part: Tuple[str, int, Optional[int]], address_map: AddressMap,
+                  names: tuple) -> dict:
+    """Collects the profiles of a part of a trace file.
+
+    This function is executed by the worker processes. Each trace line is read
+    once. The instructions are given to the collectors of the "counts" and
+    "time" profiles, and the lines which include "Mem" are given to the
+    collector of the "memory" profile.
+
+    Returns
+    -------
+    dict
+        The results of the collectors, keyed by the names of the profiles.
+    """
+
+    file, start, end = part
+    collectors = {name: _COLLECTORS[name](address_map, start) for name in names}
+
+    # The tick is parsed only for the time profile.
+    instructions = [collector.add for name, collector in collectors.items()
+                    if name != "memory"]
+    with_tick = "time" in collectors
+    memory = collectors.get("memory")
+
+    for line in trace_tools.read_lines(file, start = start, end = end):
+        if memory is not None and "Mem" in line:
+            memory.add_line(line)
+
+        if not instructions:
+            continue
+
+        instruction = instruction_tick(line) if with_tick else None
+        if instruction is None:
+            address = trace_tools.parse_pc(line)
+            if address is None:
+                continue
+            instruction = (None, address)
+
+        for add in instructions:
+            add(*instruction)
+
+    return {name: collector.result() for name, collector in collectors.items()}
@@ -0,0 +1,282 @@
+"""Function summary tools of Yelkovan.
+
+This file includes helper functions to reuse the analysis of functions across
+analyses and programs.
+
+The basic blocks of a function are found from its branch and jump
+instructions, and every other instruction of the function is skipped by the
+analysis. The summary of a function is the list of the positions of its branch
+and jump instructions relative to its first instruction. The summary does not
+depend on the addresses and line numbers of the function, so it can be reused
+wherever the same function appears, like the functions of the C library which
+are linked into many programs.
+
+The summaries are keyed by the hash of the instructions of the function: their
+machine codes, their sizes and the layout of their lines. The summaries are kept
+in the persistent cache of cache_tools, so a function which is analysed once
+is not scanned again in the later analyses. The summary is stitched into an
+analysis by applying the rules of the branch and jump instructions at the
+recorded positions, therefore the basic blocks are the same as the basic blocks
+which are found by scanning the function.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Dict, Iterable, Optional, Set
+
+# Hashes of the instructions of functions
+import hashlib
+
+# Binary search over the function ids of instructions
+from bisect import bisect_right
+
+# Positions of the branch and jump instructions
+from array import array
+
+
+class FunctionSummaries:
+    """Summaries of functions, keyed by the hashes of their instructions.
+
+    A sample usage is:
+
+        summaries = FunctionSummaries(cache, assembly_digest)
+        summaries.prefetch_program(table)
+        summaries.prefetch(table, [0, 7, 12])
+        positions = summaries.summary(table, 7, control_ids)
+        summaries.save()
+
+    The functions are hashed when they are prefetched or summarised, so only
+    the functions which an analysis reaches are hashed. The hashes of these
+    functions are kept in the cache for the assembly file, so the next
+    analysis of the same assembly file reads them and the summaries of its
+    functions with two queries, without hashing the functions.
+
+    Attributes
+    ----------
+    cache : Cache or None
+        Persistent cache of the summaries. The summaries are kept only in
+        memory if None.
+    program : str or None
+        Content hash of the assembly file, the key of the hashes of its
+        functions in the cache. The hashes are not kept if None.
+    summaries : dict of str to array
+        Summaries which are read or created, keyed by the hashes of the
+        functions.
+    hits, misses : int
+        Number of summaries which are reused and which are created.
+    """
+
+    def __init__(self, cache = None, program: Optional[str] = None):
+        """Creates an empty set of summaries.
+
+        Parameters
+        ----------
+        cache : Cache or None
+            Persistent cache of the summaries.
+        program : str or None
+            Content hash of the assembly file.
+        """
+
+        self.cache = cache
+        self.program: Optional[str] = program
+        self.summaries: Dict[str, array] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+        self._new: Set[str] = set()
+        # Hashes of the summaries which are read from the cache, and the keys
+        # of the prefetched entries whose last use time is not updated yet.
+        self._fetched: Set[str] = set()
+        self._used: Set[str] = set()
+        # Hashes of the functions of the last prefetched table, by the index
+        # of their first instruction.
+        self._table = None
+        self._digests: Dict[int, str] = {}
+        # Hashes of the functions of the program which are read from the cache
+        # and which are summarised.
+        self._program_digests: Dict[int, str] = {}
+        self._summarised: Dict[int, str] = {}
+
+
+    def prefetch_program(self, table) -> None:
+        """Reads the hashes of the functions of the last analysis of the
+        assembly file, and their summaries, from the cache.
+
+        Parameters
+        ----------
+        table : InstructionTable
+            Instruction table of the assembly code.
+        """
+
+        if self.cache is None or self.program is None:
+            return
+
+        digests = self.cache.get(self.cache.key("function_digests", self.program))
+        if not digests:
+            return
+
+        self._program_digests = digests
+        if table is not self._table:
+            self._table = table
+            self._digests = {}
+        self._digests.update(digests)
+        self.prefetch(table, digests)
+
+
+    def prefetch(self, table, indexes: Iterable[int]) -> None:
+        """Hashes functions and reads their summaries from the cache at once.
+
+        The hashes are kept for `summary`, so the functions are hashed once.
+        The last use time of the summaries in the cache is updated by `save`,
+        so many small prefetches do not write to the cache.
+
+        Parameters
+        ----------
+        table : InstructionTable
+            Instruction table of the assembly code.
+        indexes : iterable of int
+            Indexes of the first instructions of the functions.
+        """
+
+        if table is not self._table:
+            self._table = table
+            self._digests = {}
+
+        keys = {}
+        for index in indexes:
+            digest = self._digests.get(index)
+            if digest is None:
+                digest = function_digest(table, index, function_end(table, index))
+                self._digests[index] = digest
+            if self.cache is not None and digest not in self._fetched:
+                keys[self.cache.key("function", digest)] = digest
+                self._fetched.add(digest)
+
+        if not keys:
+            return
+
+        for key, summary in self.cache.get_many(keys, touch = False).items():
+            self.summaries[keys[key]] = summary
+            self._used.add(key)
+
+
+    def summary(self, table, index: int, control_ids: Set[int]) -> array:
+        """Returns the summary of the function which starts at an instruction.
+
+        The function continues up to the last instruction which has the same
+        function id. If the summary is not prefetched, it is read from the
+        cache.
+
+        Parameters
+        ----------
+        table : InstructionTable
+            Instruction table of the assembly code.
+        index : int
+            Index of the first instruction of the function.
+        control_ids : set of int
+            Mnemonic ids of the branch and jump instructions.
+
+        Returns
+        -------
+        array of int
+            Positions of the branch and jump instructions of the function,
+            relative to its first instruction.
+        """
+
+        if table is not self._table:
+            self._table = table
+            self._digests = {}
+
+        digest = self._digests.get(index)
+        if digest is None:
+            digest = function_digest(table, index, function_end(table, index))
+            self._digests[index] = digest
+        self._summarised[index] = digest
+
+        summary = self.summaries.get(digest)
+        if summary is None and self.cache is not None and digest not in self._fetched:
+            self._fetched.add(digest)
+            summary = self.cache.get(self.cache.key("function", digest))
+            if summary is not None:
+                self.summaries[digest] = summary
+
+        if summary is not None:
+            self.hits += 1
+            return summary
+
+        self.misses += 1
+        end = function_end(table, index)
+        mnemonics = table.mnemonics
+        summary = array('I', [position - index for position in range(index, end)
+                              if mnemonics[position] in control_ids])
+        self.summaries[digest] = summary
+        self._new.add(digest)
+
+        return summary
+
+
+    def save(self) -> None:
+        """Writes the new summaries and the hashes of the functions of the
+        program to the cache, and updates the last use time of the prefetched
+        summaries."""
+
+        if self.cache is not None and self._used:
+            self.cache.touch(self._used)
+        self._used.clear()
+
+        if (self.cache is not None and self.program is not None
+                and self._summarised != self._program_digests):
+            self.cache.put(self.cache.key("function_digests", self.program),
+                           self._summarised)
+            self._program_digests = self._summarised
+        self._summarised = {}
+
+        if self.cache is not None and self._new:
+            self.cache.put_many({self.cache.key("function", digest):
+                                 self.summaries[digest] for digest in self._new})
+        self._new.clear()
+
+
+
+def function_end(table, index: int) -> int:
+    """Returns the index after the last instruction of a function.
+
+    The function ids of the instructions are not decreasing, so the end is
+    found with a binary search.
+    """
+
+    return bisect_right(table.function_ids, table.function_ids[index], index)
+
+
+def function_digest(table, start: int, end: int) -> str:
+    """Returns the hash of the instructions of a function.
+
+    The hash includes the machine codes and the sizes of the instructions and
+    the line numbers of the instructions relative to the first one, so it does
+    not depend on the addresses and line numbers of the function.
+
+    Parameters
+    ----------
+    table : InstructionTable
+        Instruction table of the assembly code.
+    start, end : int
+        Indexes of the first instruction and after the last instruction of the
+        function.
+
+    Returns
+    -------
+    str
+        BLAKE2 hash of the instructions.
+    """
+
+    digest = hashlib.blake2b(digest_size = 16)
+    digest.update(table.codes[start:end].tobytes())
+    digest.update(table.sizes[start:end].tobytes())
+
+    # Most of the functions have an instruction per line.
+    lines = table.lines
+    if end - start and lines[end - 1] - lines[start] != end - start - 1:
+        first = lines[start]
+        digest.update(array('q', [line - first for line in lines[start:end]]).tobytes())
+
+    return digest.hexdigest()
@@ -0,0 +1,544 @@
+"""Synthetic program tools of Yelkovan.
+
+This file includes helper functions to generate synthetic programs for the
+benchmarks of Yelkovan. A synthetic program is an assembly file in the format
+of objdump and a trace file in the format of gem5, like the files in
+test_data, at a configurable size.
+
+The program has a `_start` function which calls `main`, and `main` calls the
+other functions in a loop. The other functions form call chains of a
+configurable depth: each function of a chain calls the next one. Every function
+has a loop with a conditional branch in its body, a switch table which is an
+indirect jump (jr) to one of its cases, loads and stores, and a return. Some of
+the calls are indirect calls (jalr). The targets of the indirect jumps and
+calls are found only in the trace file, like in the real programs.
+
+The trace file is created by executing the program with a small interpreter.
+Every function is executed at least once, so the targets of all of the
+indirect jumps and calls are in the trace file. The loop of `main` is repeated
+until the trace has about the requested number of instructions.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Dict, List, Optional, Tuple
+
+
+# Address of the first instruction of the program.
+TEXT_START = 0x100b0
+
+# Address of the data which is accessed by the loads and stores of the loops.
+DATA_START = 0x11c50
+
+# Size of the data which is accessed by the loops, in bytes.
+DATA_SIZE = 1 << 16
+
+# Stack pointer of `_start`. Each call uses a stack frame of 16 bytes.
+STACK_TOP = 0x7ffffff0
+FRAME_SIZE = 16
+
+# Simulation ticks of an instruction.
+TICKS_PER_INSTRUCTION = 500
+
+# Number of trace lines which are written at once.
+WRITE_BATCH = 1 << 12
+
+# Actions of the instructions for the interpreter.
+NEXT = 0
+SET = 1
+LOOP = 2
+IF = 3
+SWITCH = 4
+JUMP = 5
+CALL = 6
+RETURN = 7
+
+
+class Instruction:
+    """An instruction of a synthetic program.
+
+    Attributes
+    ----------
+    mnemonic : str
+        Mnemonic of the instruction, like "addi".
+    operands : str
+        Operands of the instruction, like "sp,sp,-16". "{target}" is replaced
+        by the target address.
+    size : int
+        Size of the machine code in bytes, 2 or 4.
+    code : int or tuple
+        Machine code of the instruction, or the encoding of the instruction if
+        the machine code depends on the target address.
+    action : int
+        Action of the instruction for the interpreter, like NEXT or CALL.
+    target : Instruction, str, list or None
+        Target instruction, the name of the target function, or the list of
+        the case instructions of a switch.
+    value : int
+        Loop count which is set by a SET instruction.
+    memory : tuple or None
+        ("stack", offset) or ("data", 0) for the loads and stores.
+    address : int
+        Address of the instruction, set by the layout.
+    """
+
+    __slots__ = ('mnemonic', 'operands', 'size', 'code', 'action', 'target',
+                 'value', 'memory', 'address')
+
+    def __init__(self, mnemonic: str, operands: str, size: int, code,
+                 action: int = NEXT, target = None, value: int = 0,
+                 memory: Optional[tuple] = None):
+        self.mnemonic: str = mnemonic
+        self.operands: str = operands
+        self.size: int = size
+        self.code = code
+        self.action: int = action
+        self.target = target
+        self.value: int = value
+        self.memory: Optional[tuple] = memory
+        self.address: int = 0
+
+
+
+def generate_program(assembly_file: str, trace_file: str,
+                     instructions: int = 10000,
+                     trace_instructions: Optional[int] = None,
+                     function_size: int = 32, call_depth: int = 8,
+                     switch_cases: int = 4, loop_iterations: int = 4,
+                     indirect_calls: int = 4) -> dict:
+    """Generates a synthetic assembly file and trace file.
+
+    A sample usage is:
+
+        summary = generate_program("synthetic.dump", "synthetic.trc", 100000)
+
+    Parameters
+    ----------
+    assembly_file : str
+        Name of the assembly file which is written in the format of objdump.
+    trace_file : str
+        Name of the trace file which is written in the format of gem5.
+    instructions : int
+        Approximate number of instructions in the assembly file.
+    trace_instructions : int or None
+        Approximate number of instructions in the trace file. The number of
+        instructions of one execution of every function if None.
+    function_size : int
+        Approximate number of instructions of a function.
+    call_depth : int
+        Number of functions in each call chain.
+    switch_cases : int
+        Number of cases of the switch of each function. No switch if 0.
+    loop_iterations : int
+        Number of iterations of the loop of each function.
+    indirect_calls : int
+        Every n-th call is an indirect call (jalr). No indirect calls if 0.
+
+    Returns
+    -------
+    dict
+        The "functions", "instructions", "trace_instructions" and "rounds"
+        (iterations of the loop of main) of the generated program.
+
+    Raises
+    ------
+    Exception
+        If a parameter is out of range.
+    """
+
+    if instructions < 1 or function_size < 1 or call_depth < 1:
+        raise Exception("The number of instructions, the function size and the "
+                        "call depth should be positive.")
+    if switch_cases < 0 or indirect_calls < 0:
+        raise Exception("The number of switch cases and indirect calls should "
+                        "not be negative.")
+    if not 1 <= loop_iterations < 2048:
+        raise Exception("The number of loop iterations should be between 1 "
+                        "and 2047.")
+
+    count = max(1, instructions // function_size)
+    functions: List[Tuple[str, List[Instruction]]] = []
+    calls = 0
+
+    for number in range(count):
+        callee = None
+        indirect = False
+        if (number + 1) % call_depth != 0 and number + 1 < count:
+            callee = "fn" + str(number + 1)
+            calls += 1
+            indirect = indirect_calls > 0 and calls % indirect_calls == 0
+        functions.append(("fn" + str(number),
+                          _function_body(number, callee, function_size,
+                                         switch_cases, loop_iterations, indirect)))
+
+    heads = ["fn" + str(number) for number in range(0, count, call_depth)]
+    main = _main_body(heads, indirect_calls)
+    start = [Instruction("li", "a0,0", 2, 0x4501),
+             Instruction("jal", "ra,{target}", 4, ("j", 1), CALL, "main"),
+             Instruction("ret", "", 2, 0x8082, RETURN)]
+    functions = [("_start", start)] + functions + [("main", main)]
+
+    program = _layout(functions)
+
+    # The loop of main is executed once to count the instructions of a round.
+    rounds = 1
+    executed = _execute(program, None)
+    if trace_instructions is not None:
+        rounds = max(1, round(trace_instructions / executed))
+    counter = main[3]
+    counter.value = rounds
+    counter.operands = "s0," + str(rounds)
+    counter.code = ((rounds & 0xfff) << 20) | (8 << 7) | 0x13
+    position = program["instructions"].index(counter)
+    program["values"][position] = rounds
+    program["texts"][position] = _trace_text(counter)
+
+    with open(assembly_file, 'w') as f:
+        _write_assembly(f, functions)
+    f.closed
+
+    with open(trace_file, 'w') as f:
+        executed = _execute(program, f)
+    f.closed
+
+    return {"functions": len(functions),
+            "instructions": len(program["instructions"]),
+            "trace_instructions": executed, "rounds": rounds}
+
+
+def _function_body(number: int, callee: Optional[str], function_size: int,
+                   switch_cases: int, loop_iterations: int,
+                   indirect: bool) -> List[Instruction]:
+    """Returns the instructions of a function of a call chain.
+
+    The function has a prologue, a loop with a conditional branch, a switch, a
+    call of the next function of the chain (if any) and an epilogue. The loop
+    and the cases are filled up to the function size with "addi" instructions.
+    """
+
+    body = [Instruction("addi", "sp,sp,-16", 2, 0x1141),
+            Instruction("sd", "ra,8(sp)", 2, 0xe406, memory = ("stack", 8)),
+            Instruction("li", "a5," + str(loop_iterations), 4,
+                        (loop_iterations << 20) | (15 << 7) | 0x13, SET,
+                        value = loop_iterations)]
+
+    # Prologue, loop, switch, call and epilogue without the filler.
+    fixed = (12 + (switch_cases + 2 if switch_cases else 0)
+             + (0 if callee is None else 3 if indirect else 1))
+    filler = function_size - fixed
+    case_filler = max(1, filler // (2 * max(switch_cases, 1)))
+    loop_filler = max(1, filler - switch_cases * case_filler)
+
+    head = Instruction("lw", "a4,0(a0)", 2, 0x4118, memory = ("data", 0))
+    skip = Instruction("addi", "a5,a5,-1", 2, 0x17fd)
+    body.append(head)
+    body.extend(Instruction("addi", "a4,a4,1", 2, 0x0705)
+                for _ in range(loop_filler))
+    body.append(Instruction("sw", "a4,0(a0)", 2, 0xc118, memory = ("data", 0)))
+    body.append(Instruction("beqz", "a4,{target}", 4, ("b", 14, 0, 0), IF, skip))
+    body.append(Instruction("addi", "a0,a0,4", 2, 0x0511))
+    body.append(skip)
+    body.append(Instruction("bnez", "a5,{target}", 4, ("b", 15, 0, 1), LOOP, head))
+
+    epilogue = [Instruction("ld", "ra,8(sp)", 2, 0x60a2, memory = ("stack", 8)),
+                Instruction("addi", "sp,sp,16", 2, 0x0141),
+                Instruction("ret", "", 2, 0x8082, RETURN)]
+
+    if callee is None:
+        join = epilogue[0]
+    elif indirect:
+        join = Instruction("lui", "a5,{target}", 4, ("lui", 15), target = callee)
+    else:
+        join = Instruction("jal", "ra,{target}", 4, ("j", 1), CALL, callee)
+
+    if switch_cases:
+        cases: List[Instruction] = []
+        body.append(Instruction("lui", "a5," + hex(number & 0xfffff), 4,
+                                ((number & 0xfffff) << 12) | (15 << 7) | 0x37))
+        body.append(Instruction("addi", "a5,a5,0", 4, (15 << 15) | (15 << 7) | 0x13))
+        body.append(Instruction("jr", "a5", 2, 0x8782, SWITCH, cases))
+
+        for case in range(switch_cases):
+            first = Instruction("addi", "a4,a4," + str(case + 1), 2,
+                                0x0701 | ((case + 1) << 2))
+            cases.append(first)
+            body.append(first)
+            body.extend(Instruction("addi", "a4,a4,1", 2, 0x0705)
+                        for _ in range(case_filler - 1))
+            if case != switch_cases - 1:
+                body.append(Instruction("j", "{target}", 4, ("j", 0), JUMP, join))
+
+    if callee is not None:
+        body.append(join)
+        if indirect:
+            body.append(Instruction("addi", "a5,a5,{target}", 4, ("addi", 15),
+                                    target = callee))
+            body.append(Instruction("jalr", "a5", 2, 0x9782, CALL, callee))
+
+    return body + epilogue
+
+
+def _main_body(heads: List[str], indirect_calls: int) -> List[Instruction]:
+    """Returns the instructions of main, which calls the call chains in a loop.
+
+    The number of iterations of the loop is set after the instructions of a
+    round are counted.
+    """
+
+    body = [Instruction("addi", "sp,sp,-16", 2, 0x1141),
+            Instruction("sd", "ra,8(sp)", 2, 0xe406, memory = ("stack", 8)),
+            Instruction("sd", "s0,0(sp)", 2, 0xe022, memory = ("stack", 0)),
+            Instruction("li", "s0,1", 4, (1 << 20) | (8 << 7) | 0x13, SET, value = 1)]
+
+    head: Optional[Instruction] = None
+
+    for number, name in enumerate(heads):
+        if indirect_calls and (number + 1) % indirect_calls == 0:
+            calls = [Instruction("lui", "a5,{target}", 4, ("lui", 15), target = name),
+                     Instruction("addi", "a5,a5,{target}", 4, ("addi", 15),
+                                 target = name),
+                     Instruction("jalr", "a5", 2, 0x9782, CALL, name)]
+        else:
+            calls = [Instruction("jal", "ra,{target}", 4, ("j", 1), CALL, name)]
+
+        if head is None:
+            head = calls[0]
+        body.extend(calls)
+
+    body.append(Instruction("addi", "s0,s0,-1", 2, 0x147d))
+    body.append(Instruction("bnez", "s0,{target}", 4, ("b", 8, 0, 1), LOOP,
+                            head or body[-1]))
+    body.extend([Instruction("ld", "s0,0(sp)", 2, 0x6402, memory = ("stack", 0)),
+                 Instruction("ld", "ra,8(sp)", 2, 0x60a2, memory = ("stack", 8)),
+                 Instruction("addi", "sp,sp,16", 2, 0x0141),
+                 Instruction("ret", "", 2, 0x8082, RETURN)])
+
+    return body
+
+
+def _layout(functions: List[Tuple[str, List[Instruction]]]) -> dict:
+    """Assigns the addresses of the instructions and resolves their targets.
+
+    Returns
+    -------
+    dict
+        The columns of the program for the interpreter: "actions", "targets",
+        "values", "memory", "texts", the index of `_start` and the number of
+        instructions.
+    """
+
+    address = TEXT_START
+    starts: Dict[str, Instruction] = {}
+
+    for name, body in functions:
+        starts[name] = body[0]
+        for instruction in body:
+            instruction.address = address
+            address += instruction.size
+
+    instructions = [instruction for _, body in functions for instruction in body]
+    indexes = {id(instruction): index for index, instruction in enumerate(instructions)}
+
+    actions: List[int] = []
+    targets: list = []
+    values: List[int] = []
+    memory: list = []
+    texts: List[str] = []
+
+    for instruction in instructions:
+        target = instruction.target
+        if isinstance(target, str):
+            target = starts[target]
+
+        if isinstance(target, list):
+            targets.append([indexes[id(case)] for case in target])
+        elif target is not None:
+            targets.append(indexes[id(target)])
+            if isinstance(instruction.code, tuple):
+                _encode(instruction, target.address)
+        else:
+            targets.append(None)
+
+        actions.append(instruction.action)
+        values.append(instruction.value)
+        memory.append(instruction.memory)
+        texts.append(_trace_text(instruction))
+
+    return {"actions": actions, "targets": targets, "values": values,
+            "memory": memory, "texts": texts, "instructions": instructions,
+            "start": indexes[id(starts["_start"])]}
+
+
+def _encode(instruction: Instruction, target: int) -> None:
+    """Sets the machine code and the operands which depend on the target."""
+
+    kind = instruction.code
+    offset = target - instruction.address
+    upper = (target + 0x800) >> 12
+    lower = target - (upper << 12)
+
+    if kind[0] == "b":
+        # B-type: imm[12|10:5] rs2 rs1 funct3 imm[4:1|11] opcode
+        immediate = offset & 0x1fff
+        code = ((((immediate >> 12) & 1) << 31) | (((immediate >> 5) & 0x3f) << 25)
+                | (kind[2] << 20) | (kind[1] << 15) | (kind[3] << 12)
+                | (((immediate >> 1) & 0xf) << 8) | (((immediate >> 11) & 1) << 7)
+                | 0x63)
+        value = format(target, 'x')
+    elif kind[0] == "j":
+        # J-type: imm[20|10:1|11|19:12] rd opcode
+        immediate = offset & 0x1fffff
+        code = ((((immediate >> 20) & 1) << 31) | (((immediate >> 1) & 0x3ff) << 21)
+                | (((immediate >> 11) & 1) << 20) | (((immediate >> 12) & 0xff) << 12)
+                | (kind[1] << 7) | 0x6f)
+        value = format(target, 'x')
+    elif kind[0] == "lui":
+        code = ((upper & 0xfffff) << 12) | (kind[1] << 7) | 0x37
+        value = hex(upper & 0xfffff)
+    else:
+        code = ((lower & 0xfff) << 20) | (kind[1] << 15) | (kind[1] << 7) | 0x13
+        value = str(lower)
+
+    instruction.code = code
+    instruction.operands = instruction.operands.format(target = value)
+
+
+def _trace_text(instruction: Instruction) -> str:
+    """Returns the disassembly of an instruction in the trace format.
+
+    The compressed instructions have the "c_" prefix, and the operands are
+    separated by ", ", like "c_addi sp, sp, -16".
+    """
+
+    prefix = "c_" if instruction.size == 2 else ""
+    return (prefix + instruction.mnemonic + " "
+            + instruction.operands.replace(",", ", ")).rstrip()
+
+
+def _write_assembly(f, functions: List[Tuple[str, List[Instruction]]]) -> None:
+    """Writes the functions in the format of objdump."""
+
+    f.write("\nsynthetic:     file format elf64-littleriscv\n\n\n"
+            "Disassembly of section .text:\n")
+
+    for name, body in functions:
+        start = body[0].address
+        f.write(f"\n{start:016x} <{name}>:\n")
+
+        for instruction in body:
+            code = format(instruction.code, '0' + str(instruction.size * 2) + 'x')
+            line = (f"{instruction.address:8x}:\t{code:<{20 if instruction.size == 2 else 18}}"
+                    f"\t{instruction.mnemonic}")
+            if instruction.operands:
+                line += "\t" + instruction.operands
+
+            target = instruction.target
+            if isinstance(target, Instruction) and instruction.mnemonic != "lui":
+                offset = target.address - start
+                line += f" <{name}+0x{offset:x}>" if offset else f" <{name}>"
+            elif isinstance(target, str) and instruction.mnemonic == "jal":
+                line += f" <{target}>"
+
+            f.write(line + "\n")
+
+
+def _execute(program: dict, f) -> int:
+    """Executes the program and writes its trace.
+
+    Parameters
+    ----------
+    program : dict
+        Columns of the program, see `_layout`.
+    f : file or None
+        The trace file. The instructions are only counted if None.
+
+    Returns
+    -------
+    int
+        Number of executed instructions.
+    """
+
+    actions = program["actions"]
+    targets = program["targets"]
+    values = program["values"]
+    memory = program["memory"]
+    instructions = program["instructions"]
+
+    # The constant part of the trace line of each instruction. The loads and
+    # stores get their addresses when they are executed.
+    prefixes: List[str] = []
+    for instruction, text, access in zip(instructions, program["texts"], memory):
+        if access is not None:
+            data = " D=0x0000000000000000 A=0x"
+        elif instruction.action == CALL:
+            data = f" D=0x{instruction.address + instruction.size:016x}\n"
+        elif instruction.action in (NEXT, SET):
+            data = " D=0x0000000000000000\n"
+        else:
+            data = "\n"
+        op_class = ("IntAlu" if access is None
+                    else "MemRead" if instruction.mnemonic in ("ld", "lw") else "MemWrite")
+        prefixes.append(f": system.cpu T0 : 0x{instruction.address:<9x}: "
+                        f"{text:<26} : {op_class} : {data}")
+
+    switches: Dict[int, int] = {}
+    stack: List[Tuple[int, int, int]] = []
+    index = program["start"]
+    counter = 0
+    function = 0
+    functions = 0
+    tick = 0
+    executed = 0
+    lines: List[str] = []
+
+    while True:
+        action = actions[index]
+        executed += 1
+
+        if f is not None:
+            access = memory[index]
+            if access is None:
+                lines.append(f"{tick:7d}{prefixes[index]}")
+            elif access[0] == "stack":
+                address = STACK_TOP - FRAME_SIZE * len(stack) + access[1]
+                lines.append(f"{tick:7d}{prefixes[index]}{address:x}\n")
+            else:
+                address = DATA_START + (function * 64 + counter * 4) % DATA_SIZE
+                lines.append(f"{tick:7d}{prefixes[index]}{address:x}\n")
+            if len(lines) == WRITE_BATCH:
+                f.writelines(lines)
+                del lines[:]
+            tick += TICKS_PER_INSTRUCTION
+
+        if action == NEXT:
+            index += 1
+        elif action == SET:
+            counter = values[index]
+            index += 1
+        elif action == LOOP:
+            counter -= 1
+            index = targets[index] if counter > 0 else index + 1
+        elif action == IF:
+            index = targets[index] if counter % 2 == 0 else index + 1
+        elif action == SWITCH:
+            cases = targets[index]
+            taken = switches.get(index, 0)
+            switches[index] = taken + 1
+            index = cases[taken % len(cases)]
+        elif action == JUMP:
+            index = targets[index]
+        elif action == CALL:
+            stack.append((index + 1, counter, function))
+            functions += 1
+            function = functions
+            index = targets[index]
+        else:
+            if not stack:
+                break
+            index, counter, function = stack.pop()
+
+    if f is not None and lines:
+        f.writelines(lines)
+
+    return executed
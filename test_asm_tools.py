@@ -5,6 +5,10 @@ This program tests the following functions of asm_tools.py
 get_function_name
 get_function_start
 get_function_end
+AssemblyIndex.function_at_address
+AssemblyIndex.from_file
+InstructionTable
+the cached assembly index
 
 """
 
@@ -12,6 +16,11 @@ get_function_end
 # This file tests asm_tools.py
 import asm_tools
 
+# The assembly index is kept in the cache
+import cache_tools
+import pickle
+import tempfile
+
 
 def main(file_name: str):
     """Main function of this test program.
@@ -52,6 +61,61 @@ def main(file_name: str):
     print(f"Function \"calc\". Expected end point of function: 112. "
           f"Found end point of function: {fn_end_point}.")    
 
+    # Test the function symbol table of the assembly index
+    index = asm_tools.AssemblyIndex(assembly_code)
+    symbol = index.function_at_address("101a0")
+    print(f"Address \"101a0\". Expected function: calc, start: 97, end: 112. "
+          f"Found function: {symbol.name}, start: {symbol.start_line}, "
+          f"end: {symbol.end_line}.")
+
+    # Test the instruction table. The first instruction and a beqz, c.jalr,
+    # jalr and ret instruction of the program are checked.
+    table = index.instructions
+    print(f"Expected number of instructions: 386. "
+          f"Found number of instructions: {len(table)}.")
+    print(f"Expected first row: 0x100b0, line 7, code 0x2197, size 4, auipc, "
+          f"('gp', '0x2'). Found first row: {hex(table.addresses[0])}, "
+          f"line {table.lines[0]}, code {hex(table.codes[0])}, "
+          f"size {table.sizes[0]}, {table.mnemonic(0)}, {table.operands[0]}.")
+    print(f"Expected target of the beqz at line 35: 0x1010a. "
+          f"Found target: {hex(table.targets[table.index_of_line(35)])}.")
+    calls = [table.is_call(table.index_of_line(line)) for line in (71, 161, 25)]
+    returns = [table.is_return(table.index_of_line(line)) for line in (71, 161, 25)]
+    print(f"Expected calls and returns of the jalr, c.jalr and ret "
+          f"instructions: [True, True, False], [False, False, True]. "
+          f"Found: {calls}, {returns}.")
+    print(f"Expected same function ids of the instructions of calc: True. "
+          f"Found: {len(set(table.function_ids[table.index_of_line(97):table.index_of_line(113)])) == 1}.")
+    print(f"Expected index and line of the first instruction at or after line "
+          f"26: 17, 28. Found: {table.index_of_line(26)}, "
+          f"{table.lines[table.index_of_line(26)]}.")
+
+    # Test from_file, which does not keep the lines of the assembly code
+    streamed = asm_tools.AssemblyIndex.from_file(file_name)
+    same = all(getattr(streamed.instructions, column) == getattr(table, column)
+               for column in asm_tools.InstructionTable.__slots__)
+    print(f"Expected same instruction table of from_file: True. Found: {same}.")
+    print(f"Expected lines of from_file: None. "
+          f"Found: {streamed.assembly_code}.")
+
+    # Test the assembly index in the cache. The key depends on the version of
+    # the format of the entries, so the indexes of older versions are not used.
+    with tempfile.TemporaryDirectory() as directory:
+        cache = cache_tools.Cache(directory, secret = b"test secret")
+        key = cache.key("assembly", cache.file_digest(file_name))
+        cache.put(key, streamed)
+        cached = cache.get(key)
+        same = all(getattr(cached.instructions, column) == getattr(table, column)
+                   for column in asm_tools.InstructionTable.__slots__)
+        print(f"Expected same instruction table from the cache: True. "
+              f"Found: {same}.")
+        print(f"Expected version in the key: {cache_tools.CACHE_VERSION}. "
+              f"Found key: {key.split(':')[1]}.")
+        cache.close()
+
+    print(f"Expected same table after pickling: True. "
+          f"Found: {pickle.loads(pickle.dumps(table)).lines == table.lines}.")
+
     # Test error string of get_function_name
     fn_name = asm_tools.get_function_name("200000", assembly_code)
     print(f"Function should not be found on address \"200000\".")
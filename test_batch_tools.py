@@ -0,0 +1,144 @@
+""" Test the functionality of batch_tools.py
+
+This program tests the following functions of batch_tools.py
+
+read_manifest
+output_directories
+run_batch
+
+"""
+
+
+# This file tests batch_tools.py
+import batch_tools
+
+# The functions of the programs are detected in parallel
+import yelkovan
+
+# Directories and files of the programs
+import json
+import shutil
+import os
+import tempfile
+from os import makedirs, path
+
+
+def main(programs: list):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    programs : list of str
+        The names of the programs to be tested, like "test_data/loop_test".
+        Each program is copied to a directory of the batch as "prog".
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = []
+        for number, program in enumerate(programs):
+            name = "program_" + str(number)
+            makedirs(path.join(directory, name))
+            shutil.copy(program + ".dump", path.join(directory, name, "prog.dump"))
+            shutil.copy(program + ".trc", path.join(directory, name, "prog.trc"))
+            names.append(name)
+
+        # A program without an assembly file fails.
+        makedirs(path.join(directory, "empty"))
+
+        manifest_file = path.join(directory, "manifest.txt")
+        with open(manifest_file, 'w') as f:
+            f.write("# Programs of the batch\n\n")
+            for name in names + ["empty"]:
+                f.write(name + "\n")
+        f.closed
+
+
+        # Test read_manifest
+        directories = batch_tools.read_manifest(manifest_file)
+        print(f"Expected directories: {names + ['empty']}. "
+              f"Found directories: {[path.basename(d) for d in directories]}.")
+
+        # Test output_directories
+        output_dir = path.join(directory, "out")
+        output_dirs = batch_tools.output_directories(directories, output_dir)
+        print(f"Expected output directories: {names + ['empty']}. "
+              f"Found output directories: "
+              f"{[path.relpath(d, output_dir) for d in output_dirs]}.")
+
+        try:
+            batch_tools.output_directories(directories + directories[:1], output_dir)
+            print("Expected an error for a directory which is given twice. "
+                  "Found no error.")
+        except Exception as exception:
+            print(f"Expected an error for a directory which is given twice. "
+                  f"Found error: {exception}")
+
+        # Test run_batch with the programs whose assembly files have the same
+        # name.
+        summary = batch_tools.run_batch(directories, 2, output_dir = output_dir)
+        print(f"Expected succeeded and failed programs: {len(programs)}, 1. "
+              f"Found: {summary['succeeded']}, {summary['failed']}.")
+
+        records = summary["results"]
+        outputs = [record.get("output") for record in records[:len(programs)]]
+        print(f"Expected different output files: True. "
+              f"Found: {len(set(outputs)) == len(outputs)}.")
+        print(f"Expected output files which exist: {len(programs)}. "
+              f"Found: {sum(path.isfile(output) for output in outputs)}.")
+        print(f"Expected blocks of the programs: [6, 7]. "
+              f"Found blocks: {[record.get('blocks') for record in records[:2]]}.")
+        print(f"Expected status of the program without an assembly file: "
+              f"failed. Found: {records[-1]['status']}.")
+
+        with open(path.join(output_dir, batch_tools.SUMMARY_FILE)) as f:
+            saved = json.load(f)
+        f.closed
+        print(f"Expected programs in the summary file: {len(programs) + 1}. "
+              f"Found: {saved['programs']}.")
+
+        # Test run_batch with worker processes of each program. The workers of
+        # the batch are not daemon processes, so they can start their own
+        # worker processes.
+        minimum = yelkovan.MIN_PARALLEL_FUNCTIONS
+        yelkovan.MIN_PARALLEL_FUNCTIONS = 1
+        summary = batch_tools.run_batch(directories[:len(programs)], 1,
+                                        output_dir = output_dir,
+                                        program_jobs = 2)
+        yelkovan.MIN_PARALLEL_FUNCTIONS = minimum
+        print(f"Expected succeeded programs with 2 jobs per program: "
+              f"{len(programs)}. Found: {summary['succeeded']}.")
+        print(f"Expected blocks of the programs: [6, 7]. Found blocks: "
+              f"{[record.get('blocks') for record in summary['results']]}.")
+
+        # Test the time limit with a program whose trace file is a named pipe
+        # without a writer, so reading it never finishes.
+        if hasattr(os, "mkfifo"):
+            blocked = path.join(directory, "blocked")
+            makedirs(blocked)
+            shutil.copy(programs[0] + ".dump", path.join(blocked, "prog.dump"))
+            os.mkfifo(path.join(blocked, "prog.trc"))
+
+            summary = batch_tools.run_batch([blocked] + directories[:1], 1,
+                                            timeout = 2.0,
+                                            output_dir = output_dir)
+            print(f"Expected status of the blocked program and the next "
+                  f"program: timeout, ok. "
+                  f"Found: {summary['results'][0]['status']}, "
+                  f"{summary['results'][1]['status']}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests batch_tools with the loop_test and decision_test
+    programs.
+    """
+
+    programs: list = ["test_data/loop_test", "test_data/decision_test"]
+
+    print(f"The programs to be tested are: {programs}")
+
+    main(programs)
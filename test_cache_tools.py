@@ -0,0 +1,135 @@
+""" Test the functionality of cache_tools.py
+
+This program tests the following functions of cache_tools.py
+
+Cache.key
+Cache.file_digest
+Cache.get
+Cache.put
+Cache.get_many
+Cache.put_many
+Cache.size
+Cache.evict
+
+"""
+
+
+# This file tests cache_tools.py
+import cache_tools
+
+# Entries which are written without the secret key
+import pickle
+import sqlite3
+
+# Directory of the cache
+import tempfile
+import time
+from os import path
+
+
+def main(file_name: str):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    file_name : str
+        The name of a file whose content hash is tested.
+    """
+
+    secret = b"test secret"
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = cache_tools.Cache(directory, secret = secret)
+
+        # Test put and get
+        key = cache.key("test", "a")
+        print(f"Expected value of a missing entry: None. "
+              f"Found: {cache.get(key)}.")
+        cache.put(key, {"value": [1, 2, 3]})
+        print(f"Expected value of an entry: {{'value': [1, 2, 3]}}. "
+              f"Found: {cache.get(key)}.")
+
+        # Test the key of another version of the format of the entries
+        version = cache_tools.CACHE_VERSION
+        cache_tools.CACHE_VERSION = version - 1
+        old_key = cache.key("test", "a")
+        cache_tools.CACHE_VERSION = version
+        print(f"Expected different key of another version: True. "
+              f"Found: {old_key != key}.")
+        print(f"Expected value of another version: None. "
+              f"Found: {cache.get(old_key)}.")
+
+        # Test get_many and put_many
+        cache.put_many({cache.key("test", "b"): "b", cache.key("test", "c"): "c"})
+        values = cache.get_many([cache.key("test", name) for name in "bcd"])
+        print(f"Expected values of get_many: ['b', 'c']. "
+              f"Found: {sorted(values.values())}.")
+
+        # Test file_digest
+        digest = cache.file_digest(file_name)
+        print(f"Expected same content hash of the file: True. "
+              f"Found: {digest == cache.file_digest(file_name)}.")
+
+        # Test the entries which are not written with the secret key. The
+        # entry of another key and an entry which is written to the database
+        # directly are not unpickled.
+        other = cache_tools.Cache(directory, secret = b"other secret")
+        print(f"Expected value with another secret key: None. "
+              f"Found: {other.get(key)}.")
+        other.close()
+
+        connection = sqlite3.connect(path.join(directory, cache_tools.DATABASE_FILE))
+        data = pickle.dumps("forged")
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                               (cache.key("test", "e"), len(data), time.time(), data))
+        connection.close()
+        print(f"Expected value of a forged entry: None. "
+              f"Found: {cache.get(cache.key('test', 'e'))}.")
+
+        # Test the running total size of the entries, after an entry is
+        # replaced by a larger value
+        cache.put(key, list(range(100)))
+        rows = cache._connection.execute("SELECT SUM(size) FROM entries").fetchone()
+        print(f"Expected total size of the entries: {rows[0]}. "
+              f"Found: {cache.size()}.")
+        cache.close()
+
+    # Test the eviction of the least recently used entries
+    with tempfile.TemporaryDirectory() as directory:
+        cache = cache_tools.Cache(directory, secret = secret)
+        value = bytes(1000)
+        cache.put("first", value)
+        entry_size = cache.size()
+        cache.max_size = 2 * entry_size + entry_size // 2
+
+        time.sleep(0.01)
+        cache.put("second", value)
+        time.sleep(0.01)
+        cache.get("first")
+        time.sleep(0.01)
+        cache.put("third", value)
+
+        present = [key for key in ["first", "second", "third"]
+                   if cache.get(key) is not None]
+        print(f"Expected entries after the eviction: ['first', 'third']. "
+              f"Found: {present}.")
+        print(f"Expected total size after the eviction: {2 * entry_size}. "
+              f"Found: {cache.size()}.")
+        cache.close()
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests cache_tools with the loop_test.dump file.
+    """
+
+    file_name: str = "test_data/loop_test.dump"
+
+    print(f"The name of the file to be tested is: {file_name}")
+
+    main(file_name)
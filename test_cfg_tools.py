@@ -0,0 +1,118 @@
+""" Test the functionality of cfg_tools.py
+
+This program tests the following functions of cfg_tools.py
+
+CompactCFG.from_blocks (including a graph deeper than the recursion limit)
+CompactCFG.successors
+CompactCFG.predecessors
+CompactCFG.block_at_address
+CompactCFG.to_networkx
+CompactCFG.from_edges
+
+and the dynamic control flow graph of yelkovan.py.
+
+"""
+
+
+# This file tests cfg_tools.py
+import cfg_tools
+
+# The basic blocks of the test program are detected by Yelkovan
+import yelkovan
+
+# Depth of the deep graph
+import sys
+
+
+def main(assembly_file: str, trace_file: str):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    assembly_file : str
+        The name of the assembly file to be tested.
+    trace_file : str
+        The name of the trace file to be tested.
+    """
+
+    analyzer = yelkovan.Analyzer.from_files(assembly_file, [trace_file])
+    result = analyzer.analyse()
+    graph: cfg_tools.CompactCFG = result.graph
+
+
+    # Test from_blocks
+    print(f"Expected nodes: [115, 97, 122, 132, 136, 126]. "
+          f"Found nodes: {list(graph.nodes())}.")
+    print(f"Expected number of edges: 6. "
+          f"Found number of edges: {graph.number_of_edges()}.")
+
+    # Test from_blocks with a chain of basic blocks which is deeper than the
+    # recursion limit. Each block falls through to the next one and branches
+    # back to the first one.
+    depth = 2 * sys.getrecursionlimit()
+    start_list = [2 * block for block in range(depth)]
+    end_list = [[2 * block + 1, 2 * block + 2, 0] for block in range(depth - 1)]
+    end_list.append([2 * depth - 1])
+    deep = cfg_tools.CompactCFG.from_blocks(
+        start_list, end_list,
+        {start: index for index, start in enumerate(start_list)}, 0)
+    print(f"Expected nodes and edges of the deep graph: {depth}, "
+          f"{2 * depth - 2}. Found: {deep.number_of_nodes()}, "
+          f"{deep.number_of_edges()}.")
+    print(f"Expected depth first order of the deep graph: True. "
+          f"Found: {list(deep.nodes()) == start_list}.")
+
+    # Test successors and predecessors
+    print(f"Expected successors of 132: [136, 126]. "
+          f"Found successors: {list(graph.successors(132))}.")
+    print(f"Expected predecessors of 132: [122, 126]. "
+          f"Found predecessors: {list(graph.predecessors(132))}.")
+
+    # Test block_at_address
+    print(f"Expected block at 0x101e8: 126. "
+          f"Found block: {graph.block_at_address(0x101e8)}.")
+    print(f"Expected block at 0x10000: None. "
+          f"Found block: {graph.block_at_address(0x10000)}.")
+
+    # Test to_networkx
+    cfg = graph.to_networkx()
+    same = (list(cfg.nodes(data = True)) == list(graph.nodes(data = True))
+            and list(cfg.edges()) == list(graph.edges()))
+    print(f"Expected same nodes and edges in the networkx graph: True. "
+          f"Found: {same}.")
+
+    # Test from_edges with the executed basic blocks of the trace file
+    dynamic = yelkovan.DynamicAnalyzer.from_files(assembly_file,
+                                                  [trace_file]).analyse()
+    print(f"Expected number of nodes and edges of the dynamic graph: 63, 68. "
+          f"Found: {dynamic.graph.number_of_nodes()}, "
+          f"{dynamic.graph.number_of_edges()}.")
+    print(f"Expected successors of 132 and 136: [136, 126], [22]. "
+          f"Found successors: {list(dynamic.graph.successors(132))}, "
+          f"{list(dynamic.graph.successors(136))}.")
+
+    # The basic blocks of main are executed, so they are the same basic blocks
+    # in the dynamic graph.
+    ends = dict(zip(dynamic.start_list, dynamic.end_list))
+    same = all(ends.get(start, [None])[0] == end[0]
+               for start, end in zip(result.start_list, result.end_list))
+    print(f"Expected same basic blocks of main in the dynamic graph: True. "
+          f"Found: {same}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests cfg_tools with the loop_test.dump and loop_test.trc
+    files.
+    """
+
+    assembly_file: str = "test_data/loop_test.dump"
+    trace_file: str = "test_data/loop_test.trc"
+
+    print(f"The names of the files to be tested are: {assembly_file}, {trace_file}")
+
+    main(assembly_file, trace_file)
@@ -0,0 +1,93 @@
+""" Test the functionality of incremental_tools.py
+
+This program tests the following functions of incremental_tools.py
+
+FunctionHistory.prepare
+FunctionHistory.replay
+FunctionHistory.record
+FunctionHistory.save
+
+with the incremental analysis of yelkovan.py. The loop_test program is
+analysed, then it is replaced by the decision_test program as if it was
+recompiled. The calc function is the same in both programs.
+
+"""
+
+
+# This file tests incremental_tools.py
+import incremental_tools
+
+# The history is kept in the cache
+import cache_tools
+
+# The test programs are analysed by Yelkovan
+import yelkovan
+
+# Files of the recompiled program
+import shutil
+import tempfile
+from os import path
+
+
+def main(programs: list, expected: list):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    programs : list of str
+        The names of the programs which are analysed in turn, like
+        "test_data/loop_test".
+    expected : list of tuple
+        The expected numbers of the reused and processed functions of each
+        analysis.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = cache_tools.Cache(path.join(directory, "cache"))
+        assembly_file = path.join(directory, "program.dump")
+        trace_file = path.join(directory, "program.trc")
+
+        for program, (reused, detected) in zip(programs, expected):
+            shutil.copy(program + ".dump", assembly_file)
+            shutil.copy(program + ".trc", trace_file)
+
+            analysis = yelkovan.Analyzer.from_files(assembly_file,
+                                                    [trace_file]).analyse()
+
+            analyzer = yelkovan.Analyzer.from_files(assembly_file, [trace_file],
+                                                    cache = cache,
+                                                    incremental = True)
+            result = analyzer.analyse()
+
+            same = (result.start_list == analysis.start_list
+                    and result.end_list == analysis.end_list
+                    and list(result.graph.edges()) == list(analysis.graph.edges()))
+            print(f"Expected same basic blocks with the history of {program}: "
+                  f"True. Found: {same}.")
+            print(f"Expected reused and processed functions: {reused}, "
+                  f"{detected}. Found: {analyzer.history.reused}, "
+                  f"{analyzer.history.detected}.")
+
+        # Test the history which is saved by the last analysis
+        history = incremental_tools.FunctionHistory(cache, assembly_file)
+        print(f"Expected functions in the history: ['calc', 'main']. "
+              f"Found: {sorted(name for name, _ in history.previous)}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests incremental_tools with the loop_test and
+    decision_test programs.
+    """
+
+    programs: list = ["test_data/loop_test", "test_data/decision_test",
+                      "test_data/decision_test", "test_data/loop_test"]
+    expected: list = [(0, 2), (1, 1), (2, 0), (1, 1)]
+
+    print(f"The programs to be tested are: {programs}")
+
+    main(programs, expected)
@@ -0,0 +1,198 @@
+""" Test the functionality of profile_tools.py
+
+This program tests the following functions of profile_tools.py
+
+BlockProfile (block counts, edge counts and branch counts)
+bin_addresses
+TimeProfile
+TimeProfile.stacks
+TimeProfile (parts of a trace file)
+MemoryProfile
+CacheLineCounter
+collect_profiles
+access_size
+
+"""
+
+
+# This file tests profile_tools.py
+import profile_tools
+
+# The control flow graph of the test program is created by Yelkovan
+import yelkovan
+
+# The trace file is divided into small parts
+import trace_tools
+
+# Program counters of the binning test
+from array import array
+
+# Size of the cache line counters which are sent by the worker processes
+import pickle
+
+
+def main(assembly_file: str, trace_file: str):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    assembly_file : str
+        The name of the assembly file to be tested.
+    trace_file : str
+        The name of the trace file to be tested.
+    """
+
+    analyzer = yelkovan.Analyzer.from_files(assembly_file, [trace_file])
+    result = analyzer.analyse()
+    graph = result.graph
+
+
+    # Test BlockProfile
+    profile = profile_tools.BlockProfile(graph, [trace_file], 1,
+                                         analyzer.assembly_code)
+    print(f"Expected block counts: [1, 1, 1, 6, 1, 5]. "
+          f"Found block counts: {profile.counts}.")
+    print(f"Expected instructions: [7, 16, 4, 24, 6, 30]. "
+          f"Found instructions: {profile.instructions}.")
+    print(f"Expected total and unmapped instructions: 342, 255. "
+          f"Found: {profile.total}, {profile.unmapped}.")
+    print(f"Expected edge counts: [1, 1, 1, 1, 5, 5]. "
+          f"Found edge counts: {profile.edge_counts}.")
+    print(f"Expected taken and fall through branches of 132: 5, 1. "
+          f"Found: {profile.taken[3]}, {profile.fall_through[3]}.")
+
+    # Test bin_addresses with and without numpy
+    starts, ends, _ = graph.block_ranges()
+    addresses = array('Q', range(0x10190, 0x10210, 2))
+    binned = profile_tools.bin_addresses(addresses, starts, ends, 0x101fe)
+
+    numpy = profile_tools.numpy
+    profile_tools.numpy = None
+    same = binned == profile_tools.bin_addresses(addresses, starts, ends, 0x101fe)
+    profile_tools.numpy = numpy
+
+    print(f"Expected same bins with and without numpy: True. Found: {same}.")
+
+    # Test TimeProfile
+    time_profile = profile_tools.TimeProfile(graph, analyzer.assembly_code,
+                                             [trace_file])
+    functions = {row["function"]: row for row in time_profile.function_table()}
+    print(f"Expected total ticks: 204000. "
+          f"Found total ticks: {time_profile.total_ticks}.")
+    print(f"Expected ticks and inclusive ticks of block 115: 3500, 12000. "
+          f"Found: {time_profile.ticks[0]}, {time_profile.inclusive_ticks[0]}.")
+    print(f"Expected ticks and inclusive ticks of main: 45000, 53500. "
+          f"Found: {functions['main']['ticks']}, "
+          f"{functions['main']['inclusive_ticks']}.")
+
+    # Test the call stacks of TimeProfile
+    print(f"Expected ticks of stack \"_start;main;calc\": 8500. "
+          f"Found: {time_profile.stacks.get('_start;main;calc')}.")
+    print(f"Expected sum of ticks of stacks: 204000. "
+          f"Found: {sum(time_profile.stacks.values())}.")
+
+    # Test TimeProfile with the parts of the trace file. The call stack of the
+    # first part is continued with the calls and returns of the other parts.
+    min_part_size = trace_tools.MIN_PART_SIZE
+    trace_tools.MIN_PART_SIZE = 1
+
+    attributes = ["ticks", "inclusive_ticks", "function_ticks",
+                  "function_inclusive_ticks", "calls", "stacks",
+                  "unmapped_ticks", "total_ticks"]
+    for jobs in [3, 16]:
+        part_profile = profile_tools.TimeProfile(graph, analyzer.assembly_code,
+                                                 [trace_file], jobs)
+        same = all(getattr(part_profile, attribute) == getattr(time_profile, attribute)
+                   for attribute in attributes)
+        print(f"Expected same times with {jobs} parts: True. Found: {same}.")
+
+    trace_tools.MIN_PART_SIZE = min_part_size
+
+    # Test MemoryProfile
+    memory_profile = profile_tools.MemoryProfile(graph, analyzer.assembly_code,
+                                                 [trace_file])
+    functions = {row["function"]: row for row in memory_profile.function_table()}
+    print(f"Expected loads: [0, 3, 0, 6, 2, 10]. "
+          f"Found loads: {memory_profile.loads}.")
+    print(f"Expected stores: [2, 3, 2, 0, 0, 10]. "
+          f"Found stores: {memory_profile.stores}.")
+    print(f"Expected loaded and stored bytes of block 126: 40, 40. "
+          f"Found: {memory_profile.load_bytes[5]}, {memory_profile.store_bytes[5]}.")
+    print(f"Expected cache lines: [1, 2, 1, 1, 1, 1]. "
+          f"Found cache lines: {memory_profile.cache_lines}.")
+    print(f"Expected loads, stores and cache lines of main: 18, 14, 1. "
+          f"Found: {functions['main']['loads']}, {functions['main']['stores']}, "
+          f"{functions['main']['cache_lines']}.")
+    memory_profile.annotate(graph)
+    print(f"Expected estimated cache lines of block 126 and main: False, False. "
+          f"Found: {graph.node_attributes(5)['cache_lines_estimated']}, "
+          f"{functions['main']['cache_lines_estimated']}.")
+    print(f"Expected sum of accesses of functions: 117. "
+          f"Found: {sum(row['loads'] + row['stores'] for row in functions.values())}.")
+
+    # Test CacheLineCounter. The small numbers are exact, the large numbers are
+    # estimates, and the counters of two parts are merged.
+    exact = profile_tools.EXACT_CACHE_LINES
+    counter = profile_tools.CacheLineCounter()
+    counter.add(100, 100 + exact - 1)
+    counter.add(100, 110)
+    print(f"Expected exact cache lines: {exact}. Found: {len(counter)}.")
+    print(f"Expected estimate of the exact counter: False. "
+          f"Found: {counter.is_estimate()}.")
+
+    counter = profile_tools.CacheLineCounter()
+    counter.add(0, 9999)
+    first, second = profile_tools.CacheLineCounter(), profile_tools.CacheLineCounter()
+    first.add(0, 5999)
+    second.add(20, 30)
+    second.add(4000, 9999)
+    first.update(second)
+    print(f"Expected estimate of 10000 cache lines within 5%: True. "
+          f"Found: {abs(len(counter) - 10000) <= 500}.")
+    print(f"Expected estimate of the counter of 10000 cache lines: True. "
+          f"Found: {counter.is_estimate()}.")
+    print(f"Expected same estimate of the merged counters: {len(counter)}. "
+          f"Found: {len(first)}.")
+    print(f"Expected bounded size of a counter: True. "
+          f"Found: {len(pickle.dumps(counter)) < 2 << profile_tools.SKETCH_BITS}.")
+
+    # Test collect_profiles. The trace file is read once for all of the
+    # profiles, and the profiles are the same as the profiles which are
+    # created one by one.
+    read_lines = trace_tools.read_lines
+    reads = []
+    trace_tools.read_lines = lambda *arguments, **options: (
+        reads.append(arguments[0]) or read_lines(*arguments, **options))
+    profiles = profile_tools.collect_profiles(graph, analyzer.assembly_code,
+                                              [trace_file], 1,
+                                              ["counts", "time", "memory"])
+    trace_tools.read_lines = read_lines
+
+    print(f"Expected reads of the trace file: 1. Found: {len(reads)}.")
+    same = (vars(profiles["counts"]) == vars(profile)
+            and vars(profiles["time"]) == vars(time_profile)
+            and vars(profiles["memory"]) == vars(memory_profile))
+    print(f"Expected same profiles from one pass: True. Found: {same}.")
+
+    # Test access_size
+    sizes = [profile_tools.access_size(mnemonic)
+             for mnemonic in ["lbu", "c_lwsp", "c_sdsp", "fld", "amoadd_w", "add"]]
+    print(f"Expected access sizes: [1, 4, 8, 8, 4, 0]. Found: {sizes}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests profile_tools with the loop_test.dump and
+    loop_test.trc files.
+    """
+
+    assembly_file: str = "test_data/loop_test.dump"
+    trace_file: str = "test_data/loop_test.trc"
+
+    print(f"The names of the files to be tested are: {assembly_file}, {trace_file}")
+
+    main(assembly_file, trace_file)
@@ -0,0 +1,163 @@
+""" Test the functionality of summary_tools.py
+
+This program tests the following functions of summary_tools.py
+
+FunctionSummaries.prefetch_program
+FunctionSummaries.prefetch
+FunctionSummaries.summary
+FunctionSummaries.save
+function_digest
+
+and the analysis of yelkovan.py with the summaries of the functions.
+
+"""
+
+
+# This file tests summary_tools.py
+import summary_tools
+
+# The summaries are kept in the cache
+import cache_tools
+
+# The test programs are analysed by Yelkovan
+import asm_tools
+import yelkovan
+
+# A synthetic program with many functions
+import synthetic_tools
+
+# Directory of the cache
+import tempfile
+from os import path
+
+
+def main(assembly_files: list, trace_files: list):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    assembly_files : list of str
+        The names of the assembly files to be tested.
+    trace_files : list of str
+        The names of the trace files to be tested.
+    """
+
+    # Test function_digest with the memset function of both programs. It
+    # starts at line 239 in the first program and at line 240 in the second.
+    digests = []
+    for assembly_file in assembly_files:
+        assembly_code = asm_tools.AssemblyIndex.from_file(assembly_file)
+        table = assembly_code.instructions
+        index = table.index_of_line(
+            asm_tools.get_function_start("memset", assembly_code))
+        digests.append(summary_tools.function_digest(
+            table, index, summary_tools.function_end(table, index)))
+    print(f"Expected same hash of memset in both programs: True. "
+          f"Found: {digests[0] == digests[1]}.")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = cache_tools.Cache(directory)
+
+        for assembly_file, trace_file in zip(assembly_files, trace_files):
+            expected = yelkovan.Analyzer.from_files(assembly_file,
+                                                    [trace_file]).analyse()
+
+            # Test the analysis with the summaries
+            analyzer = yelkovan.Analyzer.from_files(assembly_file, [trace_file],
+                                                    cache = cache)
+            result = analyzer.analyse()
+            same = (result.start_list == expected.start_list
+                    and result.end_list == expected.end_list
+                    and list(result.graph.edges()) == list(expected.graph.edges()))
+            print(f"Expected same basic blocks with the summaries of "
+                  f"{assembly_file}: True. Found: {same}.")
+            print(f"Summaries found and created: {analyzer.summaries.hits}, "
+                  f"{analyzer.summaries.misses}.")
+
+        # main and calc of the first program are summarized, and calc is
+        # reused by the second program.
+        print(f"Expected summaries found and created in the second program: "
+              f"1, 1. Found: {analyzer.summaries.hits}, "
+              f"{analyzer.summaries.misses}.")
+
+        # Test prefetch with the saved summaries
+        analyzer = yelkovan.Analyzer.from_files(assembly_files[0], [trace_files[0]],
+                                                cache = cache)
+        analyzer.analyse()
+        print(f"Expected summaries found and created in the next analysis: "
+              f"2, 0. Found: {analyzer.summaries.hits}, "
+              f"{analyzer.summaries.misses}.")
+
+        # The hashes of the functions are read from the cache as well, and the
+        # functions which are not reached from main are not hashed.
+        function_digest = summary_tools.function_digest
+        digests = []
+
+        def counted_digest(table, start: int, end: int) -> str:
+            digests.append(start)
+            return function_digest(table, start, end)
+
+        summary_tools.function_digest = counted_digest
+        try:
+            analyzer = yelkovan.Analyzer.from_files(assembly_files[0],
+                                                    [trace_files[0]],
+                                                    cache = cache)
+            analyzer.analyse()
+        finally:
+            summary_tools.function_digest = function_digest
+        print(f"Expected functions hashed in the next analysis: 0. "
+              f"Found: {len(digests)}.")
+
+        # Only main and calc are hashed in an analysis with a new cache.
+        cache = cache_tools.Cache(directory + "/new")
+        summary_tools.function_digest = counted_digest
+        try:
+            analyzer = yelkovan.Analyzer.from_files(assembly_files[0],
+                                                    [trace_files[0]],
+                                                    cache = cache)
+            analyzer.analyse()
+        finally:
+            summary_tools.function_digest = function_digest
+        print(f"Expected functions hashed of "
+              f"{len(analyzer.assembly_code.functions)} in the first analysis "
+              f"with a new cache: 2. Found: {len(digests)}.")
+
+        # Test the summaries with more than one job and a program with enough
+        # functions for the parallel detection.
+        assembly_file = path.join(directory, "synthetic.dump")
+        trace_file = path.join(directory, "synthetic.trc")
+        synthetic_tools.generate_program(assembly_file, trace_file,
+                                         yelkovan.MIN_PARALLEL_FUNCTIONS * 40,
+                                         trace_instructions = 1000)
+        expected = yelkovan.Analyzer.from_files(assembly_file,
+                                                [trace_file]).analyse()
+        cache = cache_tools.Cache(path.join(directory, "jobs"))
+        for run in range(2):
+            analyzer = yelkovan.Analyzer.from_files(assembly_file, [trace_file],
+                                                    2, cache)
+            result = analyzer.analyse(2)
+        same = (result.start_list == expected.start_list
+                and result.end_list == expected.end_list)
+        print(f"Expected same basic blocks with the summaries and two jobs: "
+              f"True. Found: {same}.")
+        print(f"Expected summaries found in the second analysis with two jobs: "
+              f"{len(analyzer.assembly_code.functions) - 1}. "
+              f"Found: {analyzer.summaries.hits}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests summary_tools with the loop_test and decision_test
+    programs.
+    """
+
+    assembly_files: list = ["test_data/loop_test.dump", "test_data/decision_test.dump"]
+    trace_files: list = ["test_data/loop_test.trc", "test_data/decision_test.trc"]
+
+    print(f"The names of the files to be tested are: {assembly_files}, {trace_files}")
+
+    main(assembly_files, trace_files)
@@ -0,0 +1,93 @@
+""" Test the functionality of synthetic_tools.py
+
+This program tests the following functions of synthetic_tools.py
+
+generate_program
+
+and the parallel detection of the functions of yelkovan.py with a synthetic
+program.
+
+"""
+
+
+# This file tests synthetic_tools.py
+import synthetic_tools
+
+# The synthetic program is analysed by Yelkovan
+import yelkovan
+
+# Files of the synthetic program
+import tempfile
+from os import path
+
+
+def main(instructions: int, trace_instructions: int):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    instructions : int
+        Number of instructions of the synthetic program.
+    trace_instructions : int
+        Number of instructions of the trace of the synthetic program.
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        assembly_file = path.join(directory, "synthetic.dump")
+        trace_file = path.join(directory, "synthetic.trc")
+
+        # Test generate_program
+        summary = synthetic_tools.generate_program(
+            assembly_file, trace_file, instructions,
+            trace_instructions = trace_instructions, function_size = 32,
+            call_depth = 4)
+        print(f"Expected number of functions: 64. "
+              f"Found number of functions: {summary['functions']}.")
+        print(f"Expected number of instructions: about {instructions}. "
+              f"Found number of instructions: {summary['instructions']}.")
+
+        with open(trace_file) as f:
+            lines = sum(1 for _ in f)
+        f.closed
+        print(f"Expected number of trace lines: {summary['trace_instructions']}. "
+              f"Found number of trace lines: {lines}.")
+
+        # The synthetic program is analysed and all of its functions are
+        # reachable from main.
+        analyzer = yelkovan.Analyzer.from_files(assembly_file, [trace_file])
+        result = analyzer.analyse()
+        nodes = set(result.graph.nodes())
+        missing = [function.name for function in analyzer.assembly_code.functions
+                   if function.name != "_start"
+                   and function.start_line not in nodes]
+        print(f"Expected functions which are not in the graph: []. "
+              f"Found: {missing}.")
+
+        # Test the parallel detection of the functions with the same program
+        minimum = yelkovan.MIN_PARALLEL_FUNCTIONS
+        yelkovan.MIN_PARALLEL_FUNCTIONS = 1
+        parallel = analyzer.analyse(2)
+        yelkovan.MIN_PARALLEL_FUNCTIONS = minimum
+
+        same = (parallel.start_list == result.start_list
+                and parallel.end_list == result.end_list
+                and list(parallel.graph.edges()) == list(result.graph.edges()))
+        print(f"Expected same basic blocks with 2 jobs: True. Found: {same}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests synthetic_tools with a synthetic program of 2000
+    instructions and a trace of about 10000 instructions.
+    """
+
+    instructions: int = 2000
+    trace_instructions: int = 10000
+
+    print(f"The size of the synthetic program to be tested is: {instructions}")
+
+    main(instructions, trace_instructions)
@@ -0,0 +1,77 @@
+""" Test the functionality of timing_tools.py
+
+This program tests the following functions of timing_tools.py
+
+Profiler.instrument_analysis
+Profiler.report
+Profiler.restore
+
+"""
+
+
+# This file tests timing_tools.py
+import timing_tools
+
+# The analysis of the test program is measured
+import yelkovan
+
+
+def main(assembly_file: str, trace_file: str):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    assembly_file : str
+        The name of the assembly file to be tested.
+    trace_file : str
+        The name of the trace file to be tested.
+    """
+
+    process_fn = yelkovan.Analyzer.process_fn
+
+    profiler = timing_tools.Profiler()
+    profiler.instrument_analysis(yelkovan)
+    profiler.start()
+    yelkovan.Analyzer.from_files(assembly_file, [trace_file]).analyse()
+    profiler.stop()
+    report = profiler.report()
+
+    with open(trace_file) as f:
+        trace_lines = sum(1 for _ in f)
+    f.closed
+
+
+    # Test the phases and helpers
+    print(f"Expected calls of dump_parsing, process_fn and graph_build: 1, 1, 1. "
+          f"Found: {report['phases']['dump_parsing']['calls']}, "
+          f"{report['phases']['process_fn']['calls']}, "
+          f"{report['phases']['graph_build']['calls']}.")
+    print(f"Expected calls of the process_fn helper: 2. "
+          f"Found: {report['helpers']['process_fn']['calls']}.")
+
+    # Test the throughput
+    print(f"Expected lines of dump_parsing and trace_index: 425, {trace_lines}. "
+          f"Found: {report['throughput']['dump_parsing']['lines']}, "
+          f"{report['throughput']['trace_index']['lines']}.")
+
+    # Test restore
+    print(f"Expected original process_fn after stop: True. "
+          f"Found: {yelkovan.Analyzer.process_fn is process_fn}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests timing_tools with the loop_test.dump and
+    loop_test.trc files.
+    """
+
+    assembly_file: str = "test_data/loop_test.dump"
+    trace_file: str = "test_data/loop_test.trc"
+
+    print(f"The names of the files to be tested are: {assembly_file}, {trace_file}")
+
+    main(assembly_file, trace_file)
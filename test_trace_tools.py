@@ -0,0 +1,198 @@
+""" Test the functionality of trace_tools.py
+
+This program tests the following functions of trace_tools.py
+
+read_trace
+get_next_address
+SuccessorIndex (parts of a trace file)
+SuccessorIndex (micro operations)
+TransitionIndex
+TransitionIndex (parts of a trace file)
+TransitionIndex (micro operations)
+is_transition
+split_traces
+map_parts
+
+"""
+
+
+# This file tests trace_tools.py
+import trace_tools
+
+# The control instructions are found in the assembly file
+import asm_tools
+import yelkovan
+
+# Compressed copies of the trace file
+import gzip
+import lzma
+import os
+import tempfile
+
+
+def main(file_name: str, assembly_file: str):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    file_name : str
+        The name of the trace file to be tested.
+    assembly_file : str
+        The name of the assembly file of the trace file.
+    """
+
+    records: list = None
+    next_address: str = None
+
+
+    # Test read_trace
+    records = list(trace_tools.read_trace(file_name))
+    print(f"Expected number of records: 342. Found number of records: "
+          f"{len(records)}.")
+    print(f"Expected record 16: tick 8000, pc 0x102fc, c_sd, MemWrite, "
+          f"address 0x11c50. Found record 16: tick {records[16].tick}, "
+          f"pc {hex(records[16].pc)}, {records[16].mnemonic}, "
+          f"{records[16].op_class}, address {hex(records[16].address)}.")
+
+    # Test read_trace with small chunks and with mmap
+    same = (records == list(trace_tools.read_trace(file_name, chunk_size = 7)) 
+            == list(trace_tools.read_trace(file_name, use_mmap = True)))
+    print(f"Expected same records with small chunks and mmap: True. "
+          f"Found: {same}.")
+
+    # Test read_trace with compressed trace files
+    with open(file_name, 'rb') as f:
+        content = f.read()
+    f.closed
+
+    with tempfile.TemporaryDirectory() as directory:
+        for extension, compress in [(".trc.gz", gzip.compress),
+                                    (".trc.xz", lzma.compress)]:
+            compressed_file = os.path.join(directory, "trace" + extension)
+            with open(compressed_file, 'wb') as f:
+                f.write(compress(content))
+            f.closed
+
+            same = records == list(trace_tools.read_trace(compressed_file))
+            print(f"Expected same records with \"{extension}\" file: True. "
+                  f"Found: {same}.")
+
+    # Test get_next_address
+    next_address = trace_tools.get_next_address("10316", [file_name])
+    print(f"Expected next address of \"10316\": 10336. "
+          f"Found next address: {next_address}.")
+
+    # Test TransitionIndex
+    assembly_code = asm_tools.AssemblyIndex.from_file(assembly_file)
+    controls = assembly_code.find_instructions(yelkovan.branch_inst
+                                               + yelkovan.jump_inst)
+    transition_index = trace_tools.TransitionIndex(controls, [file_name])
+    print(f"Expected number of transitions and executions: 63, 68. "
+          f"Found: {len(transition_index.transitions)}, "
+          f"{sum(transition_index.transitions.values())}.")
+    print(f"Expected executions of 0x101fe -> 0x101e0: 5. "
+          f"Found: {transition_index.transitions.get((0x101fe, 0x101e0))}.")
+    print(f"Expected entries and exits: ['0x100b0'], ['0x104b2']. "
+          f"Found: {[hex(address) for address in transition_index.entries]}, "
+          f"{[hex(address) for address in transition_index.exits]}.")
+
+    # Test the indexes of the parts of the trace file. The trace file is divided
+    # into byte ranges, so some of the pairs of addresses cross the border of
+    # two parts. The merged indexes are the same as the sequential indexes.
+    sources = frozenset(assembly_code.find_instructions(['jr', 'jalr']))
+    successor_index = trace_tools.SuccessorIndex(sources, [file_name])
+
+    min_part_size = trace_tools.MIN_PART_SIZE
+    trace_tools.MIN_PART_SIZE = 1
+
+    for jobs in [2, 4, 8, 32]:
+        parts = trace_tools.split_traces([file_name], jobs)
+        borders = [trace_tools._index_part(part, sources)[3]
+                   for part in parts[:-1]]
+        print(f"Parts with {jobs} jobs: {len(parts)}. Borders after an "
+              f"indirect jump: {sum(border in sources for border in borders)}.")
+
+        index = trace_tools.SuccessorIndex(sources, [file_name], jobs)
+        same = (index.successors == successor_index.successors
+                and index.counts == successor_index.counts
+                and index.lines == successor_index.lines)
+        print(f"Expected same successor index with {jobs} jobs: True. "
+              f"Found: {same}.")
+
+        index = trace_tools.TransitionIndex(controls, [file_name], jobs)
+        same = (index.transitions == transition_index.transitions
+                and index.entries == transition_index.entries
+                and index.exits == transition_index.exits
+                and index.lines == transition_index.lines)
+        print(f"Expected same transition index with {jobs} jobs: True. "
+              f"Found: {same}.")
+
+    # Test map_parts. The parts are processed by worker processes only if the
+    # trace files are large enough.
+    parts = [(file_name, 0, None)] * 2
+    pids = trace_tools.map_parts(process_id, parts, 2)
+    print(f"Expected parts processed by worker processes: True. "
+          f"Found: {os.getpid() not in pids}.")
+
+    trace_tools.MIN_PART_SIZE = min_part_size
+
+    pids = trace_tools.map_parts(process_id, parts, 2)
+    print(f"Expected small parts processed by this process: True. "
+          f"Found: {set(pids) == {os.getpid()}}.")
+
+    # Test the indexes with the micro operations of an instruction before an
+    # indirect jump and of the indirect jump. Only the first micro operation is
+    # an execution of an instruction.
+    micro_operations = [(0, "0x10100.0", "ld a5, 0(a0)"),
+                        (500, "0x10100.1", "ld a5, 0(a0)"),
+                        (1000, "0x10104.0", "jalr a5"),
+                        (1500, "0x10104.1", "jalr a5"),
+                        (2000, "0x10200", "addi a0, a0, 1")]
+    with tempfile.TemporaryDirectory() as directory:
+        micro_file = os.path.join(directory, "micro.trc")
+        with open(micro_file, 'w') as f:
+            for tick, address, instruction in micro_operations:
+                f.write(f"{tick:7}: system.cpu T0 : {address:10} : "
+                        f"{instruction:26} : IntAlu :  D=0x0\n")
+        f.closed
+
+        index = trace_tools.SuccessorIndex(frozenset([0x10104]), [micro_file])
+        print(f"Expected successors and executions of 0x10104: ['0x10200'], 1. "
+              f"Found: {[hex(address) for address in index.successors[0x10104]]}, "
+              f"{index.counts[0x10104]}.")
+
+        index = trace_tools.TransitionIndex(frozenset([0x10104]), [micro_file])
+        transitions = [(hex(source), hex(target), count)
+                       for (source, target), count in index.transitions.items()]
+        print(f"Expected transitions with micro operations: "
+              f"[('0x10104', '0x10200', 1)]. Found: {transitions}.")
+
+    # Test is_transition
+    print(f"Expected transitions 0x10316 -> 0x10336 and 0x102fc -> 0x10300: "
+          f"True, False. Found: "
+          f"{trace_tools.is_transition(0x10316, 0x10336, controls)}, "
+          f"{trace_tools.is_transition(0x102fc, 0x10300, controls)}.")
+
+
+def process_id(part: tuple) -> int:
+    """Returns the id of the process which processes a part."""
+
+    return os.getpid()
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests trace_tools with the loop_test.trc and
+    loop_test.dump files.
+    """
+
+    file_name: str = "test_data/loop_test.trc"
+    assembly_file: str = "test_data/loop_test.dump"
+
+    print(f"The name of the trace file to be tested is: {file_name}")
+
+    main(file_name, assembly_file)
@@ -0,0 +1,121 @@
+""" Test the functionality of yelkovan.py
+
+This program tests the following functions of yelkovan.py
+
+Analyzer.add_item_to_start_list
+Analyzer.add_item_to_end_list
+Analyzer.finalise_lists
+Analyzer.analyse (basic blocks and repeated analyses)
+analyse (repeated analyses with and without jobs)
+
+"""
+
+
+# This file tests yelkovan.py
+import yelkovan
+
+# Files of the control flow graphs
+import tempfile
+from os import path
+
+
+def main(programs: list, expected: list):
+    """Main function of this test program.
+
+    This function does not return a value.
+
+
+    Parameters
+    ----------
+    programs : list of str
+        The names of the programs to be tested, like "test_data/loop_test".
+    expected : list of tuple
+        The expected start list and end list of each program.
+    """
+
+    analyzer = yelkovan.Analyzer.from_files(programs[0] + ".dump",
+                                            [programs[0] + ".trc"])
+
+
+    # Test add_item_to_start_list, add_item_to_end_list and finalise_lists
+    analyzer.reset()
+    analyzer.add_item_to_start_list(20)
+    analyzer.add_item_to_start_list(10)
+    analyzer.add_item_to_start_list(20)
+    analyzer.add_item_to_end_list(15, [20])
+    analyzer.add_item_to_end_list(15, [10, 15, 20])
+    analyzer.add_item_to_end_list(25)
+    analyzer.finalise_lists()
+    print(f"Expected start list: [10, 20]. "
+          f"Found start list: {analyzer.start_list}.")
+    print(f"Expected end list: [[15, 20, 10], [25]]. "
+          f"Found end list: {analyzer.end_list}.")
+    print(f"Expected start index: {{10: 0, 20: 1}}. "
+          f"Found start index: {analyzer.start_index}.")
+
+    # Test the basic blocks of the programs
+    for program, (start_list, end_list) in zip(programs, expected):
+        result = yelkovan.Analyzer.from_files(program + ".dump",
+                                              [program + ".trc"]).analyse()
+        print(f"Expected start list of {program}: {start_list}. "
+              f"Found start list: {result.start_list}.")
+        print(f"Expected end list of {program}: {end_list}. "
+              f"Found end list: {result.end_list}.")
+
+    # Test repeated analyses in the same process. The analyses of an analyzer
+    # and of analyse with and without jobs write the same graphs.
+    with tempfile.TemporaryDirectory() as directory:
+        for program in programs:
+            analyzer = yelkovan.Analyzer.from_files(program + ".dump",
+                                                    [program + ".trc"])
+            first = analyzer.analyse()
+            second = analyzer.analyse()
+            same = (first.start_list == second.start_list
+                    and first.end_list == second.end_list
+                    and list(first.graph.edges()) == list(second.graph.edges()))
+            print(f"Expected same basic blocks of two analyses of {program}: "
+                  f"True. Found: {same}.")
+
+            # The functions of the small programs are detected in parallel too.
+            minimum = yelkovan.MIN_PARALLEL_FUNCTIONS
+            yelkovan.MIN_PARALLEL_FUNCTIONS = 1
+
+            outputs = []
+            for run, jobs in enumerate([1, 1, 2, 2]):
+                output_file = path.join(directory, f"cfg_{run}.json")
+                yelkovan.analyse(program + ".dump", [program + ".trc"], jobs,
+                                 output_format = "json",
+                                 output_file = output_file,
+                                 render_format = None,
+                                 profiles = ["counts"])
+                with open(output_file) as f:
+                    outputs.append(f.read())
+                f.closed
+
+            yelkovan.MIN_PARALLEL_FUNCTIONS = minimum
+
+            print(f"Expected same graphs of repeated analyses of {program} "
+                  f"with 1 and 2 jobs: True. "
+                  f"Found: {outputs.count(outputs[0]) == len(outputs)}.")
+
+
+if __name__ == "__main__":
+    """Entry point of the program.
+
+    This test pogram tests yelkovan with the loop_test and decision_test
+    programs.
+    """
+
+    programs: list = ["test_data/loop_test", "test_data/decision_test"]
+    expected: list = [
+        ([97, 115, 122, 126, 132, 136],
+         [[112, 122], [121, 97], [125, 132], [131, 132], [135, 136, 126],
+          [141]]),
+        ([97, 115, 122, 128, 131, 135, 137],
+         [[112, 122], [121, 97], [127, 128, 131], [130, 137], [134, 135, 137],
+          [136, 137], [142]]),
+    ]
+
+    print(f"The programs to be tested are: {programs}")
+
+    main(programs, expected)
@@ -0,0 +1,362 @@
+"""Timing tools of Yelkovan.
+
+This file includes helper functions to measure where the time of an analysis
+is spent.
+
+A `Profiler` replaces the functions and methods of the analysis with wrappers
+which measure their wall time and count their calls. The original functions
+are restored when the profiler is stopped, so the analysis is not slowed down
+when it is not profiled. The measured functions are of two kinds:
+
+1. Phases are the steps of the analysis, like parsing the assembly file,
+reading the trace files and rendering the graph. Each of them is called once
+or a few times.
+2. Helpers are the functions which are called by the phases many times, like
+the address lookups of the assembly index and the targets of indirect jumps.
+
+The time of a phase includes the time of the helpers which it calls, and the
+time of the wrappers of the helpers. The functions which are executed by worker
+processes are not measured; the time of the phase which waits for the workers
+is measured instead.
+
+The report of a profiler also includes the peak memory of the process and its
+worker processes, and the throughput of parsing the assembly file and reading
+the trace files in lines per second. Optionally the analysis is profiled by
+cProfile as well, and the statistics are written in the format of pstats.
+
+"""
+
+
+# Type hints support regarding collections
+from typing import Callable, Dict, List, Optional, TextIO
+
+# Wrappers of the measured functions
+import functools
+
+# Time measurement and statistics
+import time
+import cProfile
+import pstats
+
+# Report
+import json
+import sys
+
+# Tools of Yelkovan which are measured
+import asm_tools
+import cfg_tools
+import output_tools
+import trace_tools
+
+# Peak memory of the process. resource is not available on all platforms.
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Number of functions which are printed from the cProfile statistics.
+STATS_LINES = 20
+
+
+class Profiler:
+    """Wall time and call counts of the phases and helpers of an analysis.
+
+    A sample usage is:
+
+        profiler = Profiler()
+        profiler.instrument_analysis(yelkovan)
+        profiler.start()
+        yelkovan.analyse("loop_test.dump", ["loop_test.trc"])
+        profiler.stop()
+        print_report(profiler.report())
+
+    The phases of a `DynamicAnalyzer` are measured under the names of the
+    same phases of an `Analyzer`.
+
+    Attributes
+    ----------
+    phases : dict of str to list
+        Total wall time in seconds and number of calls of each phase.
+    helpers : dict of str to list
+        Total wall time in seconds and number of calls of each helper.
+    lines : dict of str to int
+        Number of lines which are read by the "dump_parsing" and
+        "trace_index" phases.
+    stats_file : str or None
+        File of the cProfile statistics. The analysis is not profiled by
+        cProfile if None.
+    """
+
+    def __init__(self, stats_file: Optional[str] = None):
+        """Creates a profiler.
+
+        Parameters
+        ----------
+        stats_file : str or None
+            File of the cProfile statistics. The analysis is not profiled by
+            cProfile if None.
+        """
+
+        self.phases: Dict[str, list] = {}
+        self.helpers: Dict[str, list] = {}
+        self.lines: Dict[str, int] = {}
+        self.stats_file: Optional[str] = stats_file
+        self._patches: List[tuple] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._start: Optional[float] = None
+        self._wall_seconds: float = 0.0
+
+
+    def instrument_analysis(self, analysis) -> None:
+        """Instruments the phases and helpers of the analysis.
+
+        Parameters
+        ----------
+        analysis : module
+            The module of Yelkovan which defines `Analyzer` and `add_profiles`.
+            It is given by the caller, since yelkovan.py is usually executed as
+            the main module.
+        """
+
+        analyzer = analysis.Analyzer
+
+        self.instrument(asm_tools.AssemblyIndex, "from_file", "dump_parsing",
+                        lines = lambda arguments, result: result.line_count)
+        self.instrument(trace_tools.SuccessorIndex, "__init__", "trace_index",
+                        lines = lambda arguments, result: arguments[0].lines)
+        self.instrument(trace_tools.TransitionIndex, "__init__", "trace_index",
+                        lines = lambda arguments, result: arguments[0].lines)
+        self.instrument(analyzer, "visit_functions", "process_fn")
+        self.instrument(analysis.DynamicAnalyzer, "find_blocks", "process_fn")
+        self.instrument(analyzer, "check_targets", "check_targets")
+        self.instrument(analyzer, "finalise_lists", "finalise_lists")
+        self.instrument(analyzer, "create_graph", "graph_build")
+        self.instrument(cfg_tools.CompactCFG, "from_edges", "graph_build")
+        self.instrument(analysis, "add_profiles", "profiles")
+        self.instrument(output_tools, "write_cfg", "output")
+
+        helpers = [(asm_tools.AssemblyIndex, "address_to_line_no"),
+                   (asm_tools.AssemblyIndex, "function_at_address"),
+                   (asm_tools.AssemblyIndex, "function_of_instruction"),
+                   (asm_tools, "get_function_start"),
+                   (asm_tools, "get_function_end"),
+                   (trace_tools.SuccessorIndex, "get_target"),
+                   (analyzer, "process_fn"),
+                   (analyzer, "find_target"),
+                   (cfg_tools.CompactCFG, "from_blocks"),
+                   (cfg_tools.CompactCFG, "to_networkx")]
+        for owner, attribute in helpers:
+            self.instrument(owner, attribute, attribute, helper = True)
+
+        # The graph layout and drawing are measured if pygraphviz is installed.
+        try:
+            from networkx.drawing import nx_agraph
+            import pygraphviz
+        except ImportError:
+            return
+
+        self.instrument(nx_agraph, "to_agraph", "to_agraph")
+        self.instrument(pygraphviz.AGraph, "layout", "layout")
+        self.instrument(pygraphviz.AGraph, "draw", "draw")
+
+
+    def instrument(self, owner, attribute: str, name: str, helper: bool = False,
+                   lines: Optional[Callable] = None) -> None:
+        """Replaces a function or method with a wrapper which measures it.
+
+        Parameters
+        ----------
+        owner : module or class
+            The module or class of the function.
+        attribute : str
+            Name of the function in the module or class.
+        name : str
+            Name of the phase or helper in the report.
+        helper : bool
+            The function is a helper, otherwise it is a phase.
+        lines : callable or None
+            Called with the arguments and the result of the function, returns
+            the number of lines which are read by the function.
+        """
+
+        original = (owner.__dict__[attribute] if isinstance(owner, type)
+                    else getattr(owner, attribute))
+        table = self.helpers if helper else self.phases
+        record = table.setdefault(name, [0.0, 0])
+
+        if isinstance(original, (classmethod, staticmethod)):
+            replacement = type(original)(self._wrap(original.__func__, name,
+                                                    record, lines))
+        else:
+            replacement = self._wrap(original, name, record, lines)
+
+        setattr(owner, attribute, replacement)
+        self._patches.append((owner, attribute, original))
+
+
+    def _wrap(self, function: Callable, name: str, record: list,
+              lines: Optional[Callable]) -> Callable:
+        """Returns the wrapper of a function which adds to its record."""
+
+        @functools.wraps(function)
+        def wrapper(*arguments, **keywords):
+            start = time.perf_counter()
+            try:
+                result = function(*arguments, **keywords)
+            finally:
+                record[0] += time.perf_counter() - start
+                record[1] += 1
+
+            if lines is not None:
+                self.lines[name] = self.lines.get(name, 0) + lines(arguments, result)
+
+            return result
+
+        return wrapper
+
+
+    def restore(self) -> None:
+        """Restores the original functions and methods."""
+
+        while self._patches:
+            owner, attribute, original = self._patches.pop()
+            setattr(owner, attribute, original)
+
+
+    def start(self) -> None:
+        """Starts the wall clock and cProfile (if a statistics file is given)."""
+
+        if self.stats_file is not None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+        self._start = time.perf_counter()
+
+
+    def stop(self) -> None:
+        """Stops the measurements and restores the original functions.
+
+        The cProfile statistics are written to the statistics file.
+        """
+
+        if self._start is not None:
+            self._wall_seconds += time.perf_counter() - self._start
+            self._start = None
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.stats_file)
+
+        self.restore()
+
+
+    def report(self) -> dict:
+        """Returns the report of the measurements.
+
+        Returns
+        -------
+        dict
+            The "wall_seconds" of the analysis, the "seconds" and the "calls"
+            of the "phases" and the "helpers", the "peak_memory" in bytes and
+            the "throughput" of the phases which read lines.
+        """
+
+        throughput = {}
+        for name, lines in self.lines.items():
+            seconds = self.phases[name][0]
+            throughput[name] = {"lines": lines,
+                                "lines_per_second": (lines / seconds if seconds
+                                                     else None)}
+
+        return {"wall_seconds": self._wall_seconds,
+                "phases": _table(self.phases),
+                "helpers": _table(self.helpers),
+                "peak_memory": peak_memory(),
+                "throughput": throughput,
+                "stats_file": self.stats_file}
+
+
+
+def peak_memory() -> Optional[dict]:
+    """Returns the peak memory of the process and its worker processes.
+
+    Returns
+    -------
+    dict or None
+        The peak resident set size of the "process" and of its largest
+        "children" process in bytes, or None if it can not be measured on this
+        platform.
+    """
+
+    if resource is None:
+        return None
+
+    # ru_maxrss is in bytes on macOS and in kilobytes on the other platforms.
+    scale = 1 if sys.platform == "darwin" else 1024
+
+    return {"process": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale}
+
+
+def print_report(report: dict, file: TextIO = None) -> None:
+    """Prints a summary of a report.
+
+    Parameters
+    ----------
+    report : dict
+        Report of a profiler.
+    file : file or None
+        The summary is printed to this file. The standard error is used if
+        None, since the standard output may include the control flow graph.
+    """
+
+    file = file or sys.stderr
+
+    print(f"Wall time: {report['wall_seconds']:.3f} s", file = file)
+
+    for title in ("phases", "helpers"):
+        print(f"{title.capitalize()}:", file = file)
+        rows = sorted(report[title].items(), key = lambda row: row[1]["seconds"],
+                      reverse = True)
+        for name, row in rows:
+            if row["calls"]:
+                print(f"  {name:<24}{row['seconds']:10.3f} s{row['calls']:12d} calls",
+                      file = file)
+
+    memory = report["peak_memory"]
+    if memory is not None:
+        print(f"Peak memory: {memory['process'] / (1 << 20):.1f} MiB, worker "
+              f"processes: {memory['children'] / (1 << 20):.1f} MiB", file = file)
+
+    for name, row in report["throughput"].items():
+        rate = row["lines_per_second"]
+        print(f"Throughput of {name}: {row['lines']} lines"
+              + (f", {rate:.0f} lines/s" if rate else ""), file = file)
+
+    if report["stats_file"] is not None:
+        stats = pstats.Stats(report["stats_file"], stream = file)
+        stats.sort_stats("cumulative").print_stats(STATS_LINES)
+
+
+def write_report(report: dict, file: str) -> None:
+    """Writes a report as JSON.
+
+    Parameters
+    ----------
+    report : dict
+        Report of a profiler.
+    file : str
+        Name of the output file.
+    """
+
+    with open(file, 'w') as f:
+        json.dump(report, f, indent = 2)
+    f.closed
+
+
+def _table(records: Dict[str, list]) -> Dict[str, dict]:
+    """Returns the seconds and calls of the records as dictionaries."""
+
+    return {name: {"seconds": seconds, "calls": calls}
+            for name, (seconds, calls) in records.items()}
@@ -2,30 +2,701 @@
 
 This file includes helper functions to process trace file.
 
+Trace files are large. Therefore they are never loaded into memory as a whole.
+They are read in chunks of bounded size, optionally through mmap, and the
+lines are processed one by one. Compressed trace files (".trc.gz", ".trc.xz",
+".trc.bz2" and ".trc.zst") are read directly without decompressing them to
+disk. The information which is needed by the analysis is collected into a
+`SuccessorIndex` in a single pass over all of the trace files. The control
+transfers of the executed program, which are needed by the dynamic control
+flow graph, are collected into a `TransitionIndex` in the same way.
 
 """
 
 
-def get_next_address(address: str,  trace_files: list) -> str:
-    """Detects the line which includes the address. Then returns the 
-    address of the following line in trace file.
+# Type hints support regarding collections
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Compressed trace files
+import bz2
+import gzip
+import lzma
+
+# Memory mapped trace files
+import mmap
+
+# File sizes. The process pool is imported by map_parts, since it takes long to
+# import and it is not used by a single job.
+from os import path
+
+
+# Extensions of the trace files which are recognized by Yelkovan.
+TRACE_EXTENSIONS = (".trc", ".trc.gz", ".trc.xz", ".trc.lzma", ".trc.bz2",
+                    ".trc.zst")
+
+# Default size of the chunks which are read from a trace file, in bytes.
+CHUNK_SIZE = 1 << 20
+
+# A trace file is divided into parts for parallel processing only if each part
+# is larger than this size, in bytes. The trace files are processed in parallel
+# only if they have at least this size in total.
+MIN_PART_SIZE = 64 << 20
+
+# The largest distance between the addresses of two instructions which follow
+# each other in the program, in bytes.
+MAX_INSTRUCTION_SIZE = 4
 
+
+class TraceRecord(NamedTuple):
+    """A parsed trace line.
+
+    A sample trace line is
+    "   8000: system.cpu T0 : 0x102fc : c_sd a1, 0(a4) : MemWrite :  D=0x0 A=0x11c50".
+
+    Attributes
+    ----------
+    tick : int
+        Simulation tick of the instruction, 8000 in the sample.
+    cpu : str
+        Name of the cpu and the thread, "system.cpu T0" in the sample.
+    pc : int
+        Program counter, 0x102fc in the sample.
+    mnemonic : str
+        Mnemonic of the instruction, "c_sd" in the sample.
+    op_class : str
+        Operation class of the instruction, "MemWrite" in the sample.
+    data : int or None
+        Data value of the instruction (D=), if present.
+    address : int or None
+        Memory address of the instruction (A=), if present.
     """
 
+    tick: int
+    cpu: str
+    pc: int
+    mnemonic: str
+    op_class: str
+    data: Optional[int]
+    address: Optional[int]
+
+
+class SuccessorIndex:
+    """Successor addresses of indirect jump instructions.
+
+    The source addresses of the indirect jump instructions (jr and jalr) are
+    collected from the assembly code before the analysis. Then the trace files
+    are read once, and every address which follows one of the source addresses
+    in the trace files is recorded. The successors of a source address are kept
+    in the order they are first observed.
+
+    The trace files may be read in parallel. In this case the trace files are
+    divided into parts (see `split_traces`), each part is indexed by a worker
+    process, and the partial indexes are merged in the order of the parts. The
+    merged index is the same as the index which is built sequentially.
+
+    Attributes
+    ----------
+    trace_files : list of str
+        List of names of the trace files of the program.
+    successors : dict of int to list of int
+        Maps each source address to its observed successor addresses.
+    counts : dict of int to int
+        Maps each source address to the number of times it is executed.
+    lines : int
+        Number of lines which are read from the trace files.
+    """
+
+    def __init__(self, source_addresses: Iterable[int], trace_files: list,
+                 jobs: int = 1):
+        """Builds the index by reading the trace files once.
+
+        Parameters
+        ----------
+        source_addresses : iterable of int
+            Addresses of the indirect jump instructions.
+        trace_files : list of str
+            List of names of the trace files of the program.
+        jobs : int
+            Number of worker processes which read the trace files.
+        """
+
+        self.trace_files: list = trace_files
+        self.successors: Dict[int, List[int]] = {address: []
+                                                 for address in source_addresses}
+        self.counts: Dict[int, int] = dict.fromkeys(self.successors, 0)
+        self.lines: int = 0
+
+        parts = split_traces(trace_files, jobs)
+        sources = frozenset(self.successors)
+        results = map_parts(_index_part, parts, jobs, sources)
+
+        # Address of the last instruction of the previous part of the same file.
+        previous: Optional[int] = None
+        previous_file: Optional[str] = None
+
+        for part, (successors, counts, first, last, lines) in zip(parts, results):
+            # The pair which crosses the border of two parts of the same file.
+            if part[0] == previous_file and previous in sources and first is not None:
+                self._add(previous, first)
+
+            for address, targets in successors.items():
+                for target in targets:
+                    self._add(address, target)
+
+            for address, count in counts.items():
+                self.counts[address] += count
+            self.lines += lines
+
+            if last is not None or part[0] != previous_file:
+                previous = last
+            previous_file = part[0]
+
+
+    def _add(self, address: int, target: int) -> None:
+        """Adds a successor to a source address if it is not present."""
+
+        targets = self.successors[address]
+        if target not in targets:
+            targets.append(target)
+
+
+    def get_target(self, address: int) -> int:
+        """Returns the first observed successor of an address.
+
+        Parameters
+        ----------
+        address : int
+            Address of an indirect jump instruction.
+
+        Returns
+        -------
+        int
+            Address of the instruction which follows the indirect jump
+            instruction in trace files.
+
+        Raises
+        ------
+        Exception
+            If the address is not found in the trace files.
+        """
+
+        targets = self.successors.get(address)
+
+        if not targets:
+            raise Exception('The address could not be found in the trace files.')
+
+        return targets[0]
+
+
+    def get_next_address(self, address: str) -> str:
+        """Returns the first observed successor of an address.
+
+        Parameters
+        ----------
+        address : str
+            Address of an indirect jump instruction in bare hexadecimal format.
+
+        Returns
+        -------
+        str
+            Address of the instruction which follows the indirect jump
+            instruction in trace files, in bare hexadecimal format.
+
+        Raises
+        ------
+        Exception
+            If the address is not found in the trace files.
+        """
+
+        return format(self.get_target(int(address, 16)), 'x')
+
+
+
+class TransitionIndex:
+    """Control transfers of the executed program in the trace files.
+
+    A transition is a pair of addresses which follow each other in the trace
+    files, where the first address is a control instruction (a branch or a
+    jump) or the second address is not the next instruction of the first
+    address. The transitions of the control instructions include the not taken
+    branches. Every other pair of addresses in the trace files is the
+    sequential execution of a basic block.
+
+    The trace files are read once, optionally in parallel like the trace files
+    of `SuccessorIndex`. The pairs of addresses which cross the borders of the
+    parts of a trace file are added when the parts are merged.
+
+    Attributes
+    ----------
+    trace_files : list of str
+        List of names of the trace files of the program.
+    transitions : dict of tuple to int
+        Maps each transition, a pair of a source address and a target address,
+        to the number of times it is executed.
+    entries, exits : list of int
+        Addresses of the first and last instructions of each trace file.
+    lines : int
+        Number of lines which are read from the trace files.
+    """
+
+    def __init__(self, control_addresses: Iterable[int], trace_files: list,
+                 jobs: int = 1):
+        """Builds the index by reading the trace files once.
+
+        Parameters
+        ----------
+        control_addresses : iterable of int
+            Addresses of the branch and jump instructions.
+        trace_files : list of str
+            List of names of the trace files of the program.
+        jobs : int
+            Number of worker processes which read the trace files.
+        """
+
+        self.trace_files: list = trace_files
+        self.transitions: Dict[Tuple[int, int], int] = {}
+        self.entries: List[int] = []
+        self.exits: List[int] = []
+        self.lines: int = 0
+
+        parts = split_traces(trace_files, jobs)
+        controls = frozenset(control_addresses)
+        results = map_parts(_transition_part, parts, jobs, controls)
+
+        # Address of the last instruction of the previous part of the same file.
+        previous: Optional[int] = None
+        previous_file: Optional[str] = None
+
+        for part, (transitions, first, last, lines) in zip(parts, results):
+            if part[0] != previous_file:
+                if previous is not None:
+                    self.exits.append(previous)
+                previous = None
+
+            if first is not None:
+                if previous is None:
+                    self.entries.append(first)
+                elif is_transition(previous, first, controls):
+                    # The pair which crosses the border of two parts of the
+                    # same file.
+                    self._add(previous, first, 1)
+
+            for transition, count in transitions.items():
+                self._add(*transition, count)
+            self.lines += lines
+
+            if last is not None:
+                previous = last
+            previous_file = part[0]
+
+        if previous is not None:
+            self.exits.append(previous)
+
+
+    def _add(self, source: int, target: int, count: int) -> None:
+        """Adds the executions of a transition."""
+
+        transition = (source, target)
+        self.transitions[transition] = self.transitions.get(transition, 0) + count
+
+
+
+def parse_pc(line: str) -> Optional[int]:
+    """Extracts the program counter of a trace line.
+
+    A sample trace line is
+    "   3000: system.cpu T0 : 0x100c4    : jal ra, 544    : IntAlu :  D=0x...".
+    The fifth token is the program counter.
+
+    An instruction which is divided into micro operations has a trace line per
+    micro operation, like "0x100c4.0" and "0x100c4.1". Only the first micro
+    operation is an execution of the instruction, so the program counter of
+    the other micro operations is not returned.
+
+    Parameters
+    ----------
+    line : str
+        A line of a trace file.
+
+    Returns
+    -------
+    int or None
+        The program counter, or None if the line is not a valid trace line or
+        the line is not the first micro operation of an instruction.
+    """
+
+    tokens = line.split(None, 5)
+
+    # If len(tokens) >= 5 means this a valid trace line.
+    if len(tokens) < 5 or not tokens[4].startswith('0x'):
+        return None
+
+    address, _, micro_operation = tokens[4][2:].partition('.')
+    if micro_operation and micro_operation != '0':
+        return None
+
+    return int(address, 16)
+
+
+def parse_record(line: str) -> Optional[TraceRecord]:
+    """Parses a trace line.
+
+    Parameters
+    ----------
+    line : str
+        A line of a trace file.
+
+    Returns
+    -------
+    TraceRecord or None
+        The parsed trace line, or None if the line is not a valid trace line.
+    """
+
+    tick, separator, rest = line.partition(':')
+    fields = rest.split(' : ')
+
+    # tick: cpu : pc : disassembly : op class : data
+    if not separator or len(fields) < 4:
+        return None
+
+    try:
+        tick = int(tick)
+        pc = fields[1].split()[0]
+        if not pc.startswith('0x'):
+            return None
+        pc = int(pc[2:].split('.')[0], 16)
+    except (ValueError, IndexError):
+        return None
+
+    disassembly = fields[2].split(None, 1)
+    data: Optional[int] = None
+    address: Optional[int] = None
+
+    if len(fields) >= 5:
+        for token in fields[4].split():
+            if token.startswith('D=0x'):
+                data = int(token[4:], 16)
+            elif token.startswith('A=0x'):
+                address = int(token[4:], 16)
+
+    return TraceRecord(tick, fields[0].strip(), pc,
+                       disassembly[0] if disassembly else '',
+                       fields[3].strip(), data, address)
+
+
+def split_traces(trace_files: list, jobs: int,
+                 min_part_size: Optional[int] = None) -> List[Tuple[str, int, Optional[int]]]:
+    """Divides the trace files into parts which are processed in parallel.
+
+    Each trace file is a part. If there are fewer trace files than jobs, large
+    uncompressed trace files are divided into byte ranges so that every job has
+    a part to process. Compressed trace files can not be divided.
+
+    Parameters
+    ----------
+    trace_files : list of str
+        List of names of the trace files.
+    jobs : int
+        Number of worker processes.
+    min_part_size : int or None
+        Minimum size of a byte range, in bytes. MIN_PART_SIZE if None.
+
+    Returns
+    -------
+    list of tuple
+        Parts in the order of the trace files. A part is a tuple of the name of
+        the trace file, the start offset and the end offset of the byte range.
+        The end offset is None for the end of the file.
+    """
+
+    if min_part_size is None:
+        min_part_size = MIN_PART_SIZE
+
+    parts: List[Tuple[str, int, Optional[int]]] = []
+    ranges_per_file = max(1, jobs // max(1, len(trace_files)))
 
     for file in trace_files:
+        size = 0 if _is_compressed(file) else path.getsize(file)
+        count = max(1, min(ranges_per_file, size // max(1, min_part_size)))
+        step = -(-size // count)
+
+        for index in range(count):
+            end = None if index == count - 1 else (index + 1) * step
+            parts.append((file, index * step, end))
+
+    return parts
+
+
+def map_parts(function, parts: list, jobs: int, *arguments) -> list:
+    """Applies a function to each part of the trace files.
+
+    The function is called as `function(part, *arguments)`. If there are more
+    than one job and part, and the parts have at least MIN_PART_SIZE bytes in
+    total, the calls are made in a process pool. The small trace files are
+    processed without the pool, since starting the worker processes takes
+    longer than reading them. The results are returned in the order of the
+    parts.
+    """
+
+    if (jobs <= 1 or len(parts) <= 1
+            or sum((path.getsize(file) if end is None else end) - start
+                   for file, start, end in parts) < MIN_PART_SIZE):
+        return [function(part, *arguments) for part in parts]
+
+    # Parallel processing of trace files
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers = min(jobs, len(parts))) as executor:
+        return list(executor.map(function, parts,
+                                 *[[argument] * len(parts) for argument in arguments]))
+
+
+def _index_part(part: Tuple[str, int, Optional[int]], sources: frozenset) -> tuple:
+    """Builds the successor index of a part of a trace file.
+
+    This function is executed by the worker processes.
+
+    Returns
+    -------
+    tuple
+        The successors and execution counts of the source addresses in the
+        part, the address of the first instruction, the address of the last
+        instruction and the number of lines of the part.
+    """
+
+    file, start, end = part
+    successors: Dict[int, List[int]] = {}
+    counts: Dict[int, int] = {}
+    first: Optional[int] = None
+    previous: Optional[int] = None
+    lines = 0
+
+    for line in read_lines(file, start = start, end = end):
+        lines += 1
+        address = parse_pc(line)
+        if address is None:
+            continue
+
+        if previous is None:
+            first = address
+        elif previous in sources:
+            targets = successors.setdefault(previous, [])
+            if address not in targets:
+                targets.append(address)
+
+        if address in sources:
+            counts[address] = counts.get(address, 0) + 1
+
+        previous = address
+
+    return successors, counts, first, previous, lines
+
+
+def _transition_part(part: Tuple[str, int, Optional[int]], controls: frozenset) -> tuple:
+    """Finds the transitions of a part of a trace file.
+
+    This function is executed by the worker processes.
+
+    Returns
+    -------
+    tuple
+        The transitions of the part with their execution counts, the address
+        of the first instruction, the address of the last instruction and the
+        number of lines of the part.
+    """
+
+    file, start, end = part
+    transitions: Dict[Tuple[int, int], int] = {}
+    first: Optional[int] = None
+    previous: Optional[int] = None
+    lines = 0
+
+    for line in read_lines(file, start = start, end = end):
+        lines += 1
+        address = parse_pc(line)
+        if address is None:
+            continue
+
+        if previous is None:
+            first = address
+        elif previous in controls or not 0 <= address - previous <= MAX_INSTRUCTION_SIZE:
+            # Only the first micro operation of an instruction has an address,
+            # see `parse_pc`.
+            transition = (previous, address)
+            transitions[transition] = transitions.get(transition, 0) + 1
+
+        previous = address
+
+    return transitions, first, previous, lines
 
-        with open(file) as f:
-            content = f.read()
-        f.closed
 
-        trace_content = content.splitlines()
+def is_transition(source: int, target: int, controls: frozenset) -> bool:
+    """Returns True if two addresses which follow each other in a trace file
+    are a transition of `TransitionIndex`."""
 
-        for line_no, line in enumerate(trace_content, 0):
-            tokens = line.split()
-            # If len(tokens) >= 4 means this a valid trace line.
-            if len(tokens) >= 4 and tokens[4][2:] == address:
-                tokens_target = trace_content[line_no + 1].split()
-                return tokens_target[4][2:]
+    return source in controls or not 0 <= target - source <= MAX_INSTRUCTION_SIZE
+
+
+def is_trace_file(file_name: str) -> bool:
+    """Returns True if the file name has one of the trace file extensions."""
+
+    return file_name.endswith(TRACE_EXTENSIONS)
+
+
+def read_trace(file: str, chunk_size: int = CHUNK_SIZE,
+               use_mmap: bool = False) -> Iterator[TraceRecord]:
+    """Reads a trace file record by record.
+
+    This is a generator. Only a chunk of the trace file is kept in memory at a
+    time, so trace files which do not fit in memory can be processed. The lines
+    which are not valid trace lines are skipped.
+
+    Parameters
+    ----------
+    file : str
+        Name of the trace file. Compressed trace files are decompressed while
+        they are read.
+    chunk_size : int
+        Size of the chunks which are read from the trace file, in bytes.
+    use_mmap : bool
+        Map the trace file into memory instead of reading it. This is only
+        possible for trace files which are not compressed.
+
+    Yields
+    ------
+    TraceRecord
+        The parsed trace lines in the order of the trace file.
+    """
+
+    for line in read_lines(file, chunk_size, use_mmap):
+        record = parse_record(line)
+        if record is not None:
+            yield record
+
+
+def read_lines(file: str, chunk_size: int = CHUNK_SIZE, use_mmap: bool = False,
+               start: int = 0, end: Optional[int] = None) -> Iterator[str]:
+    """Reads a trace file line by line in chunks of bounded size.
+
+    Parameters
+    ----------
+    file : str
+        Name of the trace file.
+    chunk_size : int
+        Size of the chunks which are read from the trace file, in bytes.
+    use_mmap : bool
+        Map the trace file into memory instead of reading it. Ignored for
+        compressed trace files.
+    start : int
+        Start offset of the byte range which will be read. The line which
+        includes the start offset belongs to the previous byte range, unless
+        the line starts at the start offset.
+    end : int or None
+        End offset of the byte range which will be read. The lines which start
+        before the end offset are read. None for the end of the file.
+
+    Yields
+    ------
+    str
+        The lines of the trace file without the line endings.
+    """
+
+    # The incomplete last line of the previous chunk.
+    remainder = b''
+
+    # Offset of the next line in the trace file.
+    offset = max(0, start - 1)
+
+    # Reading starts one byte before the start offset. The first line is the
+    # end of a line of the previous byte range, or empty if a line starts at
+    # the start offset.
+    skip = start > 0
+
+    for chunk in _read_chunks(file, chunk_size, use_mmap, offset):
+        lines = (remainder + chunk).split(b'\n')
+        remainder = lines.pop()
+        for line in lines:
+            if end is not None and offset >= end:
+                return
+            offset += len(line) + 1
+
+            if skip:
+                skip = False
+                continue
+
+            # Trace files are ASCII. latin-1 decodes every byte.
+            yield line.decode('latin-1').rstrip('\r')
+
+    if remainder and not skip and (end is None or offset < end):
+        yield remainder.decode('latin-1').rstrip('\r')
+
+
+def _read_chunks(file: str, chunk_size: int, use_mmap: bool,
+                 offset: int = 0) -> Iterator[bytes]:
+    """Yields the contents of a trace file in chunks starting from an offset."""
+
+    if use_mmap and not _is_compressed(file):
+        with open(file, 'rb') as f:
+            # Empty files can not be mapped.
+            if f.seek(0, 2) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ) as m:
+                for position in range(offset, len(m), chunk_size):
+                    yield m[position : position + chunk_size]
+        return
+
+    with open_trace(file) as f:
+        if offset:
+            f.seek(offset)
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _is_compressed(file: str) -> bool:
+    """Returns True if the trace file is compressed."""
+
+    return not file.endswith(".trc")
+
+
+def open_trace(file: str):
+    """Opens a trace file for reading in binary mode.
+
+    The compression of the trace file is detected from its extension.
+
+    Raises
+    ------
+    Exception
+        If the trace file is compressed with zstd and the zstandard package is
+        not installed.
+    """
+
+    if file.endswith(".gz"):
+        return gzip.open(file, 'rb')
+    elif file.endswith((".xz", ".lzma")):
+        return lzma.open(file, 'rb')
+    elif file.endswith(".bz2"):
+        return bz2.open(file, 'rb')
+    elif file.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise Exception("The zstandard package is required to read the "
+                            "trace file: " + file)
+        return zstandard.open(file, 'rb')
+    else:
+        return open(file, 'rb')
+
+
+def get_next_address(address: str,  trace_files: list) -> str:
+    """Detects the line which includes the address. Then returns the 
+    address of the following line in trace file.
+
+    This function reads the trace files for a single address. The analysis
+    uses a `SuccessorIndex` which is built once for all of the indirect jump
+    instructions.
+    """
 
-    raise Exception('The address could not be found in the trace files.')              
+    return SuccessorIndex([int(address, 16)], trace_files).get_next_address(address)
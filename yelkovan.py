@@ -17,12 +17,28 @@ the following steps:
 objdump tool which is delivered with the RISC-V compiler toolchain.
 2. Give ".dump" extension to the assembly file.
 3. Create trace files of the program by using gem5 architecture simulator.
-4. Give ".trc" extension to the trace files.
+4. Give ".trc" extension to the trace files. Compressed trace files with
+".trc.gz", ".trc.xz", ".trc.bz2" or ".trc.zst" extensions are also accepted.
 5. Put above mentioned files to the working directory of Yelkovan.
 6. Run Yelkovan.
 7. The text outuput is going to be shown in command line interface, and the
 graphical output is created as a pdf file in the working directory.
 
+The Graphviz layout of the graphical output takes long for large programs. With
+the "--format" option the control flow graph is written as JSON, JSON lines or
+DOT text without a layout, and a figure is rendered only if "--render" is
+given.
+
+Yelkovan can also be used as a library. An `Analyzer` owns the state of the
+analysis of a program and its `analyse` method returns an `AnalysisResult`,
+so many programs can be analysed in the same process. The control flow graph
+of the result is a compact array based graph (see cfg_tools.py), and it is
+converted to a networkx graph only when it is asked for.
+
+With the "--dynamic" option only the executed basic blocks and edges are found.
+The control flow graph is created from a single pass over the trace files by a
+`DynamicAnalyzer`, and the functions are not traversed.
+
 Yelkovan Defaults
 - Line numbers in Yelkovan starts with 0.
 - Addresses of instructions are in hexadecimal format and does not include
@@ -38,69 +54,262 @@ import asm_tools
 # trace files.
 import trace_tools
 
+# Cache tools of Yelkovan which keep the parsed input files in a persistent
+# cache.
+import cache_tools
 
-# Type hints support regarding collections
-from typing import List, Set, Dict, Tuple, Optional
+# Summaries of the functions are reused across analyses and programs.
+import summary_tools
 
-# List sorting
-from operator import itemgetter
+# The basic blocks of the previous analysis of a program are reused.
+import incremental_tools
 
-# Directory listing
-from os import linesep, listdir
+# Output tools of Yelkovan which write the control flow graph without a graph
+# layout.
+import output_tools
 
-# Graph operations
-import networkx
-from networkx.drawing.nx_agraph import graphviz_layout, to_agraph
+# CFG tools of Yelkovan which include the compact control flow graph.
+import cfg_tools
 
-# Graph visualization
-import pygraphviz
 
+# Type hints support regarding collections
+from typing import List, Set, Dict, Tuple, Optional, Sequence, TYPE_CHECKING
+
+# Directory listing
+from os import cpu_count, linesep, listdir, path
+
+# Command line arguments
+import argparse
 
+# The module of Yelkovan for the profiler
+import sys
 
-# Line numbers of starting points of basic blocks.
-# In this list each item represents the start of a basic block.
-start_list: List[int] = []
+# Output of the worker processes which detect functions
+import contextlib
+import io
+
+# Graph operations and graph visualization. networkx and pygraphviz take long to
+# import, so they are imported when the graph is created or rendered. Runs which
+# only show the help or fail early do not import them, and pygraphviz is only
+# imported when a figure is rendered.
+if TYPE_CHECKING:
+    import networkx
 
-# Line numbers of end points and line numbers of targets of basic blocks.
-# In this list each item represents the end of a basic block. The first element
-# of the item is the line number of the end of a basic block. The other elements 
-# (if present) of the item represent the targets of the basic block.
-end_list: List[List[int]] = []
 
-# This is the stack like data structure which holds the starting line numbers
-# of functions which will be visited and processed for basic block
-# detection. During the analysis when we encounter a function we add it to this
-# list. When we visit a function we pop that function from this list.
-will_be_visited_fn_list = []
 
 # Conditional branch instructions
-branch_inst = ["beq", "bne", "blt", "bltu", "bge", "bgeu", "beqz", "bnez",
-    "bltz", "blez", "bgtz", "bgez", "bgt", "bgtu", "ble", "bleu"]
+branch_inst = asm_tools.branch_inst
 
 # Unconditional jump instruction
-jump_inst = ["ret", "jal", "j", "jalr", "jr"]
+jump_inst = asm_tools.jump_inst
 
+# Profiles which can be added to the control flow graph. See profile_tools.py.
+PROFILES = ("counts", "time", "memory")
 
-# The set of nodes which have already been added to the the control flow graph 
-# of the program.
-# Each item in the set is an integer which represents the starting point of a 
-# basic block. By the help of this set, we know if a node is already in the 
-# control flow graph or not. We use this set in the creation of the control
-# flow graph to prevent duplicate entries.
-cfg_set = set()
+# The functions are detected by worker processes only if the program has at
+# least this many functions, since starting the workers takes long.
+MIN_PARALLEL_FUNCTIONS = 256
 
+# Maximum number of functions which are processed by a worker in a task.
+TASK_FUNCTIONS = 64
 
-# Starting line number of the root node of the graph.
-root_node = 0
+# Analyzer of the worker processes which detect the basic blocks of functions.
+_worker_analyzer: Optional["Analyzer"] = None
 
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
     """Main function of Yelkovan.
 
     This function is called by the entry point of the Yelkovan. This function
     searches the current directory for assembly file and trace files of the
     program and then calls analyse function for program structure analysis.
+
+    In batch mode many programs are analysed concurrently. Each program is in
+    its own directory which includes an assembly file and trace files. The
+    directories are given on the command line (--batch) or listed in a manifest
+    file (--manifest). See batch_tools.py.
+
+    Parameters
+    ----------
+    argv : list of str or None
+        Command line arguments. The arguments of the process are used if None.
+    """
+
+    parser = argparse.ArgumentParser(
+        description = "Detects basic blocks of a RISC-V program and creates "
+                      "its control flow graph.")
+    parser.add_argument("--jobs", type = int, default = cpu_count() or 1,
+                        help = "number of worker processes (default: number "
+                               "of cores)")
+    batch = parser.add_mutually_exclusive_group()
+    batch.add_argument("--batch", nargs = "+", metavar = "DIRECTORY",
+                       help = "analyse the programs in the given directories")
+    batch.add_argument("--manifest", metavar = "FILE",
+                       help = "analyse the programs in the directories listed "
+                              "in the file, one directory per line")
+    parser.add_argument("--timeout", type = float, default = None,
+                        help = "batch mode: time limit of each program in "
+                               "seconds")
+    parser.add_argument("--program-jobs", type = int, default = 1,
+                        help = "batch mode: number of worker processes of each "
+                               "program (default: %(default)s)")
+    parser.add_argument("--cache-dir", default = None,
+                        help = "keep the parsed assembly and trace files in a "
+                               "persistent cache in this directory; set "
+                               "YELKOVAN_CACHE_KEY to the same secret on the "
+                               "machines which share the directory")
+    parser.add_argument("--cache-size", type = int,
+                        default = cache_tools.DEFAULT_MAX_SIZE >> 20,
+                        help = "size limit of the cache in MiB (default: "
+                               "%(default)s)")
+    parser.add_argument("--incremental", action = "store_true",
+                        help = "reuse the basic blocks of the functions which "
+                               "did not change since the previous analysis of "
+                               "the assembly file, kept in the cache "
+                               "(requires --cache-dir)")
+    parser.add_argument("--dynamic", action = "store_true",
+                        help = "create the control flow graph of the executed "
+                               "basic blocks and edges from a single pass over "
+                               "the trace files, without the traversal of the "
+                               "functions")
+    parser.add_argument("--output-dir", default = None,
+                        help = "batch mode: directory of the control flow "
+                               "graphs and the summary, with a subdirectory "
+                               "per program (default: the directory of each "
+                               "program)")
+    parser.add_argument("--format", choices = output_tools.OUTPUT_FORMATS,
+                        default = None,
+                        help = "write the control flow graph in this format "
+                               "without a graph layout (batch mode default: "
+                               "dot)")
+    parser.add_argument("--output", default = None, metavar = "FILE",
+                        help = "file of the control flow graph written with "
+                               "--format (default: standard output)")
+    parser.add_argument("--counts", action = "store_true",
+                        help = "add the execution counts of the basic blocks "
+                               "and edges in the trace files to the control "
+                               "flow graph")
+    parser.add_argument("--time", action = "store_true",
+                        help = "add the simulation ticks spent in the basic "
+                               "blocks and functions to the control flow graph")
+    parser.add_argument("--memory", action = "store_true",
+                        help = "add the loads, stores, bytes and distinct cache "
+                               "lines of the basic blocks and functions in the "
+                               "trace files to the control flow graph")
+    parser.add_argument("--flamegraph", default = None, metavar = "FILE",
+                        help = "write the simulation ticks of the call stacks "
+                               "in collapsed stack format for flame graph "
+                               "tools (batch mode: any value writes "
+                               "<name>_stacks.folded per program)")
+    parser.add_argument("--render", choices = output_tools.RENDER_FORMATS,
+                        default = None,
+                        help = "render the control flow graph as a figure "
+                               "to cfg.<format>")
+    parser.add_argument("--profile", nargs = "?", const = "-", default = None,
+                        metavar = "FILE",
+                        help = "print the wall time and calls of the phases of "
+                               "the analysis, the peak memory and the "
+                               "throughput to the standard error, and write "
+                               "them as JSON to FILE if given")
+    parser.add_argument("--profile-stats", default = None, metavar = "FILE",
+                        help = "profile the analysis with cProfile and write "
+                               "the statistics in pstats format to FILE")
+    arguments = parser.parse_args(argv)
+
+    if ((arguments.profile or arguments.profile_stats)
+            and (arguments.batch or arguments.manifest)):
+        parser.error("--profile and --profile-stats are not supported in batch "
+                     "mode")
+
+    if arguments.incremental and arguments.cache_dir is None:
+        parser.error("--incremental requires --cache-dir")
+
+    if arguments.incremental and (arguments.batch or arguments.manifest):
+        parser.error("--incremental is not supported in batch mode")
+
+    if arguments.dynamic and (arguments.batch or arguments.manifest):
+        parser.error("--dynamic is not supported in batch mode")
+
+    if arguments.dynamic and arguments.incremental:
+        parser.error("--dynamic and --incremental cannot be used together")
+
+    profiles = [profile for profile in PROFILES if getattr(arguments, profile)]
+
+    if arguments.batch or arguments.manifest:
+        # Batch tools are only needed in batch mode.
+        import batch_tools
+
+        directories = arguments.batch
+        if arguments.manifest:
+            directories = batch_tools.read_manifest(arguments.manifest)
+
+        summary = batch_tools.run_batch(directories, arguments.jobs,
+                                        arguments.timeout, arguments.output_dir,
+                                        arguments.cache_dir,
+                                        arguments.cache_size << 20,
+                                        arguments.format or "dot",
+                                        profiles, arguments.flamegraph is not None,
+                                        arguments.program_jobs)
+        batch_tools.print_summary(summary)
+        return
+
+    assembly_file, trace_files = find_input_files("./")
+
+    cache = None
+    if arguments.cache_dir is not None:
+        cache = cache_tools.Cache(arguments.cache_dir, arguments.cache_size << 20)
+
+    # Without an output option the text output and the pdf figure are created.
+    output_format = arguments.format
+    render_format = arguments.render
+    if output_format is None and render_format is None:
+        output_format = "dot"
+        render_format = "pdf"
+
+    profiler = None
+    if arguments.profile or arguments.profile_stats:
+        # Timing tools are only needed for profiling.
+        import timing_tools
+
+        profiler = timing_tools.Profiler(arguments.profile_stats)
+        profiler.instrument_analysis(sys.modules[__name__])
+        profiler.start()
+
+    try:
+        # The trace files are read by a worker process per core.
+        analyse(assembly_file, trace_files, arguments.jobs, cache, output_format,
+                arguments.output, render_format, profiles, arguments.flamegraph,
+                arguments.incremental, arguments.dynamic)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            report = profiler.report()
+            timing_tools.print_report(report)
+            if arguments.profile not in (None, "-"):
+                timing_tools.write_report(report, arguments.profile)
+
+
+def find_input_files(directory: str) -> Tuple[str, List[str]]:
+    """Finds the assembly file and trace files of a program in a directory.
+
+    If there are more than one assembly file, the last one which is listed is
+    used.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the program.
+
+    Returns
+    -------
+    tuple
+        Name of the assembly file and sorted list of names of the trace files.
+
+    Raises
+    ------
+    Exception
+        If the assembly file or the trace files are not found.
     """
 
     # Assembly file
@@ -111,33 +320,41 @@ def main() -> None:
 
 
     # listdir function returns a list of strings which represent file names.
-    for file_name in listdir("./"):
-        if file_name.endswith(".trc"):
-            trace_files.append(file_name)
+    for file_name in listdir(directory):
+        if trace_tools.is_trace_file(file_name):
+            trace_files.append(path.join(directory, file_name))
         elif file_name.endswith(".dump"):
-            assembly_file = file_name
+            assembly_file = path.join(directory, file_name)
 
     # If there is no trace file, raise exception.
     if not trace_files:
         raise Exception("Trace files are not found. Please make sure at least a "
                         "trace file is present with \".trc\" extension in the "
-                        "current working directory.")
+                        "directory: " + directory)
 
     # If there is no assembly file, raise exception.
     if assembly_file == None:
         raise Exception("Assembly file is not found. Please make sure an assembly " 
-                        "file is present with \".dump\" extension in the current "
-                        "working directory.")
-
+                        "file is present with \".dump\" extension in the "
+                        "directory: " + directory)
 
-    analyse(assembly_file, trace_files)
+    return assembly_file, sorted(trace_files)
 
 
-def analyse(assembly_file: str, trace_files: list) -> None:
+def analyse(assembly_file: str, trace_files: list, jobs: int = 1,
+            cache: Optional[cache_tools.Cache] = None,
+            output_format: Optional[str] = "dot",
+            output_file: Optional[str] = None,
+            render_format: Optional[str] = "pdf",
+            profiles: Sequence[str] = (),
+            flamegraph_file: Optional[str] = None,
+            incremental: bool = False,
+            dynamic: bool = False) -> "AnalysisResult":
     """Analyses the contents of the assembly file.
 
     This function is the main function who starts and manages basic block
-    detection operation.
+    detection operation. By default the control flow graph is outputted to
+    command line as text and to "cfg.pdf" file as figure.
 
     Parameters
     ----------
@@ -145,600 +362,1298 @@ def analyse(assembly_file: str, trace_files: list) -> None:
         Name of the assembly file of the program.
     trace_files : list of str
         List of names of the trace files of the program.
-    """
+    jobs : int
+        Number of worker processes which read the trace files.
+    cache : Cache or None
+        Persistent cache of the parsed assembly file and trace files.
+    output_format : str or None
+        Format of the text output, one of "json", "jsonl" and "dot". The "dot"
+        text is the text of pygraphviz if the graph is also rendered. No text
+        output if None.
+    output_file : str or None
+        File of the text output. The standard output is used if None.
+    render_format : str or None
+        Format of the figure, one of "pdf", "svg" and "png". The figure is
+        written to "cfg.<format>" file. The graph layout is computed only if a
+        figure is rendered. No figure if None.
+    profiles : sequence of str
+        Profiles of the trace files which are added to the control flow graph.
+        See add_profiles.
+    flamegraph_file : str or None
+        File of the simulation ticks of the call stacks in collapsed stack
+        format. Not written if None.
+    incremental : bool
+        Reuse the results of the functions which did not change since the
+        previous analysis. Requires a cache.
+    dynamic : bool
+        Find only the executed basic blocks and edges with a `DynamicAnalyzer`.
 
+    Returns
+    -------
+    AnalysisResult
+        Basic blocks and control flow graph of the program.
+    """
 
-    visited_fn_list = []
+    if dynamic:
+        analyzer = DynamicAnalyzer.from_files(assembly_file, trace_files, jobs,
+                                              cache)
+        result = analyzer.analyse()
+    else:
+        analyzer = Analyzer.from_files(assembly_file, trace_files, jobs, cache,
+                                       incremental)
+        result = analyzer.analyse(jobs)
+
+    if profiles or flamegraph_file is not None:
+        time_profile = add_profiles(result, profiles, trace_files, jobs,
+                                    analyzer.assembly_code,
+                                    flamegraph_file is not None).get("time")
+        if flamegraph_file is not None:
+            time_profile.write_collapsed(flamegraph_file)
+
+    dot_file = None
+    if output_format == "dot" and render_format is not None:
+        # The text of pygraphviz is kept, since the graph is converted anyway.
+        dot_file = "-" if output_file is None else output_file
+    elif output_format is not None:
+        output_tools.write_cfg(result.graph, output_format, output_file,
+                               result.root_node)
+
+    # Graph visualization
+    if render_format is not None:
+        output_tools.render_cfg(result.cfg, 'cfg.' + render_format,
+                                render_format, dot_file)
+
+    return result
+
+
+
+def add_profiles(result: "AnalysisResult", profiles: Sequence[str],
+                 trace_files: list, jobs: int,
+                 assembly_code: asm_tools.AssemblyIndex,
+                 time: bool = False) -> dict:
+    """Adds profiles of the trace files to the control flow graph.
+
+    The profiles are:
+
+    - "counts": The nodes get the execution counts and the edges get the
+    traversal counts as weights. The blocks which end with a branch
+    instruction also get their taken and fall through counts.
+    - "time": The nodes get their exclusive and inclusive simulation ticks,
+    and the "functions" table with the ticks of the functions is added.
+    - "memory": The nodes get their loads, stores, loaded and stored bytes and
+    distinct cache lines, and the "memory" table with the memory accesses of
+    the functions is added.
+
+    The trace files are read once for all of the profiles.
 
-    global start_list
-    global end_list
-    global will_be_visited_fn_list
+    Parameters
+    ----------
+    result : AnalysisResult
+        Result of the analysis of the program.
+    profiles : sequence of str
+        Names of the profiles, some of PROFILES.
+    trace_files : list of str
+        List of names of the trace files of the program.
+    jobs : int
+        Number of worker processes which read the trace files.
+    assembly_code : AssemblyIndex
+        Index of the assembly code of the program.
+    time : bool
+        Create the "time" profile even if it is not added to the graph, like
+        for the call stacks of a flame graph.
 
+    Returns
+    -------
+    dict
+        The profile objects of profile_tools, keyed by the names of the
+        profiles.
+
+    Raises
+    ------
+    Exception
+        If a profile is not known.
+    """
 
-    with open(assembly_file) as f:
-        content = f.read()
-    f.closed
+    # Profile tools are only needed for the profiles.
+    import profile_tools
 
-    assembly_code = content.splitlines()
+    for name in profiles:
+        if name not in PROFILES:
+            raise Exception("Unknown profile: " + name + ". The profile should "
+                            "be one of: " + ", ".join(PROFILES))
 
+    # The profiles share one pass over the trace files.
+    names = list(profiles) + (["time"] if time else [])
+    created = profile_tools.collect_profiles(result.graph, assembly_code,
+                                             trace_files, jobs, names)
 
-    # Find main function and add to it to the will be visited function list.
-    # It is the first function in this list.
-    line_no = asm_tools.get_function_start("main", assembly_code)
-    will_be_visited_fn_list.append(line_no)
+    for name in profiles:
+        created[name].annotate(result.graph)
 
-    while(will_be_visited_fn_list):
+    return created
 
-        line_no = will_be_visited_fn_list.pop()
 
-        # If the starting line number of the function is not in visited function
-        # list then add it to the list and process the related function.
-        if (line_no not in visited_fn_list):
-            visited_fn_list.append(line_no)
-            process_fn(line_no, assembly_code, trace_files)
 
-    # Sort start list.
-    start_list = sorted(start_list)
+class AnalysisResult:
+    """Result of the analysis of a program.
 
-    end_list.sort(key = itemgetter(0))
-    #print(f"End list: {end_list}")
-    # After making sure duplicate items are not in the end_list remove remove_duplicates function.
-    #remove_duplicates()    
-    #print(f"End list: {end_list}")
-    check_targets(assembly_code)
+    Attributes
+    ----------
+    start_list : list of int
+        Sorted line numbers of starting points of basic blocks.
+    end_list : list of list of int
+        Sorted end points of basic blocks. The first element of each item is
+        the line number of the end of a basic block. The other elements (if
+        present) of the item are the targets of the basic block. The items with
+        the same index in start_list and end_list represent the same basic block.
+    root_node : int
+        Starting line number of the root node of the graph, which is the first
+        instruction of the main function.
+    graph : CompactCFG
+        Control flow graph of the program.
+    cfg : networkx.DiGraph
+        Control flow graph of the program as a networkx graph. It is created
+        from `graph` when it is used for the first time.
+    """
 
+    def __init__(self, start_list: List[int], end_list: List[List[int]],
+                 root_node: int, graph: cfg_tools.CompactCFG):
+        self.start_list: List[int] = start_list
+        self.end_list: List[List[int]] = end_list
+        self.root_node: int = root_node
+        self.graph: cfg_tools.CompactCFG = graph
+        self._cfg: Optional["networkx.DiGraph"] = None
 
-    if (len(start_list) != len(end_list)):
-        raise Exception("Error: Lengths of the start list and end list do not match!")
 
-    # Create directed graph.
-    cfg = networkx.DiGraph()
-    root_node = asm_tools.get_function_start('main', assembly_code)
-    create_di_graph(cfg, -1, root_node)
+    @property
+    def cfg(self) -> "networkx.DiGraph":
+        if self._cfg is None:
+            self._cfg = self.graph.to_networkx()
 
-    # Configure the graph.
-    cfg.graph['node']={'shape':'box', 'fontname':'sans', 'margin':'0.07', 'width':'0.1', 'height':'0.1'}
-    # cfg.graph['edges']={'arrowsize':'1.0'}
+        return self._cfg
 
-    cfg_graph = to_agraph(cfg)
-    print(cfg_graph)
-    cfg_graph.layout('dot')
-    cfg_graph.draw('cfg.pdf')
 
 
-def add_item_to_end_list(end_point: int, target: List[int] = None) -> None:
-    """Adds an item to the end list.
-    
-    Each item of this list may be a list depending on the end point.
-    The first element of the item is the line number of the end point of a basic 
-    block. The following elemnents of the item are the line numbers of targets
-    of the end point of the basic block. When the end point of a basic block is 
-    found this function is called to add it to start_list.
+class Analyzer:
+    """Basic block detector of a program.
 
-    This function first checks if the item is in the list or not.
-    
-    If the item is in the list its targets are checked not added. If the targets are also 
-    in the list this function returns. If the target(s) are not present they are 
-    added.
+    An analyzer owns the state of the analysis of a program. Therefore many
+    programs can be analysed in the same process, each by its own analyzer,
+    and the analysis of a program can be repeated by calling `analyse` again.
 
-    If the item is not in the list, it is added with all of its targets.
+    A sample usage is:
 
-    This function does not return a value.
-    
+        result = Analyzer.from_files("loop_test.dump", ["loop_test.trc"]).analyse()
+        print(list(result.graph.nodes()))
 
-    Parameters
+    Attributes
     ----------
-    end_point: int
-        The line number of the end of a basic block which will be added to
-        start_list.
-    target: list of int
-        The list of line numbers of the targets of the end point.
+    assembly_code : AssemblyIndex
+        Assembly code of the program.
+    trace_index : SuccessorIndex
+        Successors of the indirect jump instructions in the trace files.
+    start_set : set of int
+        Line numbers of starting points of basic blocks. The starting points
+        are collected in this set during the detection.
+    end_dict : dict of int to dict of int to None
+        Line numbers of end points and line numbers of targets of basic
+        blocks. The keys are the line numbers of the end points and the values
+        are the targets of the end points. The targets are kept in insertion
+        order as the keys of a dictionary.
+    start_list : list of int
+        Sorted line numbers of starting points of basic blocks, created from
+        start_set after the detection.
+    end_list : list of list of int
+        Sorted end points of basic blocks, created from end_dict after the
+        detection. The first element of each item is the line number of the end
+        of a basic block. The other elements (if present) of the item represent
+        the targets of the basic block.
+    start_index : dict of int to int
+        Maps the starting point of each basic block to its index in start_list
+        and end_list.
+    will_be_visited_fn_list : list of int
+        This is the stack like data structure which holds the starting line
+        numbers of functions which will be visited and processed for basic
+        block detection. During the analysis when we encounter a function we
+        add it to this list. When we visit a function we pop that function from
+        this list.
+    root_node : int
+        Starting line number of the root node of the graph.
+    summaries : FunctionSummaries or None
+        Summaries of the functions. The functions are traversed instruction by
+        instruction if None.
+    history : FunctionHistory or None
+        Results of the functions in the previous analysis of the program. All
+        of the functions are processed if None.
+    indirect_targets : list of tuple or None
+        Addresses and target lines of the indirect jumps which are found by
+        `find_target` while a function is recorded in the history.
     """
 
-    global end_list
-    item_found: bool = False
-    item_no: int = -1
+    def __init__(self, assembly_code: asm_tools.AssemblyIndex,
+                 trace_index: trace_tools.SuccessorIndex,
+                 summaries: Optional[summary_tools.FunctionSummaries] = None,
+                 history: Optional[incremental_tools.FunctionHistory] = None):
+        """Creates an analyzer of a program.
+
+        Parameters
+        ----------
+        assembly_code : AssemblyIndex
+            Assembly code of the program.
+        trace_index : SuccessorIndex
+            Successors of the indirect jump instructions in the trace files.
+        summaries : FunctionSummaries or None
+            Summaries of the functions, which are reused by `process_fn`.
+        history : FunctionHistory or None
+            Results of the functions in the previous analysis of the program,
+            which are reused by `visit_functions`.
+        """
+
+        self.assembly_code: asm_tools.AssemblyIndex = assembly_code
+        self.trace_index: trace_tools.SuccessorIndex = trace_index
+        self.summaries: Optional[summary_tools.FunctionSummaries] = summaries
+        self.history: Optional[incremental_tools.FunctionHistory] = history
+        self.indirect_targets: Optional[List[tuple]] = None
+        self.reset()
+
+
+    @classmethod
+    def from_files(cls, assembly_file: str, trace_files: list, jobs: int = 1,
+                   cache: Optional[cache_tools.Cache] = None,
+                   incremental: bool = False) -> "Analyzer":
+        """Creates an analyzer from the assembly file and trace files.
+
+        Parameters
+        ----------
+        assembly_file : str
+            Name of the assembly file of the program.
+        trace_files : list of str
+            List of names of the trace files of the program.
+        jobs : int
+            Number of worker processes which read the trace files.
+        cache : Cache or None
+            Persistent cache of the assembly index, the trace index and the
+            summaries of the functions. If the files did not change since they
+            were cached, they are not parsed again.
+        incremental : bool
+            Reuse the results of the functions which did not change since the
+            previous analysis of the assembly file. The results are kept in
+            the cache.
+
+        Returns
+        -------
+        Analyzer
+            Analyzer of the program.
+
+        Raises
+        ------
+        Exception
+            If the incremental analysis is requested without a cache.
+        """
+
+        if incremental and cache is None:
+            raise Exception("Error: The incremental analysis requires a cache.")
+
+        assembly_code = None
+        trace_index = None
+
+        if cache is not None:
+            assembly_digest = cache.file_digest(assembly_file)
+            assembly_key = cache.key("assembly", assembly_digest)
+            # The source addresses of the trace index come from the assembly
+            # file, so the trace index depends on the assembly file as well.
+            trace_key = cache.key("successors", assembly_digest,
+                                  *[cache.file_digest(file) for file in trace_files])
+            assembly_code = cache.get(assembly_key)
+            trace_index = cache.get(trace_key)
+
+        if assembly_code is None:
+            # The index is built once and used by all of the address lookups.
+            # The lines of the assembly file are decoded into the instruction
+            # table and are not kept.
+            assembly_code = asm_tools.AssemblyIndex.from_file(assembly_file)
+            if cache is not None:
+                cache.put(assembly_key, assembly_code)
+
+        if trace_index is None:
+            # Targets of the indirect jump instructions are found in the trace
+            # files. Collect the indirect jump instructions first and read the
+            # trace files once for all of them.
+            indirect_jumps = assembly_code.find_instructions(['jr', 'jalr'])
+            trace_index = trace_tools.SuccessorIndex(indirect_jumps, trace_files, jobs)
+            if cache is not None:
+                cache.put(trace_key, trace_index)
+
+        summaries = None
+        if cache is not None:
+            summaries = summary_tools.FunctionSummaries(cache, assembly_digest)
+
+        history = None
+        if incremental:
+            history = incremental_tools.FunctionHistory(cache, assembly_file)
+
+        return cls(assembly_code, trace_index, summaries, history)
+
+
+    def reset(self) -> None:
+        """Clears the state of the analysis."""
+
+        self.start_set: Set[int] = set()
+        self.end_dict: Dict[int, Dict[int, None]] = {}
+        self.start_list: List[int] = []
+        self.end_list: List[List[int]] = []
+        self.start_index: Dict[int, int] = {}
+        self.will_be_visited_fn_list: List[int] = []
+        self.root_node: int = 0
+
+
+    def analyse(self, jobs: int = 1) -> AnalysisResult:
+        """Detects the basic blocks and creates the control flow graph.
+
+        Parameters
+        ----------
+        jobs : int
+            Number of worker processes which detect the basic blocks of the
+            functions. See `visit_functions`.
+
+        Returns
+        -------
+        AnalysisResult
+            Basic blocks and control flow graph of the program.
+        """
+
+        self.reset()
+
+        self.visit_functions(jobs)
+
+        self.check_targets()
+
+        # Sort the starting points and end points of basic blocks.
+        self.finalise_lists()
+
+        graph = self.create_graph()
+
+        return AnalysisResult(self.start_list, self.end_list, self.root_node, graph)
+
+
+    def visit_functions(self, jobs: int = 1) -> None:
+        """Detects the basic blocks of the functions which are reachable from main.
 
-    # Check if the end_point is alread in the end_list.
-    for item in end_list:
-        if item[0] == end_point:
-            item_found = True
-            break
+        The functions are processed by `process_fn` starting with the main
+        function. The functions which are called by a processed function are
+        added to will_be_visited_fn_list and processed in turn.
 
-    # If the list is empty or the end_point is not in the list add it.
-    if item_found == False:
-        end_list.append([end_point])
+        If there are more than one job and the program has at least
+        MIN_PARALLEL_FUNCTIONS functions, the functions are processed by
+        worker processes. See `visit_functions_parallel`.
 
-    # If there is no target information there is nothing more to do. Just return.
-    if target is None:
-        return
+        If the analyzer has a history, the results of the functions which did
+        not change since the previous analysis are reused. See
+        `visit_function`. If the analyzer has the summaries of the functions,
+        the summaries are reused. The history and the summaries are used only
+        by the sequential detection.
 
-    # Find the index of the end_point.
-    for index, item in enumerate(end_list):
-        if item[0] == end_point:
-            item_no = index
-            break
+        This function does not return a value.
 
-    # Add targets to the end_point.
-    for target_item in target:
-        if target_item not in end_list[item_no]:
-            end_list[item_no].append(target_item)                
+        Parameters
+        ----------
+        jobs : int
+            Number of worker processes.
+        """
 
+        if (jobs > 1 and self.history is None and self.summaries is None
+                and len(self.assembly_code.functions) >= MIN_PARALLEL_FUNCTIONS):
+            self.visit_functions_parallel(jobs)
+            return
 
+        visited_fn_list = set()
+
+        if self.history is not None:
+            self.history.prepare(self.assembly_code)
+
+        # Find main function and add to it to the will be visited function list.
+        # It is the first function in this list.
+        line_no = asm_tools.get_function_start("main", self.assembly_code)
+        self.will_be_visited_fn_list.append(line_no)
+
+        # The hashes of the functions which the last analysis of the same
+        # assembly file reached, and their summaries, are read from the cache
+        # at once. The other functions are hashed and read when they are
+        # reached, so the unreachable functions are not hashed. With the
+        # history of a previous analysis only the changed functions are
+        # processed, and their summaries are read one by one.
+        if (self.summaries is not None
+                and (self.history is None or not self.history.previous)):
+            self.summaries.prefetch_program(self.assembly_code.instructions)
+
+        while(self.will_be_visited_fn_list):
+
+            line_no = self.will_be_visited_fn_list.pop()
+
+            # If the starting line number of the function is not in visited
+            # function list then add it to the list and process the related
+            # function.
+            if (line_no not in visited_fn_list):
+                visited_fn_list.add(line_no)
+                if (self.history is None):
+                    self.process_fn(line_no)
+                else:
+                    self.visit_function(line_no)
+
+        if self.summaries is not None:
+            self.summaries.save()
+
+        if self.history is not None:
+            self.history.save()
+
+
+    def visit_function(self, line_no: int) -> None:
+        """Detects the basic blocks of a function with the history.
+
+        If the function and the functions which it refers to did not change
+        since the previous analysis, its result is taken from the history.
+        Otherwise it is processed by `process_fn` and its result is recorded
+        in the history. The result is merged in the same order as the results
+        of `visit_functions_parallel`.
+
+        This function does not return a value.
+
+        Parameters
+        ----------
+        line_no : int
+            Starting line number of the function.
+        """
+
+        result = self.history.replay(line_no, self.find_target)
+
+        if result is None:
+            state = (self.start_set, self.end_dict, self.will_be_visited_fn_list)
+            self.start_set, self.end_dict, self.will_be_visited_fn_list = set(), {}, []
+            self.indirect_targets = []
+            try:
+                self.process_fn(line_no)
+                result = (self.start_set, self.end_dict, self.will_be_visited_fn_list)
+                self.history.record(line_no, *result, self.indirect_targets)
+            finally:
+                self.start_set, self.end_dict, self.will_be_visited_fn_list = state
+                self.indirect_targets = None
+
+        # The targets of an end point never include the end point, so they are
+        # added without the checks of add_item_to_end_list.
+        starts, ends, callees = result
+        self.start_set.update(starts)
+        for end_point, targets in ends.items():
+            self.end_dict.setdefault(end_point, {}).update(targets)
+        self.will_be_visited_fn_list.extend(callees)
+
+
+    def visit_functions_parallel(self, jobs: int) -> None:
+        """Detects the basic blocks of the reachable functions in parallel.
+
+        The basic blocks of a function do not depend on the other functions.
+        Therefore the functions are processed by `process_fn` in worker
+        processes, and each of them returns the starting points, the end
+        points and the called functions of a function. The results are merged
+        in the order of the sequential traversal, so start_set, end_dict and
+        the order of the targets are the same as in the sequential detection.
+        An error of a function is raised when the function is merged.
+
+        The called functions are sent to the workers as soon as the function
+        which calls them is processed, before the results of the functions
+        before it are merged. A worker also processes the functions which are
+        called by its functions, up to TASK_FUNCTIONS functions per task.
+
+        This function does not return a value.
+
+        Parameters
+        ----------
+        jobs : int
+            Number of worker processes.
+        """
+
+        # Parallel detection of functions
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        visited_fn_list = set()
+        results: Dict[int, tuple] = {}
+        requested: Set[int] = set()
+        pending = set()
+
+        with ProcessPoolExecutor(max_workers = jobs, initializer = _init_worker,
+                                 initargs = (self.assembly_code,
+                                             self.trace_index)) as executor:
+
+            def submit(line_nos: List[int]) -> None:
+                line_nos = [line_no for line_no in dict.fromkeys(line_nos)
+                            if line_no not in requested]
+                requested.update(line_nos)
+                for index in range(0, len(line_nos), TASK_FUNCTIONS):
+                    pending.add(executor.submit(_detect_functions,
+                                                line_nos[index : index + TASK_FUNCTIONS]))
+
+            def collect(future) -> None:
+                pending.discard(future)
+                callees = []
+                for line_no, result in future.result().items():
+                    if line_no not in results:
+                        results[line_no] = result
+                        requested.add(line_no)
+                        callees.extend(result[2])
+                submit(callees)
+
+            line_no = asm_tools.get_function_start("main", self.assembly_code)
+            submit([line_no])
+            self.will_be_visited_fn_list.append(line_no)
+
+            while(self.will_be_visited_fn_list):
+
+                line_no = self.will_be_visited_fn_list.pop()
+
+                if (line_no in visited_fn_list):
+                    continue
+                visited_fn_list.add(line_no)
+
+                # The callees of the finished tasks are sent to the workers
+                # while waiting for the result of this function.
+                while line_no not in results:
+                    if line_no not in requested:
+                        submit([line_no])
+                    done, _ = wait(pending, return_when = FIRST_COMPLETED)
+                    for future in done:
+                        collect(future)
+
+                starts, ends, callees, output, error = results[line_no]
+                if output:
+                    print(output, end = "")
+                if error is not None:
+                    raise error
+
+                self.start_set.update(starts)
+                for end_point, targets in ends.items():
+                    self.add_item_to_end_list(end_point, list(targets))
+                self.will_be_visited_fn_list.extend(callees)
+
+
+    def create_graph(self) -> cfg_tools.CompactCFG:
+        """Creates the control flow graph from the sorted basic blocks.
+
+        This function is called after `finalise_lists`. The root node of the
+        graph is the first instruction of the main function.
+
+        Returns
+        -------
+        CompactCFG
+            Control flow graph of the program.
+
+        Raises
+        ------
+        Exception
+            If the lengths of the start list and the end list do not match.
+        """
+
+        if (len(self.start_list) != len(self.end_list)):
+            raise Exception("Error: Lengths of the start list and end list do not match!")
+
+        # Create directed graph. The graph attributes of Graphviz are set by
+        # cfg_tools.
+        self.root_node = asm_tools.get_function_start('main', self.assembly_code)
+
+        return cfg_tools.CompactCFG.from_blocks(self.start_list, self.end_list,
+                                                self.start_index, self.root_node,
+                                                self.assembly_code)
+
+
+    def process_fn(self, line_no: int) -> None:
+        """Detects basic blocks in a given funtion.
+
+        Traverses a function in the instruction table of the assembly code
+        instruction by instruction and detects basic blocks.
+
+        The traversal starts with the first instruction at the starting line
+        and continues while the instructions have the same function id. The
+        function id changes after an empty line, which is the end of the
+        function. The lines which are not valid instructions are not in the
+        instruction table.
+
+        If the line is a "ret" (return from subroutine) instruction starting and
+        end points of basic blocks are detected and written in start_set and
+        end_dict respectively.
+
+        If the line is a branch or jump instruction the related functions which
+        process them is called.
+
+        If the analyzer has summaries, only the branch and jump instructions
+        in the summary of the function are processed. The summary is created
+        by scanning the function once, and it is reused by the functions with
+        the same instructions.
+
+        This function does not return a value. Instead it adds the line numbers of
+        the detected starting and end points of basic blocks to the start_set and
+        end_dict.
+
+        Parameters
+        ----------
+        line_no : int
+            Starting line number of the function which is going to be processed.
+        """
 
-def add_item_to_start_list(starting_point: int) -> None:
-    """Adds an item to the start list.
-    
-    The item is the the line number of the starting point of the basic block. 
-    When the starting point of a basic block is found this function is called to
-    add it to start_list.
+        # Start of a funtion is always the start of a basic block.
+        self.add_item_to_start_list(line_no)
 
-    This function first checks if the item is already in the list or not. If 
-    the item is in the list it is not added. If it is not in the list it is 
-    added.
+        table = self.assembly_code.instructions
+        branch_ids = table.mnemonic_id_set(branch_inst)
+        jump_ids = table.mnemonic_id_set(jump_inst)
 
-    This function does not return a value.
-    
+        index = table.index_of_line(line_no)
+        if (index == len(table)):
+            return
 
-    Parameters
-    ----------
-    starting_point : int
-        The line number of the start of a basic block which will be added to
-        start_list.
-    """
+        if (self.summaries is not None):
+            summary = self.summaries.summary(table, index, branch_ids | jump_ids)
+            for offset in summary:
+                if (table.mnemonics[index + offset] in branch_ids):
+                    self.process_branch_inst(index + offset)
+                else:
+                    self.process_jump_inst(index + offset)
+            return
 
-    global start_list
+        function_id = table.function_ids[index]
 
-    # If the item is not already in the start_list add it.
-    if starting_point not in start_list:
-        start_list.append(starting_point)
+        while (index < len(table) and table.function_ids[index] == function_id):
+            mnemonic = table.mnemonics[index]
 
+            if (mnemonic in branch_ids):
+                self.process_branch_inst(index)
 
-def create_di_graph(cfg: networkx.DiGraph, previous_node: int, 
-                    current_node: int) -> None:
-    """Creates control flow graph of the program.
+            elif (mnemonic in jump_ids):
+                self.process_jump_inst(index)
 
-    Note: This function is a recursive function.
+            index = index + 1
 
-    In control flow graph a node represents a basic block, and an edge
-    represents the connection between two basic blocks. Starting line number of 
-    a basic block is the id of the node which represents that basic block.
 
-    Previous node and current node are id numbers of two nodes. In other words
-    they are starting line numbers of two basic blocks. Current node is the new 
-    node which will be added to the cfg. This function works as follows:
+    def process_branch_inst(self, instruction: int) -> None:
+        """Detects basic block starting and end points from given branch instruction.
 
-    1. It adds a new node to the cfg with the current_node id number. It updates
-    the information of the node with the values from start_list and end_list.
-    2. It adds an edge between the current node and previous node. Current node 
-    is one of the targets of previous node.
-    3. It checks the targets of the current node (newly added basic block) by
-    looking at end_list. If there is a target information it calls itself again. 
-    In the new call, the id number of newly added node (current_node) will be 
-    passed as previous_node argument, and the target of the newly added node 
-    will be passed as current_node argument.
-    
+        Processes a given branch instrcution. Depending on the instruction, it
+        detects the startng and end points of basic blocks. This is achieved by the 
+        help of the rule set.
 
-    Parameters
-    ----------
-    cfg : directed graph
-        This is the control flow graph of the program.
-    previous_node : int
-        The id number of the previous node. In other words the starting line
-        number of the previous basic block.
-    current_node : int
-        The id number of the current node. In other words the starting line
-        number of the current basic block. This node will be added to the
-        control flow graph.
-    """
+        This function does not return a value. Instead it adds the line numbers of
+        the detected starting and end points of basic blocks to the start_set and
+        end_dict.
 
-    index = 0
+        Parameters
+        ----------
+        instruction : int
+            Index of the branch instruction in the instruction table.
+        """
 
-    if (current_node in cfg_set) & (previous_node != -1):
-        cfg.add_edge(previous_node, current_node)
-        return
+        table = self.assembly_code.instructions
+        line_no = table.lines[instruction]
 
-    for i in range(0, len(start_list)):
-        if (start_list[i] == current_node):
-            index = i
+        # The last operand of a branch instruction is the target address.
+        target_line_no = self.assembly_code.address_to_line_no(table.targets[instruction])
 
-    cfg.add_node(current_node)
-    cfg_set.add(current_node)
+        # The line of the current branch instruction is the end of a basic block.
+        # Branch instructions have two targets.
+        # The subsequent line and the branch target are the targets of the branch
+        # instruction. We add all this together to the end list.
+        self.add_item_to_end_list(line_no, [line_no + 1, target_line_no])
 
-    if (previous_node != -1):
-        cfg.add_edge(previous_node, current_node)
 
-    cfg.nodes[current_node]['label'] = "Start: " + str(start_list[index]) + "; End: " + str(end_list[index][0])
-    cfg.nodes[current_node]['start'] = start_list[index]
-    cfg.nodes[current_node]['end'] = end_list[index][0]
-    cfg.nodes[current_node]['target1'] = "null"
-    cfg.nodes[current_node]['target2'] = "null"
+        # Previous line of the target of a branch instruction is also the end of
+        # a basic block.
+        self.add_item_to_end_list(target_line_no - 1)
 
-    if (len(end_list[index]) == 2):
-        # There is one target            
-        cfg.nodes[current_node]['target1'] = end_list[index][1]
-        create_di_graph(cfg, current_node, end_list[index][1])
-    elif (len(end_list[index]) == 3):
-        # There are two targets
-        cfg.nodes[current_node]['target1'] = end_list[index][1]
-        create_di_graph(cfg, current_node, end_list[index][1])
-        cfg.nodes[current_node]['target2'] = end_list[index][2]
-        create_di_graph(cfg, current_node, end_list[index][2])
 
+        # The subsequent line of a branch instruction is the start of basic block.
+        self.add_item_to_start_list(line_no + 1)
 
+        # The target line of a branch instruction is the start of a basic block.
+        self.add_item_to_start_list(target_line_no)
 
-def remove_duplicates() -> None:
-    """Detects and removes the duplicate elements in the end_list.
 
-    This function is called after analyzing the assembly code. During detection 
-    we don't check duplicate end points. Therefore, after analyzing the file 
-    there may be duplicate elements in the end_list. This function checks and 
-    removes them.
+    def process_jump_inst(self, instruction: int) -> None:
+        """Detects basic block starting and end points from given jump instruction.
 
-    This function does not return a value. Instead it makes required 
-    modifications to end_list.
-    """
+        Processes a given jump instrcution. Depending on the instruction, it
+        detects the starting and end points of basic blocks. This is achieved by the 
+        help of the rule set.
 
-    result = -1    
-    while(True):
-        if (result != -1):
-            del(end_list[result])
-            result = -1
-
-        found = False
-        for index_1, item_1 in enumerate(end_list):    
-            for index_2, item_2 in enumerate(end_list):
-                if ((item_1[0] == item_2[0]) & (index_1 != index_2)):
-                    found = True
-                    if (len(item_1) >= len(item_2)):
-                        result = index_2
-                    else:
-                        result = index_1
-                    break
-
-            if (found):
-                break
-
-        if (result == -1):
-            break
+        This function does not return a value. Instead it adds the line numbers of
+        the detected starting and end points of basic blocks to the start_set and
+        end_dict.
 
+        Parameters
+        ----------
+        instruction : int
+            Index of the jump instruction in the instruction table.
+        """
 
-def check_targets(assembly_code: list) -> None:
-    """Checks the targets of basic blocks.
-    
-    This function is called afeter analyzing the assembly code. It is used to 
-    check the targets of basic blocks. It detects targets of basic blocks which 
-    are not detected until now. This only happens if a basic block's target is 
-    the next line of the same basic block.
-
-    Iterate all of the items in the end_list. The items of the end_list 
-    represent end points of basic blocks. First element of an item is the line 
-    number of the end point of a basic block. Other elements of an item are the
-    targets of the basic block.
-    
-    If an item has not target information (basic block has not any 
-    target) and is not the end of the main function, the next line of the item 
-    should be the target of the item (the target of the basic block should be
-    the next line).
-
-    1. If the length of an item is 1 the item has not target information.
-    2. If the line number of an item (item[0]) is different from the line number 
-    of the end of main function, the item is not the end of the main function.
-    In this case the next line of the item is the target of the item (basic 
-    block).
-
-    This function does not return a value. Instead it makes required
-    modifications to end_list.
+        table = self.assembly_code.instructions
+        line_no = table.lines[instruction]
+        mnemonic = table.mnemonic(instruction)
+        address = table.addresses[instruction]
 
-    Parameters
-    ----------
-    assembly_code : list of str
-        Assembly code of the program. This is needed to find the line number of
-        the last instruction of the main function.
-    """
 
-    # Find the line number of the last instruction of main function.
-    main_function_end = asm_tools.get_function_end('main', assembly_code)
+        if (mnemonic == 'ret'):
+            # If the ret instruction is in the main function then just add that line 
+            # the end list. Otherwise do nothing. Because we add other functions'
+            # ret instructions to the end list during function call detection in 
+            # jal and jalr instructions.
+            fn = self.assembly_code.function_of_instruction(instruction).name
+            if (fn == "main"):
+                self.add_item_to_end_list(line_no)
 
-    for index, item in enumerate(end_list):
-        if (len(item) == 1):
-            if (item[0] != main_function_end):
-                item = [item[0], item[0] + 1]
-                end_list[index] = item
+        elif (mnemonic == 'jal'):
+            # The last operand is the target address.
+            # Sample code: jal	ra,101c4 <main>
+            target_address = table.targets[instruction]
 
+            target_line_no = self.assembly_code.address_to_line_no(target_address)
 
+            # The line of the jal instruction is the end of a basic block.
+            self.add_item_to_end_list(line_no, [target_line_no])
 
-def process_fn(line_no: int, assembly_code: list, trace_files: list) -> None:
-    """Detects basic blocks in a given funtion.
+            # Next line of the jal instruction is the start of a basic block. 
+            self.add_item_to_start_list(line_no + 1)
 
-    Traverses a function in assembly code line by line and detects basic blocks.
-    
-    First it checks if the is null or not. If the line is null this means the
-    end of the function is reached. In this case returns. If the line is not 
-    null the line is tokenized and analyzed.
+            # Target line of the jal instruction is the start of a basic block.
+            self.add_item_to_start_list(target_line_no)
 
-    If the length of the tokens is less than 3 the line is not a valid
-    instruction. In this case processing continues with the next line.
+            # Target of the jal instruction is a function.
+            self.will_be_visited_fn_list.append(target_line_no)
 
-    If the line is a "ret" (return from subroutine) instruction starting and
-    end points of basic blocks are detected and written in start_list and
-    end_list respectively.
+            # Find the end point (ret instruction) of the target function. Its 
+            # return point is the next line of the jal instruction. Add this info
+            # to the end list.
+            # Yelkovan now detects the target of ret instruction
+            # by the help of jal instruction in assembly code. Although ret is 
+            # a indirect jump instruction there is no need to search for the
+            # target of ret instrucion in trace files.
+            target_fn = self.assembly_code.function_at_address(target_address).name
+            target_fn_end = asm_tools.get_function_end(target_fn, self.assembly_code)
+            self.add_item_to_end_list(target_fn_end, [line_no + 1])
 
-    If the line is a branch or jump instruction the related functions which
-    process them is called.
-    
-    This function does not return a value. Instead it adds the line numbers of
-    the detected starting and end points of basic blocks to the start_list and
-    end_list.
 
-    Parameters
-    ----------
-    line_no : int
-        Starting line number of the function which is going to be processed.
-    assembly_code : list of str
-        Assembly code of the program.
-    trace_files : list of file
-        List of trace files of the program.
-    """
+        elif (mnemonic == 'jalr'):
 
-    global start_list
-    global end_list
+            target_line_no = self.find_target(address)
 
-    # Start of a funtion is always the start of a basic block.
-    add_item_to_start_list(line_no)
+            if (target_line_no == -1):
+                raise Exception("Error: Could not find the target of jalr instruction on line " + str(line_no))
 
-    index = line_no - 1
-    while(True):
-        index = index + 1
+            # The line of the jalr instruction is the end of a basic block.
+            self.add_item_to_end_list(line_no, [target_line_no])
 
-        if (assembly_code[index] == ""):
-            # Reached end of the function.
-            return
+            # Next line of the jalr instruction is the start of a basic block.
+            self.add_item_to_start_list(line_no + 1)
 
-        tokens = assembly_code[index].split()
-        # tokens[0] -> address:
-        # tokens[1] -> hexadecimal code of machine language instruction
-        # tokens[2] -> mnemonic
-        # tokens[3] -> operands
+            # Target line of the jalr instruction is the start of a basic block.
+            self.add_item_to_start_list(target_line_no)
 
-        if (len(tokens) < 3):
-            # Not a valid instruction. Continue with next line.
-            continue
+            # Target of the jalr instruction is a function.
+            self.will_be_visited_fn_list.append(target_line_no)
 
-        elif (tokens[2] in branch_inst):
-            process_branch_inst(index, tokens, assembly_code)
-            
-        elif (tokens[2] in jump_inst):
-            process_jump_inst(index, tokens, assembly_code, trace_files)
-    
+            # Find the end point (ret instruction) of the target function. Its 
+            # return point is the next line of the jal instruction. Add this info
+            # to the end list.
+            # Yelkovan now detects the target of ret instruction
+            # by the help of jal instruction in assembly code. Although ret is 
+            # a indirect jump instruction there is no need to search for the
+            # target of ret instrucion in trace files.
+            target_fn = self.assembly_code.function_at_address(
+                self.assembly_code.address_of_line(target_line_no)).name
+            target_fn_end = asm_tools.get_function_end(target_fn, self.assembly_code)
+            self.add_item_to_end_list(target_fn_end, [line_no + 1])
 
-def process_branch_inst(line_no: int, tokens: list, assembly_code: list) -> None:
-    """Detects basic block starting and end points from given branch instruction.
-    
-    Processes a given branch instrcution. Depending on the instruction, it
-    detects the startng and end points of basic blocks. This is achieved by the 
-    help of the rule set.
 
-    This function does not return a value. Instead it adds the line numbers of
-    the detected starting and end points of basic blocks to the start_list and
-    end_list.
+        elif (mnemonic == 'j'):
 
-    Parameters
-    ----------
-    line_no : int
-        Line number of the branch instruction which will be processed.
-    tokens : list of str
-        The branch instruction line which will be processed.
-    assembly_code : list of str
-        Assembly code of the program.
-    """
+            # The operand of a j instruction is the target address.
+            target_line_no = self.assembly_code.address_to_line_no(table.targets[instruction])
 
-    operands = tokens[3].split(',')
+            self.add_item_to_start_list(line_no + 1)
+            self.add_item_to_start_list(target_line_no)
 
-    # operands[2] -> target address
+            self.add_item_to_end_list(line_no, [target_line_no])
 
-    target_line_no = asm_tools.address_to_line_no(operands[2], assembly_code)
+            # Previous line of the target of a j instruction is also the end of
+            # a basic block.
+            self.add_item_to_end_list(target_line_no - 1)
 
-    # The line of the current branch instruction is the end of a basic block.
-    # Branch instructions have two targets.
-    # The subsequent line and the branch target are the targets of the branch
-    # instruction. We add all this together to the end list.
-    add_item_to_end_list(line_no, [line_no + 1, target_line_no])
 
+        elif (mnemonic == 'jr'):
 
-    # Previous line of the target of a branch instruction is also the end of
-    # a basic block.
-    add_item_to_end_list(target_line_no - 1)
+            self.add_item_to_start_list(line_no + 1)
 
+            target_line_no = self.find_target(address)
+            if (target_line_no == -1):
+                print("Error: Could not find the target of jr instruction on line " + str(line_no))
+            else:
+                self.add_item_to_start_list(target_line_no)
 
-    # The subsequent line of a branch instruction is the start of basic block.
-    add_item_to_start_list(line_no + 1)
+                # Previous line of the target of a jr instruction is also the end of
+                # a basic block.
+                self.add_item_to_end_list(target_line_no - 1)
 
-    # The target line of a branch instruction is the start of a basic block.
-    add_item_to_start_list(target_line_no)
 
+            self.add_item_to_end_list(line_no, [target_line_no])
 
-def process_jump_inst(line_no: int, tokens: list, assembly_code: list, 
-                      trace_files: list) -> None:
-    """Detects basic block starting and end points from given jump instruction.
-    
-    Processes a given jump instrcution. Depending on the instruction, it
-    detects the starting and end points of basic blocks. This is achieved by the 
-    help of the rule set.
 
-    This function does not return a value. Instead it adds the line numbers of
-    the detected starting and end points of basic blocks to the start_list and
-    end_list.
+    def find_target(self, source_address: int) -> int:
+        """Finds the line number of the target address of an indirect jump 
+        instruction by the help of trace files.
 
-    Parameters
-    ----------
-    line_no : int
-        Line number of the jump instruction which will be processed.
-    tokens : list of str
-        The jump instruction line which will be processed.
-    assembly_code : list of str 
-        Assembly code of the program.
-    trace_files : list of file
-        List of trace files of the program.
-    """
+        This is achived by processing trace files. Firstly the source address 
+        of jump instruction is found in the trace files. The subsequent line  
+        is the target of the jump instruction. The trace files are processed once
+        for all of the indirect jump instructions and the successors are kept in
+        the trace index. The address information in the
+        subsequent line is extracted. Then, the code line which starts with this
+        address is searched in the assembly file. This code line is the target of 
+        the jump instruction and the beginning of a basic block. The line number
+        of this code line is returned.
 
-    global will_be_visited_fn_list
-
-
-    if (tokens[2] == 'ret'):
-        # If the ret instruction is in the main function then just add that line 
-        # the end list. Otherwise do nothing. Because we add other functions'
-        # ret instructions to the end list during function call detection in 
-        # jal and jalr instructions.
-        fn = asm_tools.get_function_name(assembly_code[line_no].split()[0][:-1], assembly_code)
-        if (fn == "main"):
-            add_item_to_end_list(line_no)
-
-    elif (tokens[2] == 'jal'):
-        operands = tokens[3].split(',')
-
-        # operands[1] -> target address
-        # Sample code: jal	ra,101c4 <main>
-        
-        target_line_no = asm_tools.address_to_line_no(operands[1], assembly_code)
-
-        # The line of the jal instruction is the end of a basic block.
-        add_item_to_end_list(line_no, [target_line_no])
-        
-        # Next line of the jal instruction is the start of a basic block. 
-        add_item_to_start_list(line_no + 1)
-
-        # Target line of the jal instruction is the start of a basic block.
-        add_item_to_start_list(target_line_no)
-
-        # Target of the jal instruction is a function.
-        will_be_visited_fn_list.append(target_line_no)
-
-        # Find the end point (ret instruction) of the target function. Its 
-        # return point is the next line of the jal instruction. Add this info
-        # to the end list.
-        # Yelkovan now detects the target of ret instruction
-        # by the help of jal instruction in assembly code. Although ret is 
-        # a indirect jump instruction there is no need to search for the
-        # target of ret instrucion in trace files.
-        target_fn = asm_tools.get_function_name(operands[1], assembly_code)
-        target_fn_end = asm_tools.get_function_end(target_fn, assembly_code)
-        add_item_to_end_list(target_fn_end, [line_no + 1])
-
-
-    elif (tokens[2] == 'jalr'):
-
-        # tokens[0][:-1] is the address of the jalr instruction.
-        target_line_no = find_target(tokens[0][:-1], assembly_code, trace_files)
-
-        if (target_line_no == -1):
-            raise Exception("Error: Could not find the target of jalr instruction on line " + line_no)
-
-        # The line of the jalr instruction is the end of a basic block.
-        add_item_to_end_list(line_no, [target_line_no])
-
-        # Next line of the jalr instruction is the start of a basic block.
-        add_item_to_start_list(line_no + 1)
-        
-        # Target line of the jalr instruction is the start of a basic block.
-        add_item_to_start_list(target_line_no)
-
-        # Target of the jalr instruction is a function.
-        will_be_visited_fn_list.append(target_line_no)
-
-        # Find the end point (ret instruction) of the target function. Its 
-        # return point is the next line of the jal instruction. Add this info
-        # to the end list.
-        # Yelkovan now detects the target of ret instruction
-        # by the help of jal instruction in assembly code. Although ret is 
-        # a indirect jump instruction there is no need to search for the
-        # target of ret instrucion in trace files.
-        # assembly_code[target_line_no].split()[0][:-1] is the address of the 
-        # target line number. get_function_name of asm_tools.py expects address
-        # value.
-        target_fn = asm_tools.get_function_name(assembly_code[target_line_no].split()[0][:-1], assembly_code)
-        target_fn_end = asm_tools.get_function_end(target_fn, assembly_code)
-        add_item_to_end_list(target_fn_end, [line_no + 1])
-
-
-    elif (tokens[2] == 'j'):
-        
-        # No need to split. Fourth token in the line of a j instruction is
-        # the target address
-        target_line_no = asm_tools.address_to_line_no(tokens[3], assembly_code)
-
-        add_item_to_start_list(line_no + 1)
-        add_item_to_start_list(target_line_no)
-        
-        add_item_to_end_list(line_no, [target_line_no])
-        
-        # Previous line of the target of a j instruction is also the end of
-        # a basic block.
-        add_item_to_end_list(target_line_no - 1)
-        
+        If source address of the jump instruction is not found in the trace files, 
+        this means that the path was not taken. In this case an error is raised. The
+        error is raised by the "get_next_address" method of the trace index.
 
-    elif (tokens[2] == 'jr'):
+        If the target address of the jump instruction is not found the assembly file
+        an error is raised. The error is raised by the "address_to_line_no" function 
+        in the trace_tools file.
 
-        add_item_to_start_list(line_no + 1)
+        Parameters
+        ----------
+        source_address : int
+            The source address which will be searched in trace files.
 
-        target_line_no = find_target(tokens[0][:-1], assembly_code, trace_files)
-        if (target_line_no == -1):
-            print("Error: Could not find the target of jr instruction on line " + line_no)
-        else:
-            add_item_to_start_list(target_line_no)
-            
-            # Previous line of the target of a jr instruction is also the end of
-            # a basic block.
-            add_item_to_end_list(target_line_no - 1)
+        Returns
+        -------
+        line_no : int
+            The line number of the target address. Positive integer if successful,
+            raises error otherwise
+        """
 
 
-        add_item_to_end_list(line_no, [target_line_no])
+        target_address = self.trace_index.get_target(source_address)
+        line_no = self.assembly_code.address_to_line_no(target_address)
 
+        if self.indirect_targets is not None:
+            self.indirect_targets.append((source_address, line_no))
 
+        return line_no
 
-def find_target(source_address: str, assembly_code: list, 
-                trace_files: list) -> int:
-    """Finds the line number of the target address of an indirect jump 
-    instruction by the help of trace files.
- 
-    This is achived by processing trace files. Firstly the source address 
-    of jump instruction is found in the trace files. The subsequent line  
-    is the target of the jump instruction. The address information in the
-    subsequent line is extracted. Then, the code line which starts with this
-    address is searched in the assembly file. This code line is the target of 
-    the jump instruction and the beginning of a basic block. The line number
-    of this code line is returned.
 
-    If source address of the jump instruction is not found in the trace files, 
-    this means that the path was not taken. In this case an error is raised. The
-    error is raised by the "get_next_address" function in the trace_tools file.
+    def add_item_to_start_list(self, starting_point: int) -> None:
+        """Adds an item to the start list.
 
-    If the target address of the jump instruction is not found the assembly file
-    an error is raised. The error is raised by the "address_to_line_no" function 
-    in the trace_tools file.
+        The item is the the line number of the starting point of the basic block. 
+        When the starting point of a basic block is found this function is called to
+        add it to start_set.
 
-    Parameters
+        The starting points are collected in start_set, therefore an item which is
+        already present is not added again.
+
+        This function does not return a value.
+
+
+        Parameters
+        ----------
+        starting_point : int
+            The line number of the start of a basic block which will be added to
+            start_set.
+        """
+
+
+        # The start_set does not hold duplicate items.
+        self.start_set.add(starting_point)
+
+
+    def add_item_to_end_list(self, end_point: int, target: List[int] = None) -> None:
+        """Adds an item to the end list.
+
+        Each item of this list may be a list depending on the end point.
+        The first element of the item is the line number of the end point of a basic 
+        block. The following elemnents of the item are the line numbers of targets
+        of the end point of the basic block. When the end point of a basic block is 
+        found this function is called to add it to end_dict.
+
+        The end points are collected in end_dict. The targets of an end point are
+        the keys of a dictionary, so checking if an end point or a target is
+        already present takes constant time.
+
+        If the item is in the end_dict its targets which are not present are added.
+        If the item is not in the end_dict, it is added with all of its targets.
+
+        This function does not return a value.
+
+
+        Parameters
+        ----------
+        end_point: int
+            The line number of the end of a basic block which will be added to
+            end_dict.
+        target: list of int
+            The list of line numbers of the targets of the end point.
+        """
+
+
+        # If the end_point is not in the end_dict add it.
+        targets = self.end_dict.setdefault(end_point, {})
+
+        # If there is no target information there is nothing more to do. Just return.
+        if target is None:
+            return
+
+        # Add targets to the end_point. An end point is never its own target.
+        for target_item in target:
+            if target_item != end_point:
+                targets[target_item] = None
+
+
+    def check_targets(self) -> None:
+        """Checks the targets of basic blocks.
+
+        This function is called afeter analyzing the assembly code. It is used to 
+        check the targets of basic blocks. It detects targets of basic blocks which 
+        are not detected until now. This only happens if a basic block's target is 
+        the next line of the same basic block.
+
+        Iterate all of the items in the end_dict. The keys of the end_dict 
+        represent end points of basic blocks. The values are the targets of the
+        basic blocks.
+
+        If an item has not target information (basic block has not any 
+        target) and is not the end of the main function, the next line of the item 
+        should be the target of the item (the target of the basic block should be
+        the next line).
+
+        1. If the targets of an item are empty the item has not target information.
+        2. If the line number of an item is different from the line number 
+        of the end of main function, the item is not the end of the main function.
+        In this case the next line of the item is the target of the item (basic 
+        block).
+
+        This function does not return a value. Instead it makes required
+        modifications to end_dict.
+
+        Parameters
+        ----------
+        """
+
+        # Find the line number of the last instruction of main function.
+        main_function_end = asm_tools.get_function_end('main', self.assembly_code)
+
+        for end_point, targets in self.end_dict.items():
+            if (not targets):
+                if (end_point != main_function_end):
+                    targets[end_point + 1] = None
+
+
+    def finalise_lists(self) -> None:
+        """Sorts the starting points and end points of basic blocks.
+
+        This function is called after the detection of basic blocks. It creates
+        start_list and end_list from start_set and end_dict. Both of the lists are
+        sorted by line number, therefore the items with the same index in the lists
+        represent the same basic block. The index of each basic block is written to
+        start_index.
+
+        This function does not return a value.
+        """
+
+
+        self.start_list = sorted(self.start_set)
+        self.end_list = [[end_point] + list(self.end_dict[end_point])
+                         for end_point in sorted(self.end_dict)]
+        self.start_index = {starting_point: index
+                            for index, starting_point in enumerate(self.start_list)}
+
+
+
+class DynamicAnalyzer:
+    """Detector of the executed basic blocks of a program.
+
+    The dynamic control flow graph includes only the basic blocks and edges
+    which are executed in the trace files. It is created from the transitions
+    of the trace files (see trace_tools.TransitionIndex) and the address index
+    of the assembly code, without the traversal of the functions by
+    `Analyzer.process_fn`.
+
+    The targets of the transitions and the first instructions of the trace
+    files are the starting points of basic blocks. The sources of the
+    transitions and the last instructions of the trace files are the end
+    points of basic blocks. A basic block continues from its starting point
+    until an end point, the instruction before another starting point or the
+    end of its function. The transitions are the edges of the graph, together
+    with the edges of the basic blocks which continue into the next basic
+    block.
+
+    A sample usage is:
+
+        result = DynamicAnalyzer.from_files("loop_test.dump", ["loop_test.trc"]).analyse()
+
+    Attributes
     ----------
-    source_address : str
-        The source address which will be searched in trace files.
-    assembly_code : list of str
-        Assembly code in which the line number of the target address will be 
-        searched.
-    trace_files : list of file
-        List of trace files in which the source address will be searched.
+    assembly_code : AssemblyIndex
+        Assembly code of the program.
+    transition_index : TransitionIndex
+        Transitions of the trace files.
+    unmapped : int
+        Number of addresses of the transitions which are not in the assembly
+        code, like the addresses of a dynamically loaded library.
+    """
+
+    def __init__(self, assembly_code: asm_tools.AssemblyIndex,
+                 transition_index: trace_tools.TransitionIndex):
+        """Creates an analyzer of a program.
+
+        Parameters
+        ----------
+        assembly_code : AssemblyIndex
+            Assembly code of the program.
+        transition_index : TransitionIndex
+            Transitions of the trace files.
+        """
+
+        self.assembly_code: asm_tools.AssemblyIndex = assembly_code
+        self.transition_index: trace_tools.TransitionIndex = transition_index
+        self.unmapped: int = 0
+
+
+    @classmethod
+    def from_files(cls, assembly_file: str, trace_files: list, jobs: int = 1,
+                   cache: Optional[cache_tools.Cache] = None) -> "DynamicAnalyzer":
+        """Creates an analyzer from the assembly file and trace files.
+
+        Parameters
+        ----------
+        assembly_file : str
+            Name of the assembly file of the program.
+        trace_files : list of str
+            List of names of the trace files of the program.
+        jobs : int
+            Number of worker processes which read the trace files.
+        cache : Cache or None
+            Persistent cache of the assembly index and the transition index.
+
+        Returns
+        -------
+        DynamicAnalyzer
+            Analyzer of the program.
+        """
+
+        assembly_code = None
+        transition_index = None
+
+        if cache is not None:
+            assembly_digest = cache.file_digest(assembly_file)
+            assembly_key = cache.key("assembly", assembly_digest)
+            # The control instructions come from the assembly file, so the
+            # transition index depends on the assembly file as well.
+            transition_key = cache.key("transitions", assembly_digest,
+                                       *[cache.file_digest(file) for file in trace_files])
+            assembly_code = cache.get(assembly_key)
+            transition_index = cache.get(transition_key)
+
+        if assembly_code is None:
+            assembly_code = asm_tools.AssemblyIndex.from_file(assembly_file)
+            if cache is not None:
+                cache.put(assembly_key, assembly_code)
+
+        if transition_index is None:
+            controls = assembly_code.find_instructions(branch_inst + jump_inst)
+            transition_index = trace_tools.TransitionIndex(controls, trace_files, jobs)
+            if cache is not None:
+                cache.put(transition_key, transition_index)
+
+        return cls(assembly_code, transition_index)
+
+
+    def analyse(self) -> AnalysisResult:
+        """Detects the executed basic blocks and creates the control flow graph.
+
+        The root node of the graph is the first instruction of the main function
+        if it is executed, otherwise the first instruction of the first trace
+        file.
+
+        Returns
+        -------
+        AnalysisResult
+            Executed basic blocks and control flow graph of the program.
+        """
+
+        start_list, end_list, entry = self.find_blocks()
+
+        # A program without a main function is not an error here, since the
+        # trace files may start anywhere.
+        root_node = entry
+        try:
+            main_start = asm_tools.get_function_start("main", self.assembly_code)
+        except Exception:
+            main_start = None
+        if main_start in set(start_list):
+            root_node = main_start
+
+        graph = cfg_tools.CompactCFG.from_edges(start_list, end_list, root_node,
+                                                self.assembly_code)
+
+        return AnalysisResult(start_list, end_list, root_node, graph)
+
+
+    def find_blocks(self) -> Tuple[List[int], List[List[int]], int]:
+        """Finds the executed basic blocks and their targets.
+
+        Returns
+        -------
+        tuple
+            The sorted line numbers of the starting points of basic blocks, the
+            end points of the basic blocks with their targets in the same
+            order, and the starting line of the first executed basic block (-1
+            if none). The targets which follow a basic block in the assembly
+            code come first.
+        """
+
+        table = self.assembly_code.instructions
+        line_numbers = self.assembly_code.line_numbers
+        function_ids = table.function_ids
+        index = self.transition_index
+        self.unmapped = 0
+
+        # Index of each address in the instruction table, None if the address
+        # is not in the assembly code.
+        indexes: Dict[int, Optional[int]] = {}
+
+        def instruction(address: int) -> Optional[int]:
+            if address not in indexes:
+                line_no = line_numbers.get(address)
+                if line_no is None:
+                    self.unmapped += 1
+                    indexes[address] = None
+                else:
+                    indexes[address] = table.index_of_line(line_no)
+            return indexes[address]
+
+        # Starting points and end points of basic blocks, as indexes of the
+        # instruction table. A transition from or to an address which is not in
+        # the assembly code is not an edge, but it still ends or starts a block.
+        starts: Set[int] = set()
+        ends: Set[int] = set()
+        transitions: List[Tuple[int, int]] = []
+        for source, target in index.transitions:
+            source = instruction(source)
+            target = instruction(target)
+            if source is not None:
+                ends.add(source)
+            if target is not None:
+                starts.add(target)
+            if source is not None and target is not None:
+                transitions.append((source, target))
+        transitions.sort()
+
+        entries = [instruction(address) for address in index.entries]
+        starts.update(first for first in entries if first is not None)
+        ends.update(last for last in map(instruction, index.exits) if last is not None)
+
+        # The last instruction of each basic block is the first end point, the
+        # instruction before the next starting point or the last instruction
+        # of the function, whichever comes first.
+        sorted_starts = sorted(starts)
+        sorted_ends = sorted(ends)
+        blocks: Dict[int, int] = {}
+        end = 0
+        for position, first in enumerate(sorted_starts):
+            last = summary_tools.function_end(table, first) - 1
+            if position + 1 < len(sorted_starts):
+                last = min(last, sorted_starts[position + 1] - 1)
+            while end < len(sorted_ends) and sorted_ends[end] < first:
+                end = end + 1
+            if end < len(sorted_ends):
+                last = min(last, sorted_ends[end])
+            blocks[first] = last
+
+        # The target which follows a basic block in the assembly code comes
+        # first, the other targets are in the order of their addresses.
+        block_of_last = {last: first for first, last in blocks.items()}
+        targets: Dict[int, List[int]] = {}
+        for first, last in blocks.items():
+            if (last not in ends and last + 1 in starts
+                    and function_ids[last + 1] == function_ids[first]):
+                targets[first] = [last + 1]
+            else:
+                targets[first] = []
+
+        for source, target in transitions:
+            first = block_of_last.get(source)
+            if first is None or target not in blocks:
+                continue
+            if target == source + 1:
+                targets[first].insert(0, target)
+            else:
+                targets[first].append(target)
+
+        lines = table.lines
+        start_list = [lines[first] for first in blocks]
+        end_list = [[lines[last]] + [lines[target] for target in targets[first]]
+                    for first, last in blocks.items()]
+        entry = next((lines[first] for first in entries if first is not None), -1)
+
+        return start_list, end_list, entry
+
+
+
+def _init_worker(assembly_code: asm_tools.AssemblyIndex,
+                 trace_index: trace_tools.SuccessorIndex) -> None:
+    """Creates the analyzer of a worker process which detects functions."""
+
+    global _worker_analyzer
+    _worker_analyzer = Analyzer(assembly_code, trace_index)
+
+
+def _detect_functions(line_nos: List[int]) -> Dict[int, tuple]:
+    """Detects the basic blocks of functions in a worker process.
+
+    The given functions are processed first, then the functions which are
+    called by them, up to TASK_FUNCTIONS functions.
 
     Returns
     -------
-    line_no : int
-        The line number of the target address. Positive integer if successful,
-        raises error otherwise
+    dict of int to tuple
+        Maps the starting line of each processed function to its starting
+        points, its end points with their targets, the starting lines of the
+        functions which it calls, the text which is printed while processing
+        it and the exception which is raised while processing it (or None).
     """
 
+    analyzer = _worker_analyzer
+    results: Dict[int, tuple] = {}
+
+    # The list grows with the called functions while it is iterated.
+    queue = list(line_nos)
+
+    for line_no in queue:
+        if line_no in results:
+            continue
+        if len(results) >= max(TASK_FUNCTIONS, len(line_nos)):
+            break
+
+        analyzer.reset()
+        output = io.StringIO()
+        error = None
+        try:
+            with contextlib.redirect_stdout(output):
+                analyzer.process_fn(line_no)
+        except Exception as exception:
+            error = exception
 
-    target_address = trace_tools.get_next_address(source_address, trace_files)
-    line_no = asm_tools.address_to_line_no(target_address, assembly_code)
+        results[line_no] = (analyzer.start_set, analyzer.end_dict,
+                            analyzer.will_be_visited_fn_list, output.getvalue(),
+                            error)
+        if error is None:
+            queue.extend(analyzer.will_be_visited_fn_list)
 
-    return line_no
+    return results
 
 
 
@@ -746,4 +1661,4 @@ if __name__ == "__main__":
     """Entry point of the Yelkovan.
     """
 
-    main()
\ No newline at end of file
+    main()